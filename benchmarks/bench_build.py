@@ -0,0 +1,58 @@
+"""
+Build latency for synthetic projects of increasing size, with and
+without the build cache.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from synthetic import PROJECT_SIZES
+
+BUILD_ARGS = ["build", "--local-only", "--force"]
+
+
+@pytest.mark.parametrize("size", PROJECT_SIZES, ids=str)
+def bench_build_cold(ddit_bench, project_factory, size):
+    """
+    Full rebuild: DAR, dependency resolution, PEX and DIT assembly.
+    """
+    project_dir = project_factory(size)
+
+    ddit_bench([*BUILD_ARGS, "--no-cache", "--rebuild-dar"], cwd=project_dir)
+
+
+@pytest.mark.parametrize("size", PROJECT_SIZES, ids=str)
+def bench_build_sources_changed(ddit_bench, project_factory, size):
+    """
+    Rebuild after a change to the integration sources, with the DAR and
+    resolved dependencies unchanged.
+    """
+    project_dir = project_factory(size)
+
+    ddit_bench.run_once(BUILD_ARGS, cwd=project_dir)
+
+    source_file = os.path.join(project_dir, "src", "bench_int", "__init__.py")
+    edits = []
+
+    def edit_source():
+        edits.append(len(edits))
+
+        with open(source_file, "a") as f:
+            f.write(f"EDIT_{len(edits)} = {len(edits)}\n")
+
+    ddit_bench(BUILD_ARGS, cwd=project_dir, setup=edit_source)
+
+
+@pytest.mark.parametrize("size", PROJECT_SIZES, ids=str)
+def bench_build_cached(ddit_bench, project_factory, size):
+    """
+    No-op rebuild, satisfied from the build cache.
+    """
+    project_dir = project_factory(size)
+
+    ddit_bench.run_once(BUILD_ARGS, cwd=project_dir)
+
+    ddit_bench(BUILD_ARGS, cwd=project_dir)
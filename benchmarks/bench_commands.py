@@ -0,0 +1,27 @@
+"""
+Latency of the lightweight subcommands that read a project's metadata or
+an existing DIT file.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from synthetic import PROJECT_SIZES
+
+
+@pytest.mark.parametrize("size", PROJECT_SIZES, ids=str)
+def bench_inspect(ddit_bench, built_project_factory, size):
+    (project_dir, dit_filename) = built_project_factory(size)
+
+    ddit_bench(["inspect", dit_filename], cwd=project_dir)
+
+
+@pytest.mark.parametrize("size", PROJECT_SIZES, ids=str)
+def bench_show(ddit_bench, project_factory, size):
+    ddit_bench(["show"], cwd=project_factory(size))
+
+
+@pytest.mark.parametrize("size", PROJECT_SIZES, ids=str)
+def bench_targetname(ddit_bench, project_factory, size):
+    ddit_bench(["targetname"], cwd=project_factory(size))
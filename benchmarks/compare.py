@@ -0,0 +1,82 @@
+"""
+Compare two benchmark result files written with --bench-json.
+
+For each benchmark present in both files, prints the change in median
+latency and peak RSS. Exits with status 1 if any benchmark's median
+latency or peak RSS grew by more than the threshold.
+
+    python3 benchmarks/compare.py OLD.json NEW.json [--threshold PCT]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict
+
+
+def load_results(filename: str) -> "Dict[str, Dict[str, Any]]":
+    with open(filename, "r") as f:
+        data = json.load(f)
+
+    return {bench["name"]: bench for bench in data["benchmarks"]}
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percentage increase treated as a regression.",
+    )
+    args = parser.parse_args()
+
+    old_results = load_results(args.old)
+    new_results = load_results(args.new)
+
+    regressions = []
+
+    print(f"{'benchmark':<50} {'old':>10} {'new':>10} {'change':>8} {'rss':>8}")
+
+    for (name, new) in new_results.items():
+        old = old_results.get(name)
+
+        if old is None:
+            continue
+
+        old_median = old["stats"]["median"]
+        new_median = new["stats"]["median"]
+
+        time_change = _change(old_median, new_median)
+        rss_change = _change(old["extra_info"]["max_rss"], new["extra_info"]["max_rss"])
+
+        print(
+            f"{name:<50}"
+            f" {old_median * 1000:>8.1f}ms"
+            f" {new_median * 1000:>8.1f}ms"
+            f" {time_change:>+7.1f}%"
+            f" {rss_change:>+7.1f}%"
+        )
+
+        if time_change > args.threshold or rss_change > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold}%:")
+
+        for name in regressions:
+            print(f"  {name}")
+
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Benchmark fixtures. Each benchmarked command runs `ddit` in a fresh
+interpreter against a synthetic project, timing the wall clock latency
+and recording the peak RSS of the ddit process. Run with:
+
+    make bench
+
+or, to record results for comparison across commits:
+
+    python3 -m pytest benchmarks -o python_files='bench_*.py' \\
+        -o python_functions='bench_*' --bench-json FILE
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pytest
+
+from synthetic import write_fake_daml, write_project
+
+from daml_dit_ddit.timing import max_rss_bytes
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAUNCHER = "import sys; from daml_dit_ddit import main; sys.argv[0] = 'ddit'; main()"
+
+
+@dataclass
+class BenchResult:
+    name: str
+    group: str
+    params: "Dict[str, Any]"
+    times: "List[float]" = field(default_factory=list)
+    max_rss: "List[int]" = field(default_factory=list)
+
+    def as_json(self) -> "Dict[str, Any]":
+        return {
+            "name": self.name,
+            "group": self.group,
+            "params": self.params,
+            "stats": {
+                "rounds": len(self.times),
+                "min": min(self.times),
+                "max": max(self.times),
+                "mean": statistics.mean(self.times),
+                "median": statistics.median(self.times),
+                "stddev": statistics.stdev(self.times) if len(self.times) > 1 else 0.0,
+            },
+            "extra_info": {
+                "max_rss": max(self.max_rss),
+                "median_max_rss": statistics.median(self.max_rss),
+            },
+        }
+
+
+_results: "List[BenchResult]" = []
+
+
+def run_ddit(
+    args: "Sequence[str]", cwd: str, env: "Dict[str, str]"
+) -> "subprocess.CompletedProcess":
+    return subprocess.run(
+        [sys.executable, "-c", LAUNCHER, *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-rounds",
+        type=int,
+        default=5,
+        help="Number of timed rounds per benchmark.",
+    )
+
+    parser.addoption(
+        "--bench-json",
+        default=None,
+        help="Write benchmark results to a JSON file.",
+    )
+
+
+class DditBench:
+    """
+    Runs a ddit command repeatedly in a project directory, recording the
+    latency and peak RSS of each run.
+    """
+
+    def __init__(self, request, env: "Dict[str, str]", rounds: int):
+        self._request = request
+        self._env = env
+        self.rounds = rounds
+
+    def run_once(self, args: "Sequence[str]", cwd: str) -> "subprocess.CompletedProcess":
+        """
+        Run a command without recording it, to prepare for a benchmark.
+        """
+        return run_ddit(args, cwd, self._env)
+
+    def __call__(
+        self,
+        args: "Sequence[str]",
+        cwd: str,
+        setup: "Optional[Callable[[], None]]" = None,
+        rounds: "Optional[int]" = None,
+    ) -> "BenchResult":
+        node = self._request.node
+        callspec = getattr(node, "callspec", None)
+
+        result = BenchResult(
+            name=node.name,
+            group=node.originalname,
+            params={k: str(v) for (k, v) in (callspec.params if callspec else {}).items()},
+        )
+
+        for _ in range(rounds or self.rounds):
+            if setup:
+                setup()
+
+            with tempfile.TemporaryFile() as stderr:
+                start = time.perf_counter()
+
+                proc = subprocess.Popen(
+                    [sys.executable, "-c", LAUNCHER, *args],
+                    cwd=cwd,
+                    env=self._env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr,
+                )
+
+                # wait4 reports the resource usage of this child alone,
+                # where RUSAGE_CHILDREN would accumulate across runs.
+                (_, status, rusage) = os.wait4(proc.pid, 0)
+
+                elapsed = time.perf_counter() - start
+
+                proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+
+                if proc.returncode != 0:
+                    stderr.seek(0)
+                    pytest.fail(f"ddit {' '.join(args)} failed:\n{stderr.read().decode()}")
+
+            result.times.append(elapsed)
+            result.max_rss.append(max_rss_bytes(rusage.ru_maxrss))
+
+        _results.append(result)
+
+        return result
+
+
+@pytest.fixture(scope="session")
+def bench_env(tmp_path_factory) -> "Dict[str, str]":
+    """
+    Environment for benchmarked commands: the stand-in daml on PATH, this
+    checkout on PYTHONPATH, and a build cache private to the session.
+    """
+    bin_dir = str(tmp_path_factory.mktemp("bin"))
+
+    write_fake_daml(bin_dir, sys.executable)
+
+    return {
+        **os.environ,
+        "PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""),
+        "PYTHONPATH": REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "DDIT_CACHE_DIR": str(tmp_path_factory.mktemp("ddit-cache")),
+    }
+
+
+@pytest.fixture
+def ddit_bench(request, bench_env) -> "DditBench":
+    return DditBench(request, bench_env, request.config.getoption("--bench-rounds"))
+
+
+@pytest.fixture(scope="session")
+def project_factory(tmp_path_factory):
+    projects: "Dict[Any, str]" = {}
+
+    def make_project(size) -> str:
+        if size not in projects:
+            projects[size] = write_project(
+                str(tmp_path_factory.mktemp(f"project-{size.name}")), size
+            )
+
+        return projects[size]
+
+    return make_project
+
+
+@pytest.fixture(scope="session")
+def built_project_factory(project_factory, bench_env):
+    """
+    Synthetic projects with their DIT files built, as (project directory,
+    DIT filename) pairs.
+    """
+    built: "Dict[Any, Tuple[str, str]]" = {}
+
+    def make_built_project(size) -> "Tuple[str, str]":
+        if size not in built:
+            project_dir = project_factory(size)
+
+            run_ddit(["build", "--local-only", "--force"], project_dir, bench_env)
+
+            dit_filename = run_ddit(["targetname"], project_dir, bench_env).stdout.strip()
+
+            built[size] = (project_dir, dit_filename)
+
+        return built[size]
+
+    return make_built_project
+
+
+def _commit_info() -> "Dict[str, Any]":
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {"id": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+
+    terminalreporter.section("ddit benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':<50} {'median':>10} {'min':>10} {'max':>10} {'peak rss':>10}"
+    )
+
+    for result in _results:
+        stats = result.as_json()["stats"]
+
+        terminalreporter.write_line(
+            f"{result.name:<50}"
+            f" {stats['median'] * 1000:>8.1f}ms"
+            f" {stats['min'] * 1000:>8.1f}ms"
+            f" {stats['max'] * 1000:>8.1f}ms"
+            f" {max(result.max_rss) / (1024 * 1024):>7.1f}MiB"
+        )
+
+    json_filename = config.getoption("--bench-json")
+
+    if json_filename:
+        with open(json_filename, "w") as f:
+            json.dump(
+                {
+                    "machine_info": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "cpu_count": os.cpu_count(),
+                    },
+                    "commit_info": _commit_info(),
+                    "datetime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    "benchmarks": [result.as_json() for result in _results],
+                },
+                f,
+                indent=2,
+            )
+
+        terminalreporter.write_line(f"Benchmark results written to {json_filename}")
@@ -0,0 +1,92 @@
+"""
+Measure ddit startup time per subcommand.
+
+Each subcommand is invoked with --help in a fresh interpreter, which
+loads and configures the subcommand module without doing any project
+work. The reported time is therefore the fixed cost of starting ddit
+for that subcommand: interpreter startup plus module imports.
+
+    python3 benchmarks/startup.py [--runs N] [--json FILE] [SUBCOMMAND ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_SUBCOMMANDS = [
+    "bench-start",
+    "build",
+    "clean",
+    "ditversion",
+    "fetch",
+    "genargs",
+    "inspect",
+    "install",
+    "lock",
+    "release",
+    "run",
+    "show",
+    "size",
+    "targetname",
+]
+
+LAUNCHER = "import sys; from daml_dit_ddit import main; sys.argv[0] = 'ddit'; main()"
+
+
+def time_subcommand(subcommand: str, runs: int):
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+
+        subprocess.run(
+            [sys.executable, "-c", LAUNCHER, subcommand, "--help"],
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("subcommands", nargs="*", default=DEFAULT_SUBCOMMANDS)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", dest="json_file", default=None)
+    args = parser.parse_args()
+
+    results = {}
+
+    print(f"{'subcommand':<12} {'median':>10} {'min':>10} {'max':>10}")
+
+    for subcommand in args.subcommands:
+        timings = time_subcommand(subcommand, args.runs)
+
+        results[subcommand] = {
+            "runs": args.runs,
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "max": max(timings),
+        }
+
+        print(
+            f"{subcommand:<12}"
+            f" {results[subcommand]['median'] * 1000:>8.1f}ms"
+            f" {results[subcommand]['min'] * 1000:>8.1f}ms"
+            f" {results[subcommand]['max'] * 1000:>8.1f}ms"
+        )
+
+    if args.json_file:
+        with open(args.json_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
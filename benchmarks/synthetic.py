@@ -0,0 +1,263 @@
+"""
+Generators for synthetic ddit projects, local wheels and a stand-in
+`daml` executable, so that benchmarks run offline and without the Daml
+SDK.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import stat
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List
+
+# Stand-in for the Daml assistant. 'daml build -o FILE' writes a DAR whose
+# main DALF payload is derived from the Daml sources, so it changes when
+# they do, and 'daml damlc inspect-dar --json FILE' reports its package ID.
+FAKE_DAML_SCRIPT = '''#!{python}
+import hashlib
+import json
+import os
+import sys
+import zipfile
+
+
+def varint(n):
+    out = b""
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out += bytes([b | 0x80])
+        else:
+            return out + bytes([b])
+
+
+def field(number, data):
+    return bytes([(number << 3) | 2]) + varint(len(data)) + data
+
+
+def build(dar_filename):
+    payload = b""
+    for root, dirs, files in sorted(os.walk("daml")):
+        for f in sorted(files):
+            with open(os.path.join(root, f), "rb") as src:
+                payload += field(1, src.read())
+
+    package_id = hashlib.sha256(payload).hexdigest()
+    dalf = field(3, payload) + field(4, package_id.encode())
+
+    with zipfile.ZipFile(dar_filename, "w", zipfile.ZIP_DEFLATED) as dar:
+        dar.writestr(
+            "META-INF/MANIFEST.MF",
+            "Manifest-Version: 1.0\\nMain-Dalf: main.dalf\\nDalfs: main.dalf\\n",
+        )
+        dar.writestr("main.dalf", dalf)
+
+
+def inspect(dar_filename):
+    with zipfile.ZipFile(dar_filename) as dar:
+        data = dar.read("main.dalf")
+
+    # The payload is the first field of the DALF, after a one byte key.
+    length = shift = 0
+    pos = 1
+    while True:
+        b = data[pos]
+        pos += 1
+        length |= (b & 0x7F) << shift
+        shift += 7
+        if not b & 0x80:
+            break
+
+    payload = data[pos : pos + length]
+    print(json.dumps({{"main_package_id": hashlib.sha256(payload).hexdigest()}}))
+
+
+args = sys.argv[1:]
+
+if args[:1] == ["build"]:
+    build(args[args.index("-o") + 1])
+elif args[:2] == ["damlc", "inspect-dar"]:
+    inspect(args[-1])
+else:
+    sys.exit("fake daml: unsupported command: " + " ".join(args))
+'''
+
+
+@dataclass(frozen=True)
+class ProjectSize:
+    name: str
+    pkg_files: int
+    pkg_file_size: int
+    src_modules: int
+    wheels: int
+    daml_modules: int
+
+    def __str__(self):
+        return self.name
+
+
+PROJECT_SIZES = [
+    ProjectSize(
+        "small", pkg_files=10, pkg_file_size=4096, src_modules=5, wheels=0, daml_modules=2
+    ),
+    ProjectSize(
+        "medium", pkg_files=200, pkg_file_size=16384, src_modules=50, wheels=3, daml_modules=10
+    ),
+    ProjectSize(
+        "large", pkg_files=2000, pkg_file_size=16384, src_modules=200, wheels=10, daml_modules=50
+    ),
+]
+
+
+def write_fake_daml(bin_dir: str, python: str) -> str:
+    os.makedirs(bin_dir, exist_ok=True)
+
+    daml_path = os.path.join(bin_dir, "daml")
+
+    with open(daml_path, "w") as f:
+        f.write(FAKE_DAML_SCRIPT.format(python=python))
+
+    os.chmod(daml_path, os.stat(daml_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    return daml_path
+
+
+def _record_hash(data: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=")
+
+    return f"sha256={digest.decode()}"
+
+
+def write_wheel(wheel_dir: str, name: str, version: str, module_size: int) -> str:
+    """
+    Write a minimal pure-Python wheel containing a single module.
+    """
+    dist_info = f"{name}-{version}.dist-info"
+
+    files: "Dict[str, bytes]" = {
+        f"{name}/__init__.py": _module_source(name, module_size).encode(),
+        f"{dist_info}/METADATA": (
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+        ).encode(),
+        f"{dist_info}/WHEEL": (
+            b"Wheel-Version: 1.0\nGenerator: ddit-bench\nRoot-Is-Purelib: true\n"
+            b"Tag: py3-none-any\n"
+        ),
+        f"{dist_info}/top_level.txt": f"{name}\n".encode(),
+    }
+
+    record = "".join(f"{path},{_record_hash(data)},{len(data)}\n" for path, data in files.items())
+    record += f"{dist_info}/RECORD,,\n"
+
+    wheel_path = os.path.join(wheel_dir, f"{name}-{version}-py3-none-any.whl")
+
+    with zipfile.ZipFile(wheel_path, "w", zipfile.ZIP_DEFLATED) as whl:
+        for path, data in files.items():
+            whl.writestr(path, data)
+
+        whl.writestr(f"{dist_info}/RECORD", record)
+
+    return wheel_path
+
+
+def _module_source(name: str, size: int) -> str:
+    lines = [f'"""Synthetic module {name}."""\n']
+    length = len(lines[0])
+
+    i = 0
+    while length < size:
+        lines.append(f"\ndef function_{i}(x):\n    return x * {i} + {len(name)}\n")
+        length += len(lines[-1])
+        i += 1
+
+    return "".join(lines)
+
+
+def _write(path: str, data: "bytes") -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def write_project(project_dir: str, size: "ProjectSize", seed: int = 0) -> str:
+    """
+    Write a synthetic integration project with a Daml model, Python
+    sources, local wheel dependencies and package resources.
+    """
+    name = f"bench-{size.name}"
+
+    os.makedirs(project_dir, exist_ok=True)
+
+    with open(os.path.join(project_dir, "dit-meta.yaml"), "w") as f:
+        f.write(
+            f"catalog:\n"
+            f"    name: {name}\n"
+            f"    version: 1.0.0\n"
+            f"    short_description: Synthetic benchmark project\n"
+            f"    description: Synthetic benchmark project ({size.name})\n"
+            f"    author: ddit benchmarks\n"
+            f"    license: Apache-2.0\n"
+            f"    tags: [integration]\n"
+            f"integration_types:\n"
+            f"    - id: bench_{size.name}\n"
+            f"      name: Benchmark Integration\n"
+            f"      description: Synthetic integration\n"
+            f"      entrypoint: bench_int.main\n"
+            f"      env_class: bench_int.Env\n"
+            f"      fields: []\n"
+        )
+
+    with open(os.path.join(project_dir, "daml.yaml"), "w") as f:
+        f.write(
+            f"sdk-version: 2.0.0\n"
+            f"name: {name}\n"
+            f"version: 1.0.0\n"
+            f"source: daml\n"
+            f"dependencies: [daml-prim, daml-stdlib]\n"
+        )
+
+    for i in range(size.daml_modules):
+        _write(
+            os.path.join(project_dir, "daml", f"Module{i}.daml"),
+            f"module Module{i} where\n\ntemplate T{i}\n  with\n    p : Party\n".encode(),
+        )
+
+    for i in range(size.src_modules):
+        _write(
+            os.path.join(project_dir, "src", "bench_int", f"module_{i}.py"),
+            _module_source(f"module_{i}", 2048).encode(),
+        )
+
+    _write(os.path.join(project_dir, "src", "bench_int", "__init__.py"), b"")
+
+    wheel_dir = os.path.join(project_dir, "wheels")
+    os.makedirs(wheel_dir, exist_ok=True)
+
+    requirements: "List[str]" = [
+        write_wheel(wheel_dir, f"bench_dep_{i}", "1.0", 32768) for i in range(size.wheels)
+    ]
+
+    with open(os.path.join(project_dir, "requirements.txt"), "w") as f:
+        f.write("".join(f"{req}\n" for req in requirements))
+
+    for i in range(size.pkg_files):
+        # Half text-like (compressible) and half random (incompressible)
+        # package files, spread across nested directories.
+        if i % 2:
+            data = hashlib.shake_256(f"{seed}-{i}".encode()).digest(size.pkg_file_size)
+            filename = f"asset_{i}.bin"
+        else:
+            data = (f"line {i} of a compressible resource\n" * size.pkg_file_size)[
+                : size.pkg_file_size
+            ].encode()
+            filename = f"page_{i}.html"
+
+        _write(os.path.join(project_dir, "pkg", f"dir_{i % 16}", filename), data)
+
+    return project_dir
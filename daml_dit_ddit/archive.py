@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import copy
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from tempfile import SpooledTemporaryFile
+from typing import IO, Deque, Iterable, Iterator, List, Optional, Tuple, cast
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from .hashing import HASH_CHUNK_SIZE
+
+DEFAULT_COMPRESS_LEVEL = 6
+
+FAST_COMPRESS_LEVEL = 1
+
+# File types that are already compressed, and gain nothing from being
+# deflated again.
+DEFAULT_STORE_PATTERNS = [
+    "*.dar",
+    "*.dit",
+    "*.whl",
+    "*.zip",
+    "*.jar",
+    "*.gz",
+    "*.tgz",
+    "*.bz2",
+    "*.xz",
+    "*.zst",
+    "*.br",
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.woff",
+    "*.woff2",
+    "*.mp4",
+    "*.webm",
+]
+
+# Compressed members smaller than this are held in memory until they are
+# written; larger members spill to a temporary file.
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# The number of members compressed ahead of the one being written. With
+# SPOOL_MAX_SIZE, this bounds the memory held by compressed members.
+PRECOMPRESS_WINDOW = 32
+
+
+@dataclass
+class CompressionPolicy:
+    """
+    Per-member compression settings for archive members. Explicit level
+    patterns are checked first, in order, then store patterns. A level of
+    zero stores the member without compression.
+    """
+
+    store_patterns: "List[str]" = field(
+        default_factory=lambda: list(DEFAULT_STORE_PATTERNS)
+    )
+    level_patterns: "List[Tuple[str, int]]" = field(default_factory=list)
+    default_level: int = DEFAULT_COMPRESS_LEVEL
+
+    def level_for(self, arcname: str) -> "Optional[int]":
+        """
+        Return the deflate level for a member, or None to store it.
+        """
+        for (pattern, level) in self.level_patterns:
+            if fnmatch(arcname, pattern):
+                return level or None
+
+        for pattern in self.store_patterns:
+            if fnmatch(arcname, pattern):
+                return None
+
+        return self.default_level or None
+
+
+@dataclass
+class PrecompressedMember:
+    """
+    An archive member ready to be written. Deflated data is held in data;
+    stored members have no data, and are copied from filename (starting
+    at data_offset) when they are written, so that pending members do not
+    hold files open.
+    """
+
+    filename: str
+    zinfo: ZipInfo
+    data: "Optional[IO[bytes]]" = None
+    data_offset: int = 0
+    policy_stored: bool = False
+    cpu_time: float = 0.0
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+
+@dataclass
+class CompressionStats:
+    members: int = 0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    policy_stored_bytes: int = 0
+    deflate_input_bytes: int = 0
+    deflate_cpu_time: float = 0.0
+
+    def record(self, member: "PrecompressedMember"):
+        self.members += 1
+        self.input_bytes += member.zinfo.file_size
+        self.output_bytes += member.zinfo.compress_size
+
+        if member.policy_stored:
+            self.policy_stored_bytes += member.zinfo.file_size
+        else:
+            self.deflate_input_bytes += member.zinfo.file_size
+            self.deflate_cpu_time += member.cpu_time
+
+    def estimated_cpu_saved(self) -> "Optional[float]":
+        """
+        Estimate the CPU time that storing members saved, by extrapolating
+        the deflate throughput measured on the compressed members.
+        """
+        if self.deflate_input_bytes == 0:
+            return None
+
+        return self.policy_stored_bytes * self.deflate_cpu_time / self.deflate_input_bytes
+
+    def summary(self) -> str:
+        change = self.output_bytes - self.input_bytes
+        change_pct = (100.0 * change / self.input_bytes) if self.input_bytes else 0.0
+
+        cpu_saved = self.estimated_cpu_saved()
+
+        return (
+            f"{self.members} member(s), {self.input_bytes} -> {self.output_bytes} bytes"
+            f" ({change_pct:+.1f}%), {self.deflate_cpu_time:.2f}s deflate CPU,"
+            f" {self.policy_stored_bytes} bytes stored without compression"
+            + ("" if cpu_saved is None else f" (~{cpu_saved:.2f}s CPU saved)")
+        )
+
+
+def collect_tree(src_dir: str) -> "List[Tuple[str, str]]":
+    """
+    List the files beneath src_dir as (path, arcname) pairs, where arcname
+    is the path relative to src_dir. Results are sorted by arcname, so
+    the archive layout does not depend on filesystem ordering.
+    """
+    src_dir = os.path.normpath(src_dir)
+
+    files = []
+
+    for root, dirs, filenames in os.walk(src_dir):
+        for f in filenames:
+            path = os.path.join(root, f)
+            arcname = os.path.relpath(path, src_dir).replace(os.sep, "/")
+
+            files.append((path, arcname))
+
+    return sorted(files, key=lambda file: file[1])
+
+
+def _stored_member(filename: str, zinfo: ZipInfo) -> "PrecompressedMember":
+    zinfo.compress_type = ZIP_STORED
+
+    crc = 0
+    file_size = 0
+
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = file_size
+
+    return PrecompressedMember(filename=filename, zinfo=zinfo)
+
+
+def _deflated_member(
+    filename: str, zinfo: ZipInfo, compresslevel: int
+) -> "PrecompressedMember":
+    zinfo.compress_type = ZIP_DEFLATED
+
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    data: "IO[bytes]" = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+
+    crc = 0
+    file_size = 0
+
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            data.write(compressor.compress(chunk))
+
+    data.write(compressor.flush())
+
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = data.tell()
+
+    data.seek(0)
+
+    return PrecompressedMember(filename=filename, zinfo=zinfo, data=data)
+
+
+def precompress_file(
+    filename: str, arcname: str, policy: "CompressionPolicy"
+) -> "PrecompressedMember":
+    zinfo = ZipInfo.from_file(filename, arcname)
+
+    level = policy.level_for(zinfo.filename)
+
+    if level is None:
+        member = _stored_member(filename, zinfo)
+        member.policy_stored = True
+        return member
+
+    start_time = time.thread_time()
+
+    member = _deflated_member(filename, zinfo, level)
+
+    if member.zinfo.compress_size >= member.zinfo.file_size:
+        # Incompressible data is stored, rather than being inflated by
+        # the deflate framing overhead.
+        member.close()
+        member = _stored_member(filename, zinfo)
+
+    member.cpu_time = time.thread_time() - start_time
+
+    return member
+
+
+class PrecompressedFiles:
+    """
+    Files compressed in parallel on an executor, to be written to one or
+    more archives in input order. At most PRECOMPRESS_WINDOW members are
+    compressed ahead of the one being written, so memory use does not
+    grow with the number of files. Members kept for another archive have
+    their compressed data moved to a spool file as they are written.
+    """
+
+    def __init__(
+        self,
+        files: "Iterable[Tuple[str, str]]",
+        policy: "CompressionPolicy",
+        executor: "ThreadPoolExecutor",
+        window: int = PRECOMPRESS_WINDOW,
+    ):
+        self._files = list(files)
+        self._policy = policy
+        self._executor = executor
+        self._window = window
+
+        self._submitted = 0
+        self._futures: "Deque[Future[PrecompressedMember]]" = deque()
+
+        self._kept: "List[PrecompressedMember]" = []
+        self._spool_filename: "Optional[str]" = None
+
+        self._submit_ahead()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _submit_ahead(self):
+        while self._submitted < len(self._files) and len(self._futures) < self._window:
+            (filename, arcname) = self._files[self._submitted]
+
+            self._futures.append(
+                self._executor.submit(precompress_file, filename, arcname, self._policy)
+            )
+            self._submitted += 1
+
+    def _spool(self, spool: "IO[bytes]", member: "PrecompressedMember"):
+        if member.data is not None:
+            offset = spool.tell()
+
+            member.data.seek(0)
+            shutil.copyfileobj(member.data, spool, HASH_CHUNK_SIZE)
+            member.close()
+
+            member.filename = cast(str, self._spool_filename)
+            member.data_offset = offset
+
+        self._kept.append(member)
+
+    def members(self, keep: bool = False) -> "Iterator[PrecompressedMember]":
+        """
+        Yield the members in input order, waiting on any still being
+        compressed. Each member is to be written before the next is
+        requested. With keep, the members are yielded again, without
+        being compressed again, the next time this is called.
+        """
+        if self._kept:
+            kept = self._kept
+
+            if not keep:
+                self._kept = []
+
+            yield from kept
+            return
+
+        if not keep:
+            while self._futures:
+                member = self._futures.popleft().result()
+                self._submit_ahead()
+
+                yield member
+
+            return
+
+        (fd, self._spool_filename) = tempfile.mkstemp(prefix="ddit-spool-")
+
+        with os.fdopen(fd, "wb") as spool:
+            while self._futures:
+                member = self._futures.popleft().result()
+                self._submit_ahead()
+
+                yield member
+
+                self._spool(spool, member)
+
+    def close(self):
+        """
+        Cancel pending compression work, releasing any completed or kept
+        members.
+        """
+        while self._futures:
+            future = self._futures.popleft()
+
+            if not future.cancel() and future.exception() is None:
+                future.result().close()
+
+        self._submitted = len(self._files)
+        self._kept = []
+
+        if self._spool_filename is not None:
+            try:
+                os.remove(self._spool_filename)
+            except OSError:
+                pass
+
+            self._spool_filename = None
+
+
+def _copy_bytes(src: "IO[bytes]", dst: "IO[bytes]", size: int):
+    while size > 0:
+        chunk = src.read(min(size, HASH_CHUNK_SIZE))
+
+        if not chunk:
+            raise EOFError(f"Archive member source is truncated: {src.name}")
+
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+def write_precompressed(
+    zf: "ZipFile", member: "PrecompressedMember", keep: bool = False
+):
+    """
+    Append an already compressed member to an archive open for writing or
+    appending. ZipFile has no public API for raw writes, so this follows
+    the same steps as ZipFile.writestr, minus the compression. With keep,
+    the member is left open to be written to another archive.
+    """
+    # The archive records the member's offset in its ZipInfo, which is
+    # not shared with other archives the member is written to.
+    zinfo = copy.copy(member.zinfo) if keep else member.zinfo
+
+    with zf._lock:  # type: ignore
+        if zf._writing:  # type: ignore
+            raise ValueError(
+                "Can't write to ZIP archive while an open writing handle exists"
+            )
+
+        zf._writecheck(zinfo)  # type: ignore
+        zf._didModify = True  # type: ignore
+
+        zf.fp.seek(zf.start_dir)  # type: ignore
+        zinfo.header_offset = zf.fp.tell()  # type: ignore
+
+        zf.fp.write(zinfo.FileHeader())  # type: ignore
+
+        if member.data is None:
+            with open(member.filename, "rb") as f:
+                f.seek(member.data_offset)
+                _copy_bytes(f, zf.fp, zinfo.compress_size)  # type: ignore
+        else:
+            member.data.seek(0)
+            shutil.copyfileobj(member.data, zf.fp, HASH_CHUNK_SIZE)  # type: ignore
+
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf.start_dir = zf.fp.tell()  # type: ignore
+
+    if not keep:
+        member.close()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import sys
+import sysconfig
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Sequence
+
+from .common import die
+
+if TYPE_CHECKING:
+    from pex.platforms import Platform
+
+HUB_PLATFORM = ("manylinux_2_17", "x86_64", "3.8", "cp38m")
+
+# --platform names for Daml Hub and for the interpreter running ddit.
+PLATFORM_HUB = "hub"
+PLATFORM_LOCAL = "local"
+
+DEFAULT_DAML_SOURCE = "daml"
+
+PKG_DIR = "pkg"
+
+DAR_CACHE_KIND = "dar"
+PEX_CACHE_KIND = "pex"
+DIT_CACHE_KIND = "dit"
+
+
+@dataclass(frozen=True)
+class BuildTarget:
+    """
+    A platform to build the integration PEX file for: Daml Hub, the
+    current interpreter, or any platform pex can resolve for, named by a
+    pex platform string (such as linux_x86_64-cp-39-cp39).
+    """
+
+    name: str
+
+    @property
+    def local_only(self) -> bool:
+        return self.name == PLATFORM_LOCAL
+
+    @property
+    def platform_id(self) -> str:
+        if self.name == PLATFORM_LOCAL:
+            return f"current-{sysconfig.get_platform()}-{sys.implementation.cache_tag}"
+        elif self.name == PLATFORM_HUB:
+            return "-".join(HUB_PLATFORM)
+        else:
+            return self.name
+
+    def platform(self) -> "Platform":
+        from pex.platforms import Platform
+
+        if self.name == PLATFORM_LOCAL:
+            return Platform.current()
+        elif self.name == PLATFORM_HUB:
+            return Platform(*HUB_PLATFORM)
+        else:
+            return Platform.create(self.name)
+
+
+def build_targets(platforms: "Sequence[str]", local_only: bool = False) -> "List[BuildTarget]":
+    """
+    Parse --platform arguments (and --local-only, which is an alias for
+    --platform local) into build targets, defaulting to Daml Hub.
+    """
+    names = [*platforms, *([PLATFORM_LOCAL] if local_only else [])] or [PLATFORM_HUB]
+
+    targets = []
+
+    for name in names:
+        if name not in (PLATFORM_HUB, PLATFORM_LOCAL):
+            from pex.platforms import Platform
+
+            try:
+                name = str(Platform.create(name))
+            except Platform.InvalidPlatformError:
+                die(
+                    f"Invalid --platform (expected {PLATFORM_HUB}, {PLATFORM_LOCAL}, or a pex"
+                    f" platform string such as linux_x86_64-cp-39-cp39): {name}"
+                )
+
+        targets.append(BuildTarget(name))
+
+    return list(dict.fromkeys(targets))
+
+
+def add_platform_arguments(sp, purpose: str, details: str):
+    """
+    Add the --platform argument, parsed by build_targets.
+    """
+    sp.add_argument(
+        "--platform",
+        help=f"{purpose}: {PLATFORM_HUB} (Daml Hub), {PLATFORM_LOCAL} (the running"
+        " interpreter), or a pex platform string such as linux_x86_64-cp-39-cp39."
+        f" May be repeated. {details}",
+        dest="platforms",
+        action="append",
+        default=[],
+    )
+
+
+def build_platform_id(local_only: bool) -> str:
+    return BuildTarget(PLATFORM_LOCAL if local_only else PLATFORM_HUB).platform_id
+
+
+def daml_source_files(source: str) -> "List[str]":
+    """
+    The Daml files beneath a source directory, sorted. Hidden directories
+    (such as .daml, where the SDK writes its outputs, and .ddit-venv) and
+    editor lock files are skipped.
+    """
+    paths = []
+
+    for (dirpath, dirnames, filenames) in os.walk(source):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+
+        for filename in sorted(filenames):
+            if filename.endswith(".daml") and not filename.startswith(".#"):
+                paths.append(os.path.normpath(os.path.join(dirpath, filename)))
+
+    return paths
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import py_compile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from importlib.util import MAGIC_NUMBER, cache_from_source
+from multiprocessing.context import BaseContext
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from .cache import (
+    MAX_CACHE_KIND_BYTES,
+    InputDigest,
+    cache_dir,
+    evict_cache_entries,
+    touch_cache_entry,
+)
+from .common import die
+from .log import LOG
+from .package_store import link_file
+
+if TYPE_CHECKING:
+    from pex.common import Chroot
+
+BYTECODE_CACHE_KIND = "bytecode"
+
+# The chroot labels that pex itself compiles when it freezes a PEX.
+# Distributions are installed from the PEX at runtime, and are not
+# compiled into it.
+COMPILED_LABELS = ["source", "executable", "main", "bootstrap"]
+
+BYTECODE_LABEL = "bytecode"
+
+# Distributions are unpacked from the PEX at runtime into a directory on
+# sys.path, where bytecode is only found in __pycache__, under the tag of
+# the interpreter that compiled it.
+DISTRIBUTION_LABEL = None
+
+# Sources are compiled in batches of this many files per worker task,
+# and compiled in the calling process if there is only one batch.
+COMPILE_BATCH_SIZE = 32
+
+# Hash-based bytecode embeds no source timestamp, so compiling the same
+# source always produces the same file, which can be cached, and which
+# zipimport accepts even though PEX members have fixed timestamps.
+INVALIDATION_MODE = py_compile.PycInvalidationMode.CHECKED_HASH
+
+
+@dataclass
+class BytecodeStats:
+    files: int = 0
+    cached_files: int = 0
+    skipped_files: int = 0
+    compile_cpu_time: float = 0.0
+    compile_wall_time: float = 0.0
+    workers: int = 0
+
+    def summary(self) -> str:
+        compiled = self.files - self.cached_files
+
+        text = f"{self.files} file(s), {self.cached_files} from cache"
+
+        if self.skipped_files:
+            text += f", {self.skipped_files} skipped"
+
+        if compiled:
+            text += (
+                f", {compiled} compiled in {self.compile_wall_time:.2f}s"
+                f" ({self.compile_cpu_time:.2f}s CPU"
+            )
+
+            if self.workers > 1 and self.compile_wall_time > 0:
+                speedup = self.compile_cpu_time / self.compile_wall_time
+                text += f" across {self.workers} processes, {speedup:.1f}x"
+
+            text += ")"
+
+        return text
+
+
+def process_pool_context() -> "BaseContext":
+    """
+    The multiprocessing context for worker process pools. Pools are
+    started while other threads are running (build stages, and the
+    pool's own management thread), and a forked child can deadlock on a
+    lock one of them held, so workers are started from a fork server or
+    spawned instead.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+
+    return multiprocessing.get_context("spawn")
+
+
+def _compile_batch(
+    root: str, targets: "Sequence[Tuple[str, str]]"
+) -> "Tuple[List[Tuple[str, str]], Dict[str, str], float]":
+    """
+    Compile (source, bytecode) path pairs in root. Returns the compiled
+    pairs, errors by source path, and the CPU time taken.
+    """
+    start = time.process_time()
+
+    compiled = []
+    errored = {}
+
+    for (relpath, pyc_relpath) in targets:
+        try:
+            py_compile.compile(
+                os.path.join(root, relpath),
+                cfile=os.path.join(root, pyc_relpath),
+                dfile=relpath,
+                doraise=True,
+                invalidation_mode=INVALIDATION_MODE,
+            )
+            compiled.append((relpath, pyc_relpath))
+        except py_compile.PyCompileError as e:
+            errored[relpath] = e.msg
+
+    return (compiled, errored, time.process_time() - start)
+
+
+def bytecode_key(root: str, relpath: str) -> str:
+    digest = InputDigest(BYTECODE_CACHE_KIND)
+
+    digest.add_bytes("magic", MAGIC_NUMBER)
+    digest.add_str("invalidation_mode", INVALIDATION_MODE.name)
+
+    # The path is recorded in the bytecode, for tracebacks.
+    digest.add_str("dfile", relpath)
+    digest.add_file("source", os.path.join(root, relpath))
+
+    return digest.hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(cache_dir(BYTECODE_CACHE_KIND, key[:2]), f"{key}.pyc")
+
+
+def _store_bytecode(pyc_path: str, key: str):
+    cache_path = _cache_path(key)
+
+    if not os.path.isfile(cache_path):
+        tmp_path = f"{cache_path}.{os.getpid()}"
+
+        link_file(pyc_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+
+
+def _compile_targets(chroot: "Chroot", distributions: bool) -> "List[Tuple[str, str]]":
+    targets = [
+        (path, path + "c")
+        for label in COMPILED_LABELS
+        for path in chroot.filesets.get(label, ())
+        if path.endswith(".py")
+    ]
+
+    if distributions:
+        targets.extend(
+            (path, cache_from_source(path))
+            for path in chroot.filesets.get(DISTRIBUTION_LABEL, ())
+            if path.endswith(".py")
+        )
+
+    return sorted(targets)
+
+
+def compile_chroot(
+    chroot: "Chroot", jobs: "Optional[int]" = None, distributions: bool = False
+) -> "BytecodeStats":
+    """
+    Compile the sources pex would compile when freezing the chroot, in
+    parallel across worker processes, reusing bytecode cached from
+    earlier builds by source hash and interpreter version. Compiled files
+    are added to the chroot with the label pex gives them.
+
+    With distributions, the modules of bundled distributions are also
+    compiled, into __pycache__ for the current interpreter. Modules that
+    do not compile (such as Python 2 only code in tests) are skipped, as
+    they are when pip installs a wheel.
+    """
+    root = chroot.path()
+
+    targets = _compile_targets(chroot, distributions)
+
+    stats = BytecodeStats(files=len(targets))
+
+    keys = {relpath: bytecode_key(root, relpath) for (relpath, _) in targets}
+
+    missing = []
+
+    for (relpath, pyc_relpath) in targets:
+        cache_path = _cache_path(keys[relpath])
+
+        if os.path.isfile(cache_path):
+            touch_cache_entry(cache_path)
+
+            pyc_path = os.path.join(root, pyc_relpath)
+
+            # Chroot files may be hard links into the resolver's cache, and
+            # are replaced rather than written through.
+            if os.path.lexists(pyc_path):
+                os.remove(pyc_path)
+
+            os.makedirs(os.path.dirname(pyc_path), exist_ok=True)
+            link_file(cache_path, pyc_path)
+            chroot.touch(pyc_relpath, label=BYTECODE_LABEL)
+            stats.cached_files += 1
+        else:
+            missing.append((relpath, pyc_relpath))
+
+    if not missing:
+        return stats
+
+    batches = [
+        missing[i : i + COMPILE_BATCH_SIZE] for i in range(0, len(missing), COMPILE_BATCH_SIZE)
+    ]
+
+    stats.workers = min(jobs or os.cpu_count() or 1, len(batches))
+
+    start = time.perf_counter()
+
+    if stats.workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=stats.workers, mp_context=process_pool_context()
+        ) as executor:
+            results = list(executor.map(_compile_batch, [root] * len(batches), batches))
+    else:
+        results = [_compile_batch(root, missing)]
+
+    stats.compile_wall_time = time.perf_counter() - start
+
+    errors = {}
+
+    for (compiled, errored, cpu_time) in results:
+        stats.compile_cpu_time += cpu_time
+        errors.update(errored)
+
+        for (relpath, pyc_relpath) in compiled:
+            chroot.touch(pyc_relpath, label=BYTECODE_LABEL)
+            _store_bytecode(os.path.join(root, pyc_relpath), keys[relpath])
+
+    evict_cache_entries(BYTECODE_CACHE_KIND, max_bytes=MAX_CACHE_KIND_BYTES)
+
+    source_paths = {path for label in COMPILED_LABELS for path in chroot.filesets.get(label, ())}
+
+    for relpath in [path for path in errors if path not in source_paths]:
+        LOG.debug(f"  Not compiling {relpath}: {errors.pop(relpath)}")
+        stats.skipped_files += 1
+
+    if errors:
+        die(
+            f"Encountered {len(errors)} error(s) compiling {len(missing)} file(s): "
+            + "; ".join(f"{path}: {msg}" for (path, msg) in sorted(errors.items()))
+        )
+
+    return stats
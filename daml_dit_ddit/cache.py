@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from hashlib import sha256
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .hashing import HASH_CHUNK_SIZE, copy_and_hash
+from .log import LOG
+
+DDIT_CACHE_DIR_ENV = "DDIT_CACHE_DIR"
+
+CACHE_ARTIFACT_NAME = "artifact"
+CACHE_INFO_NAME = "info.json"
+
+# Each kind of build cache (DIT and PEX files, bytecode, locked wheels) is
+# trimmed to this size as entries are added, least recently used first.
+MAX_CACHE_KIND_BYTES = 2 * 1024 ** 3
+
+# Cache entries are nested this many directories deep within their kind's
+# directory. Kinds not listed have entries at the top level.
+CACHE_ENTRY_DEPTH = {"bytecode": 2}
+
+
+def cache_root() -> str:
+    configured = os.environ.get(DDIT_CACHE_DIR_ENV)
+
+    if configured:
+        return configured
+
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+
+    return os.path.join(xdg_cache, "ddit")
+
+
+def package_version(package_name: str) -> str:
+    try:
+        return version(package_name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def tool_version() -> str:
+    return package_version("daml-dit-ddit")
+
+
+def cache_dir(*parts: str) -> str:
+    path = os.path.join(cache_root(), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class InputDigest:
+    """
+    Incrementally computed digest over the inputs to a build stage. Every
+    item is framed with its label and length, so that distinct input sets
+    cannot produce the same byte stream.
+    """
+
+    def __init__(self, kind: str):
+        self._hash = sha256()
+        self.add_str("kind", kind)
+        self.add_str("ddit", tool_version())
+
+    def _add_frame(self, label: str, size: int):
+        self._hash.update(f"{label}\0{size}\0".encode())
+
+    def add_bytes(self, label: str, data: bytes):
+        self._add_frame(label, len(data))
+        self._hash.update(data)
+
+    def add_str(self, label: str, value: "Optional[str]"):
+        self.add_bytes(label, b"\xff" if value is None else value.encode())
+
+    def add_file(self, label: str, path: str):
+        if not os.path.isfile(path):
+            self.add_str(label, None)
+            return
+
+        self._add_frame(label, os.path.getsize(path))
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                self._hash.update(chunk)
+
+    def add_tree(self, label: str, path: str):
+        if not os.path.isdir(path):
+            self.add_str(label, None)
+            return
+
+        root_path = os.path.normpath(path)
+
+        for root, dirs, files in os.walk(root_path):
+            dirs.sort()
+
+            for f in sorted(files):
+                file_path = os.path.join(root, f)
+                rel_path = os.path.relpath(file_path, root_path).replace(os.sep, "/")
+
+                self.add_file(f"{label}:{rel_path}", file_path)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def touch_cache_entry(path: str):
+    """
+    Record that a cache entry was used, for least recently used eviction.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+@dataclass
+class CacheEntry:
+    path: str
+    last_used: float
+    size: int
+
+
+def _tree_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    return sum(
+        os.path.getsize(os.path.join(root, filename))
+        for (root, _, filenames) in os.walk(path)
+        for filename in filenames
+    )
+
+
+def cache_entries(kind: str) -> "List[CacheEntry]":
+    """
+    List the entries in a kind of cache. Names starting with a dot are
+    locks and staging directories, and are not entries. An entry was last
+    used when its info file (or, with none, the entry itself) was last
+    modified or touched.
+    """
+    paths = [os.path.join(cache_root(), kind)]
+
+    for _ in range(CACHE_ENTRY_DEPTH.get(kind, 1)):
+        paths = [
+            os.path.join(parent, name)
+            for parent in paths
+            if os.path.isdir(parent)
+            for name in sorted(os.listdir(parent))
+            if not name.startswith(".")
+        ]
+
+    entries = []
+
+    for path in paths:
+        try:
+            info_path = os.path.join(path, CACHE_INFO_NAME)
+            stamp_path = info_path if os.path.isfile(info_path) else path
+
+            entries.append(CacheEntry(path, os.path.getmtime(stamp_path), _tree_size(path)))
+        except OSError:
+            # Removed by a concurrent eviction.
+            pass
+
+    return entries
+
+
+def _remove_cache_entry(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def evict_cache_entries(
+    kind: str,
+    max_bytes: "Optional[int]" = None,
+    max_age: "Optional[float]" = None,
+    keep: "Iterable[str]" = (),
+) -> "Tuple[int, int]":
+    """
+    Remove entries of a kind of cache that were last used more than
+    max_age seconds ago, and then the least recently used entries until
+    the rest fit in max_bytes. Entries at the paths in keep are retained.
+    Returns the number of entries and bytes removed.
+    """
+    keep_paths = set(keep)
+
+    entries = sorted(cache_entries(kind), key=lambda entry: entry.last_used)
+
+    total = sum(entry.size for entry in entries)
+    cutoff = None if max_age is None else time.time() - max_age
+
+    (removed, removed_bytes) = (0, 0)
+
+    for entry in entries:
+        expired = cutoff is not None and entry.last_used < cutoff
+        over_budget = max_bytes is not None and total > max_bytes
+
+        if entry.path in keep_paths or not (expired or over_budget):
+            continue
+
+        LOG.debug("Evicting %s cache entry: %s", kind, entry.path)
+
+        _remove_cache_entry(entry.path)
+
+        total -= entry.size
+        removed += 1
+        removed_bytes += entry.size
+
+    return (removed, removed_bytes)
+
+
+def lookup_artifact(kind: str, key: str) -> "Optional[Tuple[str, Dict[str, Any]]]":
+    entry_dir = os.path.join(cache_root(), kind, key)
+
+    artifact_path = os.path.join(entry_dir, CACHE_ARTIFACT_NAME)
+    info_path = os.path.join(entry_dir, CACHE_INFO_NAME)
+
+    if not (os.path.isfile(artifact_path) and os.path.isfile(info_path)):
+        LOG.debug("Cache miss (%s): %s", kind, key)
+        return None
+
+    try:
+        with open(info_path, "r") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        LOG.warn(f"Ignoring corrupt cache entry: {entry_dir}")
+        return None
+
+    LOG.debug("Cache hit (%s): %s", kind, key)
+
+    touch_cache_entry(info_path)
+
+    return (artifact_path, info)
+
+
+def store_artifact(
+    kind: str, key: str, filename: str, info: "Dict[str, Any]"
+) -> "Optional[str]":
+    """
+    Store a copy of filename in the cache, returning the artifact hash
+    computed while copying it, or None if it could not be stored.
+    """
+    kind_dir = cache_dir(kind)
+    entry_dir = os.path.join(kind_dir, key)
+
+    if os.path.isdir(entry_dir):
+        shutil.rmtree(entry_dir, ignore_errors=True)
+
+    # Entries are staged in a sibling directory and renamed into place,
+    # so concurrent builds never observe a partially written entry.
+    staging_dir = tempfile.mkdtemp(prefix=f".{key}.", dir=kind_dir)
+
+    try:
+        artifact_hash = copy_and_hash(
+            filename, os.path.join(staging_dir, CACHE_ARTIFACT_NAME)
+        )
+
+        with open(os.path.join(staging_dir, CACHE_INFO_NAME), "w") as f:
+            json.dump({**info, "artifact_hash": artifact_hash}, f)
+
+        os.rename(staging_dir, entry_dir)
+
+        LOG.debug("Cached %s artifact: %s", kind, key)
+
+        evict_cache_entries(kind, max_bytes=MAX_CACHE_KIND_BYTES, keep=[entry_dir])
+
+        return artifact_hash
+    except OSError as e:
+        LOG.warn(f"Unable to store {kind} artifact in build cache: {e}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        return None
+
+
+def copy_from_cache(artifact_path: str, filename: str, expected_hash: str) -> bool:
+    """
+    Copy a cached artifact to filename, verifying its hash in the same
+    pass. Returns False (and removes the copy) if the cached artifact does
+    not match the hash recorded when it was stored.
+    """
+    try:
+        copied_hash = copy_and_hash(artifact_path, filename)
+    except FileNotFoundError:
+        # Evicted since it was looked up.
+        return False
+
+    if copied_hash == expected_hash:
+        return True
+
+    LOG.warn(f"Cached artifact is corrupt, ignoring: {artifact_path}")
+    os.remove(filename)
+
+    return False
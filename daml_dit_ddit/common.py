@@ -4,7 +4,7 @@ import os
 import sys
 from dataclasses import asdict
 from hashlib import sha256
-from typing import Dict, NoReturn, Optional
+from typing import Any, Dict, List, NoReturn, Optional, Tuple
 
 import semver
 import yaml
@@ -21,12 +21,19 @@ from daml_dit_api.package_metadata import CatalogInfo, DamlModelInfo
 
 from .log import LOG
 
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader  # type: ignore
+
 DAML_YAML_NAME = "daml.yaml"
 
 VIRTUAL_ENV_DIR = ".ddit-venv"
 
 PYTHON_REQUIREMENT_FILE = "requirements.txt"
 
+PYTHON_LOCK_FILE = "requirements.lock"
+
 INTEGRATION_ARG_FILE = "int_args.yaml"
 
 
@@ -39,12 +46,50 @@ def artifact_hash(artifact_bytes: bytes) -> str:
     return sha256(artifact_bytes).hexdigest()
 
 
+def yaml_safe_load(data):
+    return yaml.load(data, Loader=YamlSafeLoader)
+
+
+FileSignature = Optional[Tuple[int, int]]
+
+
+def file_signature(filename: str) -> "FileSignature":
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+
+    return (st.st_mtime_ns, st.st_size)
+
+
+def metadata_file_names() -> "List[str]":
+    return [DAML_YAML_NAME, *DIT_META_NAMES]
+
+
+def metadata_signature() -> "Tuple[str, Tuple[FileSignature, ...]]":
+    return (
+        os.getcwd(),
+        tuple(file_signature(file_name) for file_name in metadata_file_names()),
+    )
+
+
+# Parsed metadata is memoized for the life of the process, keyed by the
+# working directory and the mtime/size of the metadata files.
+_daml_yaml_memo: "Dict[Any, Any]" = {}
+_dabl_meta_memo: "Dict[Any, PackageMetadata]" = {}
+
+
 def load_daml_yaml():
-    if not os.path.exists(DAML_YAML_NAME):
+    key = (os.getcwd(), file_signature(DAML_YAML_NAME))
+
+    if key[1] is None:
         return None
 
-    with open(DAML_YAML_NAME, "r") as f:
-        return yaml.safe_load(f.read())
+    if key not in _daml_yaml_memo:
+        with open(DAML_YAML_NAME, "r") as f:
+            _daml_yaml_memo[key] = yaml_safe_load(f.read())
+
+    return _daml_yaml_memo[key]
 
 
 def daml_yaml_version():
@@ -72,7 +117,7 @@ def accept_dabl_meta(yaml_data: Dict) -> PackageMetadata:
 
 def accept_dabl_meta_bytes(data: bytes) -> PackageMetadata:
     try:
-        return accept_dabl_meta(yaml.safe_load(data))
+        return accept_dabl_meta(yaml_safe_load(data))
     except:
         die(f"Error parsing project metadata file.")
 
@@ -94,31 +139,33 @@ def with_catalog(dabl_meta: PackageMetadata) -> CatalogInfo:
         return catalog
 
 
-def _check_deprecated(dabl_meta: PackageMetadata):
+def _check_deprecated(dabl_meta: PackageMetadata) -> "List[str]":
     catalog = with_catalog(dabl_meta)
 
+    warnings = []
+
     if catalog.experimental is not None:
-        LOG.warn(
-            (
+        warnings.append(
             f"The 'experimental' metadata field is deprecated, and support may be"
             f" dropped in a future release. Please specify '{TAG_EXPERIMENTAL}'"
             f" inside the project's tag list instead."
-            )
         )
 
     if dabl_meta.integrations:
-        LOG.warn(
-            (
+        warnings.append(
             f"The 'integrations' metadata field is deprecated, and support may be"
             f" dropped in a future release. Please use  'integration_types'"
             f" instead."
-            )
         )
 
+    return warnings
 
-def load_dabl_meta() -> PackageMetadata:
+
+def _load_dabl_meta_uncached() -> "Tuple[PackageMetadata, List[str]]":
     raw_dabl_meta = None
 
+    warnings = []
+
     daml_yaml = load_daml_yaml()
     if daml_yaml:
         dabl_meta_yaml = daml_yaml.get(DIT_META_KEY_NAME, None)
@@ -139,7 +186,7 @@ def load_dabl_meta() -> PackageMetadata:
                         f" key in {DAML_YAML_NAME}."
                     )
                 elif file_name != preferred_file_name:
-                    LOG.warn(
+                    warnings.append(
                         f"Storing project metadata in {file_name} is deprecated."
                         f" Please use {preferred_file_name}. or the {DIT_META_KEY_NAME}"
                         f" key in {DAML_YAML_NAME}."
@@ -151,12 +198,36 @@ def load_dabl_meta() -> PackageMetadata:
             pass
 
     if raw_dabl_meta:
-        _check_deprecated(raw_dabl_meta)
-        return normalize_package_metadata(raw_dabl_meta)
+        warnings.extend(_check_deprecated(raw_dabl_meta))
+        return (raw_dabl_meta, warnings)
 
     die(f"Project metadata file not found: {DIT_META_NAMES}")
 
 
+def load_dabl_meta() -> PackageMetadata:
+    """
+    Load and normalize the project metadata. Results are memoized for the
+    life of the process.
+    """
+    signature = metadata_signature()
+
+    dabl_meta = _dabl_meta_memo.get(signature)
+
+    if dabl_meta is not None:
+        return dabl_meta
+
+    (raw_dabl_meta, warnings) = _load_dabl_meta_uncached()
+
+    dabl_meta = normalize_package_metadata(raw_dabl_meta)
+
+    for warning in warnings:
+        LOG.warn(warning)
+
+    _dabl_meta_memo[signature] = dabl_meta
+
+    return dabl_meta
+
+
 def package_meta_integration_types(
     package_metadata: PackageMetadata,
 ) -> Dict[str, IntegrationTypeInfo]:
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Dict, Iterator, List, Tuple
+from zipfile import BadZipFile, ZipFile
+
+DAR_MANIFEST_PATH = "META-INF/MANIFEST.MF"
+
+# Field numbers from the daml_lf.Archive protobuf message.
+ARCHIVE_PAYLOAD_FIELD = 3
+ARCHIVE_HASH_FIELD = 4
+
+WIRETYPE_VARINT = 0
+WIRETYPE_FIXED64 = 1
+WIRETYPE_LENGTH_DELIMITED = 2
+WIRETYPE_FIXED32 = 5
+
+
+class DarFormatError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class DalfInfo:
+    name: str
+    package_id: str
+    dalf_hash: str
+
+
+@dataclass(frozen=True)
+class DarInfo:
+    main_dalf: str
+    dalfs: "List[DalfInfo]"
+
+    @property
+    def main_package_id(self) -> str:
+        return self.main_dalf_info.package_id
+
+    @property
+    def main_dalf_info(self) -> "DalfInfo":
+        for dalf in self.dalfs:
+            if dalf.name == self.main_dalf:
+                return dalf
+
+        raise DarFormatError(f"Main DALF not found in DAR: {self.main_dalf}")
+
+    @property
+    def package_ids(self) -> "List[str]":
+        return [dalf.package_id for dalf in self.dalfs]
+
+
+def parse_manifest(manifest_text: str) -> "Dict[str, str]":
+    """
+    Parse a JAR-style manifest, where long values are wrapped onto
+    continuation lines that begin with a single space.
+    """
+    lines: List[str] = []
+
+    for line in manifest_text.splitlines():
+        if line.startswith(" ") and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+
+    attributes = {}
+
+    for line in lines:
+        (key, sep, value) = line.partition(":")
+
+        if not sep:
+            raise DarFormatError(f"Invalid manifest line: {line!r}")
+
+        attributes[key.strip()] = value.strip()
+
+    return attributes
+
+
+def _read_varint(data: bytes, pos: int) -> "Tuple[int, int]":
+    result = 0
+    shift = 0
+
+    while True:
+        if pos >= len(data):
+            raise DarFormatError("Truncated varint in DALF.")
+
+        b = data[pos]
+        pos += 1
+
+        result |= (b & 0x7F) << shift
+        shift += 7
+
+        if not b & 0x80:
+            return (result, pos)
+
+
+def _iter_fields(data: bytes) -> "Iterator[Tuple[int, int, bytes]]":
+    pos = 0
+
+    while pos < len(data):
+        (key, pos) = _read_varint(data, pos)
+
+        field_number = key >> 3
+        wire_type = key & 0x7
+
+        if wire_type == WIRETYPE_VARINT:
+            (_, pos) = _read_varint(data, pos)
+            yield (field_number, wire_type, b"")
+        elif wire_type == WIRETYPE_FIXED64:
+            pos += 8
+        elif wire_type == WIRETYPE_FIXED32:
+            pos += 4
+        elif wire_type == WIRETYPE_LENGTH_DELIMITED:
+            (length, pos) = _read_varint(data, pos)
+            end = pos + length
+
+            if end > len(data):
+                raise DarFormatError("Truncated field in DALF.")
+
+            yield (field_number, wire_type, data[pos:end])
+            pos = end
+        else:
+            raise DarFormatError(f"Unsupported protobuf wire type in DALF: {wire_type}")
+
+
+def dalf_package_id(dalf_bytes: bytes) -> str:
+    """
+    Derive the package ID of a DALF. The package ID is the SHA-256 of the
+    archive payload, which the archive also records in its hash field.
+    """
+    payload = None
+    recorded_hash = None
+
+    for (field_number, wire_type, value) in _iter_fields(dalf_bytes):
+        if wire_type != WIRETYPE_LENGTH_DELIMITED:
+            continue
+
+        if field_number == ARCHIVE_PAYLOAD_FIELD:
+            payload = value
+        elif field_number == ARCHIVE_HASH_FIELD:
+            try:
+                recorded_hash = value.decode()
+            except UnicodeDecodeError:
+                raise DarFormatError("DALF hash is not valid text.")
+
+    if payload is None:
+        raise DarFormatError("DALF archive has no payload.")
+
+    package_id = sha256(payload).hexdigest()
+
+    if recorded_hash and recorded_hash != package_id:
+        raise DarFormatError(
+            f"DALF hash mismatch, recorded {recorded_hash}, computed {package_id}"
+        )
+
+    return package_id
+
+
+def read_dar(dar_filename: str) -> "DarInfo":
+    try:
+        with ZipFile(dar_filename, "r") as darfile:
+            try:
+                manifest = parse_manifest(darfile.read(DAR_MANIFEST_PATH).decode())
+            except KeyError:
+                raise DarFormatError(f"DAR has no {DAR_MANIFEST_PATH}")
+            except UnicodeDecodeError:
+                raise DarFormatError(f"DAR {DAR_MANIFEST_PATH} is not valid UTF-8.")
+
+            main_dalf = manifest.get("Main-Dalf")
+
+            if not main_dalf:
+                raise DarFormatError("DAR manifest does not specify Main-Dalf.")
+
+            dalf_names = [
+                name.strip()
+                for name in manifest.get("Dalfs", main_dalf).split(",")
+                if name.strip()
+            ]
+
+            if main_dalf not in dalf_names:
+                dalf_names.insert(0, main_dalf)
+
+            dalfs = []
+
+            for dalf_name in dalf_names:
+                try:
+                    dalf_bytes = darfile.read(dalf_name)
+                except KeyError:
+                    raise DarFormatError(f"DALF listed in manifest is missing: {dalf_name}")
+
+                dalfs.append(
+                    DalfInfo(
+                        name=dalf_name,
+                        package_id=dalf_package_id(dalf_bytes),
+                        dalf_hash=sha256(dalf_bytes).hexdigest(),
+                    )
+                )
+
+    except (OSError, BadZipFile) as e:
+        raise DarFormatError(f"Unable to read DAR file {dar_filename}: {e}")
+
+    return DarInfo(main_dalf=main_dalf, dalfs=dalfs)
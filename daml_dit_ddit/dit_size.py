@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from zipfile import ZipFile
+
+from daml_dit_api import DIT_META_NAMES
+
+from .common import accept_dabl_meta_bytes, die
+from .timing import format_bytes
+
+# pex writes every member of the PEX file with this timestamp, which
+# distinguishes them from the package resources appended to a DIT file.
+PEX_MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+PEX_INFO_NAME = "PEX-INFO"
+PEX_RUNTIME_NAMES = [PEX_INFO_NAME, "__main__.py", "__main__.pyc"]
+PEX_BOOTSTRAP_DIR = ".bootstrap/"
+PEX_DEPS_DIR = ".deps/"
+
+GROUP_DISTRIBUTION = "distribution"
+GROUP_SOURCE = "source"
+GROUP_PEX = "pex"
+GROUP_RESOURCE = "resource"
+GROUP_SUBDEPLOYMENT = "subdeployment"
+GROUP_METADATA = "metadata"
+GROUP_OVERHEAD = "overhead"
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+@dataclass
+class SizeEntry:
+    group: str
+    name: str
+    files: int = 0
+    size: int = 0
+    compressed_size: int = 0
+
+
+def parse_size(text: str) -> "Optional[int]":
+    """
+    Parse a size in bytes, with an optional binary unit suffix: 512K,
+    20M, 1.5GiB.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?\s*", text, re.IGNORECASE)
+
+    if match is None:
+        return None
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def _top_level(name: str) -> str:
+    (head, sep, _) = name.partition("/")
+
+    return f"{head}/" if sep else head
+
+
+def dit_size_breakdown(dit_filename: str) -> "List[SizeEntry]":
+    """
+    Break the size of a DIT file down by bundled distribution, source
+    package, package resource directory and subdeployment, largest first.
+    """
+    if not os.path.exists(dit_filename):
+        die(f"DIT file not found: {dit_filename}")
+
+    with ZipFile(dit_filename, "r") as ditfile:
+        infos = ditfile.infolist()
+
+        subdeployments: "Sequence[str]" = []
+
+        for meta_name in DIT_META_NAMES:
+            meta_contents = ditfile.read(meta_name) if meta_name in ditfile.namelist() else None
+
+            if meta_contents:
+                dabl_meta = accept_dabl_meta_bytes(meta_contents)
+                subdeployments = dabl_meta.subdeployments or []
+                break
+
+    pex_count = 0
+
+    if any(info.filename == PEX_INFO_NAME for info in infos):
+        while pex_count < len(infos) and infos[pex_count].date_time == PEX_MEMBER_DATE_TIME:
+            pex_count += 1
+
+    entries: "Dict[Tuple[str, str], SizeEntry]" = {}
+
+    for (index, info) in enumerate(infos):
+        name = info.filename
+
+        if name in DIT_META_NAMES:
+            key = (GROUP_METADATA, name)
+        elif index < pex_count and name.startswith(PEX_DEPS_DIR):
+            key = (GROUP_DISTRIBUTION, name[len(PEX_DEPS_DIR) :].partition("/")[0])
+        elif index < pex_count and (
+            name.startswith(PEX_BOOTSTRAP_DIR) or name in PEX_RUNTIME_NAMES
+        ):
+            key = (GROUP_PEX, "pex runtime")
+        elif index < pex_count:
+            key = (GROUP_SOURCE, _top_level(name))
+        elif name in subdeployments:
+            key = (GROUP_SUBDEPLOYMENT, name)
+        else:
+            key = (GROUP_RESOURCE, _top_level(name))
+
+        entry = entries.setdefault(key, SizeEntry(*key))
+        entry.files += 1
+        entry.size += info.file_size
+        entry.compressed_size += info.compress_size
+
+    # Headers, the central directory and the PEX shebang line.
+    overhead = os.path.getsize(dit_filename) - sum(info.compress_size for info in infos)
+
+    return [
+        *sorted(entries.values(), key=lambda entry: (-entry.compressed_size, entry.name)),
+        SizeEntry(GROUP_OVERHEAD, "zip structure", compressed_size=overhead),
+    ]
+
+
+def size_table(entries: "List[SizeEntry]", limit: "Optional[int]" = None) -> str:
+    total = sum(entry.compressed_size for entry in entries)
+
+    header = f"{'group':<14} {'name':<48} {'files':>6} {'size':>10} {'in DIT':>10} {'share':>6}"
+
+    lines = [header, "-" * len(header)]
+
+    shown = entries if limit is None else entries[:limit]
+
+    for entry in shown:
+        share = 100.0 * entry.compressed_size / total if total else 0.0
+
+        lines.append(
+            f"{entry.group:<14} {entry.name[:48]:<48} {entry.files:>6}"
+            f" {format_bytes(entry.size):>10} {format_bytes(entry.compressed_size):>10}"
+            f" {share:>5.1f}%"
+        )
+
+    if len(shown) < len(entries):
+        lines.append(f"... and {len(entries) - len(shown)} more")
+
+    lines.append("-" * len(header))
+    lines.append(
+        f"{'total':<14} {'':<48} {sum(entry.files for entry in entries):>6}"
+        f" {format_bytes(sum(entry.size for entry in entries)):>10}"
+        f" {format_bytes(total):>10}"
+    )
+
+    return "\n".join(lines)
+
+
+def group_totals(entries: "List[SizeEntry]") -> "List[SizeEntry]":
+    totals: "Dict[str, SizeEntry]" = {}
+    counts: "Dict[str, int]" = {}
+
+    for entry in entries:
+        total = totals.setdefault(entry.group, SizeEntry(entry.group, ""))
+        total.files += entry.files
+        total.size += entry.size
+        total.compressed_size += entry.compressed_size
+
+        counts[entry.group] = counts.get(entry.group, 0) + 1
+
+    for (group, total) in totals.items():
+        total.name = f"({counts[group]} entries)"
+
+    return sorted(totals.values(), key=lambda total: -total.compressed_size)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import mmap
+import os
+from hashlib import sha256
+from typing import IO, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def artifact_stream_hash(stream: "IO[bytes]") -> "Tuple[str, int]":
+    """
+    Hash a stream in fixed size chunks, returning the hash and the number
+    of bytes read.
+    """
+    hasher = sha256()
+    length = 0
+
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+        length += len(chunk)
+
+    return (hasher.hexdigest(), length)
+
+
+def artifact_file_hash(filename: str) -> str:
+    """
+    Hash a file through a memory map, which avoids copying its contents
+    into Python buffers and keeps memory use constant for large files.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return sha256(b"").hexdigest()
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return sha256(mapped).hexdigest()
+
+
+class HashingWriter:
+    """
+    Write-through wrapper for a sequentially written binary file, which
+    hashes the data as it is written.
+    """
+
+    def __init__(self, fileobj: "IO[bytes]"):
+        self._fileobj = fileobj
+        self._hash = sha256()
+        self.length = 0
+
+    def write(self, data) -> int:
+        self._hash.update(data)
+        self.length += len(data)
+        return self._fileobj.write(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def copy_and_hash(src_filename: str, dst_filename: str) -> str:
+    """
+    Copy a file, hashing its contents in the same pass.
+    """
+    with open(src_filename, "rb") as src, open(dst_filename, "wb") as dst:
+        writer = HashingWriter(dst)
+
+        for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+            writer.write(chunk)
+
+    return writer.hexdigest()
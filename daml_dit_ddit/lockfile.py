@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+from .cache import (
+    MAX_CACHE_KIND_BYTES,
+    cache_dir,
+    cache_root,
+    evict_cache_entries,
+    touch_cache_entry,
+)
+from .common import PYTHON_LOCK_FILE, PYTHON_REQUIREMENT_FILE, die, yaml_safe_load
+from .hashing import artifact_file_hash
+from .log import LOG
+from .package_sources import DEFAULT_SOURCES, PackageSources
+from .timing import span
+
+if TYPE_CHECKING:
+    from pex.platforms import Platform
+
+LOCK_FORMAT_VERSION = 1
+
+WHEEL_STORE_KIND = "wheels"
+RESOLVE_CACHE_KIND = "resolve"
+
+SDIST_EXTENSIONS = [".tar.gz", ".tar.bz2", ".zip"]
+
+
+@dataclass(frozen=True)
+class LockedDistribution:
+    name: str
+    version: str
+    filename: str
+    sha256: str
+
+    @property
+    def requirement(self) -> str:
+        return f"{self.name}=={self.version}"
+
+
+def parse_distribution_filename(filename: str) -> "Optional[Tuple[str, str]]":
+    """
+    Extract the project name and version from a wheel or sdist filename.
+    """
+    if filename.endswith(".whl"):
+        parts = filename[: -len(".whl")].split("-")
+
+        if len(parts) >= 5:
+            return (parts[0], parts[1])
+
+        return None
+
+    for ext in SDIST_EXTENSIONS:
+        if filename.endswith(ext):
+            (name, sep, version) = filename[: -len(ext)].rpartition("-")
+
+            if sep:
+                return (name, version)
+
+    return None
+
+
+def wheel_store_path(dist: "LockedDistribution") -> str:
+    return os.path.join(cache_root(), WHEEL_STORE_KIND, dist.sha256, dist.filename)
+
+
+def store_distribution(path: str) -> "LockedDistribution":
+    """
+    Add a downloaded distribution to the content-addressed wheel store.
+    """
+    filename = os.path.basename(path)
+
+    name_version = parse_distribution_filename(filename)
+
+    if name_version is None:
+        die(f"Unrecognized distribution filename: {filename}")
+
+    (name, version) = name_version
+
+    dist = LockedDistribution(
+        name=name, version=version, filename=filename, sha256=artifact_file_hash(path)
+    )
+
+    store_path = wheel_store_path(dist)
+
+    if not os.path.isfile(store_path):
+        store_dir = cache_dir(WHEEL_STORE_KIND, dist.sha256)
+        tmp_path = os.path.join(store_dir, f".{filename}.{os.getpid()}")
+
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, store_path)
+
+    return dist
+
+
+def download_distributions(
+    platform: "Platform",
+    requirements: "Sequence[str]" = (),
+    requirement_files: "Sequence[str]" = (),
+    transitive: bool = True,
+    sources: "PackageSources" = DEFAULT_SOURCES,
+) -> "List[LockedDistribution]":
+    """
+    Download distributions for the target platform with pex's pip, and
+    add them to the wheel store.
+    """
+    from pex.distribution_target import DistributionTarget
+    from pex.jobs import Job
+    from pex.pip import spawn_download_distributions
+
+    download_dir = tempfile.mkdtemp(prefix="ddit-download-")
+
+    try:
+        job = spawn_download_distributions(
+            download_dir,
+            requirements=list(requirements),
+            requirement_files=list(requirement_files),
+            transitive=transitive,
+            target=DistributionTarget.for_platform(platform),
+            indexes=sources.indexes,
+            find_links=sources.find_links,
+            cache=cache_dir(RESOLVE_CACHE_KIND),
+        )
+
+        try:
+            with span("wheels.download", transitive=transitive):
+                job.wait()
+        except Job.Error as e:
+            die(f"Error downloading dependencies: {e}")
+
+        return [
+            store_distribution(os.path.join(download_dir, filename))
+            for filename in sorted(os.listdir(download_dir))
+        ]
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+
+def requirements_hash() -> "Optional[str]":
+    if not os.path.isfile(PYTHON_REQUIREMENT_FILE):
+        return None
+
+    return artifact_file_hash(PYTHON_REQUIREMENT_FILE)
+
+
+def read_lockfile() -> "Optional[Dict[str, Any]]":
+    if not os.path.isfile(PYTHON_LOCK_FILE):
+        return None
+
+    with open(PYTHON_LOCK_FILE, "r") as f:
+        lock = yaml_safe_load(f.read())
+
+    if not isinstance(lock, dict) or lock.get("version") != LOCK_FORMAT_VERSION:
+        die(f"Unsupported lockfile format: {PYTHON_LOCK_FILE}")
+
+    return lock
+
+
+def write_lockfile(platform_id: str, dists: "Sequence[LockedDistribution]"):
+    lock = read_lockfile()
+
+    req_hash = requirements_hash()
+
+    if lock is None or lock.get("requirements_hash") != req_hash:
+        # Pins for other platforms were made against different
+        # requirements, so they are discarded.
+        lock = {"version": LOCK_FORMAT_VERSION, "platforms": {}}
+
+    lock["requirements_hash"] = req_hash
+    lock["platforms"][platform_id] = [asdict(dist) for dist in dists]
+
+    with open(PYTHON_LOCK_FILE, "w") as f:
+        f.write("# Generated by 'ddit lock'. Do not edit.\n")
+        yaml.dump(lock, f, default_flow_style=False, sort_keys=True)
+
+
+def locked_distributions(platform_id: str) -> "Optional[List[LockedDistribution]]":
+    """
+    Return the pinned distributions for a platform, or None if there is no
+    current lock for it.
+    """
+    lock = read_lockfile()
+
+    if lock is None:
+        return None
+
+    if lock.get("requirements_hash") != requirements_hash():
+        LOG.warn(
+            f"{PYTHON_LOCK_FILE} is out of date with {PYTHON_REQUIREMENT_FILE}"
+            f" and will be ignored. Run 'ddit lock' to update it."
+        )
+        return None
+
+    platform_dists = lock["platforms"].get(platform_id)
+
+    if platform_dists is None:
+        LOG.info(f"No dependencies locked in {PYTHON_LOCK_FILE} for {platform_id}")
+        return None
+
+    return [LockedDistribution(**dist) for dist in platform_dists]
+
+
+def ensure_locked_distributions(
+    platform: "Platform",
+    dists: "Sequence[LockedDistribution]",
+    sources: "PackageSources" = DEFAULT_SOURCES,
+) -> "List[str]":
+    """
+    Return paths to the locked distributions in the wheel store, fetching
+    any that are missing (in parallel) and verifying them against their
+    pinned hashes.
+    """
+
+    def fetch(dist: "LockedDistribution"):
+        LOG.info(f"Fetching locked dependency: {dist.filename}")
+
+        fetched = download_distributions(
+            platform, requirements=[dist.requirement], transitive=False, sources=sources
+        )
+
+        if dist not in fetched:
+            die(
+                f"Locked dependency {dist.filename} could not be fetched with the"
+                f" expected hash: {dist.sha256}"
+            )
+
+    missing = [dist for dist in dists if not os.path.isfile(wheel_store_path(dist))]
+
+    for dist in dists:
+        if dist not in missing:
+            touch_cache_entry(os.path.dirname(wheel_store_path(dist)))
+
+    if missing:
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(fetch, missing))
+
+        evict_cache_entries(
+            WHEEL_STORE_KIND,
+            max_bytes=MAX_CACHE_KIND_BYTES,
+            keep=[os.path.dirname(wheel_store_path(dist)) for dist in dists],
+        )
+
+    return [wheel_store_path(dist) for dist in dists]
@@ -1,25 +1,78 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import logging
-from typing import List, Union
+import sys
+from typing import List, Optional, Sequence, Tuple
 
 from .common import die
 from .log import setup_default_logging
-from .subcommand_build import setup as setup_subcommand_build
-from .subcommand_clean import setup as setup_subcommand_clean
-from .subcommand_ditversion import setup as setup_subcommand_ditversion
-from .subcommand_genargs import setup as setup_subcommand_genargs
-from .subcommand_inspect import setup as setup_subcommand_inspect
-from .subcommand_install import setup as setup_subcommand_install
-from .subcommand_release import setup as setup_subcommand_release
-from .subcommand_run import setup as setup_subcommand_run
-from .subcommand_show import setup as setup_subcommand_show
-from .subcommand_targetname import setup as setup_subcommand_targetname
-
-
-def main():
-    parser = argparse.ArgumentParser()
+from .timing import enable_timings, span, timings_table, write_chrome_trace
+
+# Subcommand modules are imported only when their subcommand is
+# dispatched, so that lightweight subcommands do not pay the import cost
+# of the dependencies (pex, dazl, git, github) used by heavier ones.
+SUBCOMMANDS: "List[Tuple[List[str], str, str]]" = [
+    (
+        ["bench-start"],
+        "Measure the cold and warm start time of a DIT file's PEX.",
+        "subcommand_bench_start",
+    ),
+    (["build"], "Build a DIT file.", "subcommand_build"),
+    (
+        ["clean"],
+        "Resets the local build target and virtual environment to an empty state,"
+        " or with --cache, cleans the build cache.",
+        "subcommand_clean",
+    ),
+    (
+        ["ditversion"],
+        "Print the current version in dabl-meta.yaml",
+        "subcommand_ditversion",
+    ),
+    (
+        ["fetch"],
+        "Download dependencies into a wheelhouse directory for offline builds.",
+        "subcommand_fetch",
+    ),
+    (
+        ["genargs"],
+        "Write a template integration argfile to stdout",
+        "subcommand_genargs",
+    ),
+    (["inspect"], "Inspect the contents of a DIT file.", "subcommand_inspect"),
+    (
+        ["install"],
+        "Install the DIT file's dependencies into a local virtual environment.",
+        "subcommand_install",
+    ),
+    (
+        ["publish", "release"],
+        "Tag and release the current DIT file.",
+        "subcommand_release",
+    ),
+    (
+        ["lock"],
+        "Pin the integration's Python dependencies in a lockfile.",
+        "subcommand_lock",
+    ),
+    (["run"], "Run the current project as an integration.", "subcommand_run"),
+    (["show"], "Verify and print the current metadata file.", "subcommand_show"),
+    (
+        ["size"],
+        "Break down the size of a DIT file by dependency, source and resource.",
+        "subcommand_size",
+    ),
+    (
+        ["targetname"],
+        "Print the build target filename to stdout",
+        "subcommand_targetname",
+    ),
+]
+
+
+def add_global_arguments(parser: "argparse.ArgumentParser"):
     parser.add_argument(
         "--verbose",
         help="Turn on additional logging.",
@@ -28,77 +81,76 @@ def main():
         default=False,
     )
 
-    subcommands = {}
-    subparsers = parser.add_subparsers(dest="subcommand_name", help="subcommand")
+    parser.add_argument(
+        "--timings",
+        help="Print a table of the time and resources used by each phase.",
+        dest="timings",
+        action="store_true",
+        default=False,
+    )
 
-    def install_subcommand(name_or_names: "Union[str, List[str]]", help: str, setup_fn):
-        names = name_or_names if isinstance(name_or_names, list) else [name_or_names]
+    parser.add_argument(
+        "--trace-file",
+        help="Write phase timings to a file in Chrome trace event format.",
+        dest="trace_file",
+        default=None,
+    )
 
-        for name in names:
-            cmd_fn = setup_fn(subparsers.add_parser(name, help=help))
-            subcommands[name] = cmd_fn
 
-    install_subcommand("build", "Build a DIT file.", setup_subcommand_build)
+def find_subcommand_name(argv: "Optional[Sequence[str]]") -> "Optional[str]":
+    parser = argparse.ArgumentParser(add_help=False)
+    add_global_arguments(parser)
+    parser.add_argument("subcommand_name", nargs="?")
+    parser.add_argument("subcommand_args", nargs=argparse.REMAINDER)
 
-    install_subcommand(
-        "clean",
-        "Resets the local build target and virtual environment to an empty state.",
-        setup_subcommand_clean,
-    )
+    (known_args, _) = parser.parse_known_args(argv)
 
-    install_subcommand(
-        "ditversion",
-        "Print the current version in dabl-meta.yaml",
-        setup_subcommand_ditversion,
-    )
+    return known_args.subcommand_name
 
-    install_subcommand(
-        "genargs",
-        "Write a template integration argfile to stdout",
-        setup_subcommand_genargs,
-    )
 
-    install_subcommand(
-        "inspect", "Inspect the contents of a DIT file.", setup_subcommand_inspect
-    )
+def load_subcommand_setup(module_name: str):
+    return importlib.import_module(f".{module_name}", __package__).setup
 
-    install_subcommand(
-        "install",
-        "Install the DIT file's dependencies into a local virtual environment.",
-        setup_subcommand_install,
-    )
 
-    install_subcommand(
-        ["publish", "release"],
-        "Tag and release the current DIT file.",
-        setup_subcommand_release,
-    )
+def main(argv: "Optional[Sequence[str]]" = None):
+    parser = argparse.ArgumentParser()
+    add_global_arguments(parser)
 
-    install_subcommand(
-        "run", "Run the current project as an integration.", setup_subcommand_run
-    )
+    dispatched_name = find_subcommand_name(argv)
 
-    install_subcommand(
-        "show", "Verify and print the current metadata file.", setup_subcommand_show
-    )
+    subcommands = {}
+    subparsers = parser.add_subparsers(dest="subcommand_name", help="subcommand")
 
-    install_subcommand(
-        "targetname",
-        "Print the build target filename to stdout",
-        setup_subcommand_targetname,
-    )
+    for (names, help, module_name) in SUBCOMMANDS:
+        for name in names:
+            sp = subparsers.add_parser(name, help=help)
+
+            if name == dispatched_name:
+                subcommands[name] = load_subcommand_setup(module_name)(sp)
 
-    kwargs = vars(parser.parse_args())
+    kwargs = vars(parser.parse_args(argv))
 
     subcommand_name = kwargs.pop("subcommand_name")
     verbose = kwargs.pop("verbose")
+    timings = kwargs.pop("timings")
+    trace_file = kwargs.pop("trace_file")
 
     setup_default_logging(level=logging.DEBUG if verbose else logging.INFO)
 
     cmd_fn = subcommands.get(subcommand_name)
 
     if cmd_fn:
-        cmd_fn(**kwargs)
+        recorder = enable_timings() if timings or trace_file else None
+
+        try:
+            with span(subcommand_name):
+                cmd_fn(**kwargs)
+        finally:
+            if recorder and timings:
+                print(timings_table(recorder), file=sys.stderr)
+
+            if recorder and trace_file:
+                write_chrome_trace(recorder, trace_file)
     else:
         parser.print_help()
 
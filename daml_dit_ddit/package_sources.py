@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .common import die
+
+
+@dataclass(frozen=True)
+class PackageSources:
+    """
+    Where Python dependencies are fetched from: the package index (unless
+    offline), and optionally a local directory of wheels (a wheelhouse)
+    searched before it.
+    """
+
+    wheelhouse: "Optional[str]" = None
+    offline: bool = False
+
+    @classmethod
+    def from_args(cls, wheelhouse: "Optional[str]", offline: bool) -> "PackageSources":
+        if wheelhouse is not None and not os.path.isdir(wheelhouse):
+            die(f"Wheelhouse directory not found: {wheelhouse}")
+
+        return cls(
+            wheelhouse=os.path.abspath(wheelhouse) if wheelhouse else None, offline=offline
+        )
+
+    @property
+    def indexes(self) -> "Optional[List[str]]":
+        """
+        Indexes for pex, where None selects the default index.
+        """
+        return [] if self.offline else None
+
+    @property
+    def find_links(self) -> "Optional[List[str]]":
+        return [self.wheelhouse] if self.wheelhouse else None
+
+    def pip_args(self) -> "List[str]":
+        args = ["--no-index"] if self.offline else []
+
+        if self.wheelhouse:
+            args += ["--find-links", self.wheelhouse]
+
+        return args
+
+
+DEFAULT_SOURCES = PackageSources()
+
+
+def add_package_source_arguments(sp):
+    sp.add_argument(
+        "--wheelhouse",
+        help="Search a local directory of wheels (as filled by 'ddit fetch') for"
+        " dependencies, before the package index.",
+        dest="wheelhouse",
+        action="store",
+        default=None,
+    )
+
+    sp.add_argument(
+        "--offline",
+        help="Do not access the package index. Dependencies must be available in"
+        " the wheelhouse, the lockfile's wheel store, or the local caches.",
+        dest="offline",
+        action="store_true",
+        default=False,
+    )
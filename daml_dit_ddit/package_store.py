@@ -0,0 +1,537 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import sys
+import sysconfig
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from .cache import cache_dir
+from .common import die
+from .hashing import artifact_file_hash
+from .lockfile import (
+    LockedDistribution,
+    ensure_locked_distributions,
+    store_distribution,
+    wheel_store_path,
+)
+from .log import LOG
+from .package_sources import DEFAULT_SOURCES, PackageSources
+from .timing import PhaseTimes, span
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where files are hardlinked or copied.
+    fcntl = None  # type: ignore
+
+PACKAGE_STORE_KIND = "packages"
+
+# Linux ioctl that clones a file's extents into another file on
+# filesystems that support copy-on-write (btrfs, XFS).
+FICLONE = 0x40049409
+
+# Longest shebang line the kernel accepts. Longer interpreter paths are
+# run through /bin/sh instead, as pip does.
+MAX_SHEBANG_LENGTH = 127
+
+SCRIPTS_DIR = "bin"
+
+
+@dataclass
+class LinkStats:
+    packages: int = 0
+    new_packages: int = 0
+    files: int = 0
+    linked_files: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.packages} package(s) ({self.new_packages} new to the store),"
+            f" {self.linked_files} of {self.files} file(s) linked rather than copied"
+        )
+
+
+def bundled_wheels() -> "List[str]":
+    """
+    The pip and setuptools wheels bundled with the interpreter for
+    ensurepip, if it has them.
+    """
+    import ensurepip
+
+    bundled_dir = os.path.join(os.path.dirname(ensurepip.__file__), "_bundled")
+
+    return sorted(glob.glob(os.path.join(bundled_dir, "*.whl")))
+
+
+def package_store_dir(wheel_filename: str) -> str:
+    # Installed packages include bytecode for a specific interpreter.
+    return os.path.join(
+        cache_dir(PACKAGE_STORE_KIND, sys.implementation.cache_tag),
+        artifact_file_hash(wheel_filename),
+    )
+
+
+def store_package(pip_cmd: "List[str]", wheel_filename: str) -> "Tuple[str, bool]":
+    """
+    Return the store directory holding the installed contents of a wheel,
+    installing it there first if needed. The second element of the result
+    is True if the package was newly installed.
+    """
+    store_dir = package_store_dir(wheel_filename)
+
+    if os.path.isdir(store_dir):
+        return (store_dir, False)
+
+    LOG.info(f"Adding to package store: {os.path.basename(wheel_filename)}")
+
+    # Packages are installed into a sibling directory and renamed into
+    # place, so concurrent installs never observe a partial package.
+    staging_dir = tempfile.mkdtemp(prefix=".staging.", dir=os.path.dirname(store_dir))
+
+    completed = subprocess.run(
+        [
+            *pip_cmd,
+            "install",
+            "--quiet",
+            "--no-deps",
+            "--no-index",
+            "--target",
+            staging_dir,
+            wheel_filename,
+        ]
+    )
+
+    if completed.returncode != 0:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        die(f"Error installing {wheel_filename} into the package store")
+
+    try:
+        os.rename(staging_dir, store_dir)
+    except OSError:
+        # Another install stored the same package first.
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return (store_dir, True)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            return True
+        except OSError:
+            pass
+
+    os.remove(dst)
+
+    return False
+
+
+def link_file(src: str, dst: str) -> bool:
+    """
+    Make dst share src's contents: by hardlink where possible, then by
+    copy-on-write clone, and by copying otherwise. Returns False if the
+    file had to be copied.
+    """
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        pass
+
+    if _reflink(src, dst):
+        shutil.copystat(src, dst)
+        return True
+
+    shutil.copy2(src, dst)
+
+    return False
+
+
+def _shebang(python: str) -> bytes:
+    if len(python) + 2 <= MAX_SHEBANG_LENGTH and " " not in python:
+        return f"#!{python}\n".encode()
+
+    return f"#!/bin/sh\n'''exec' \"{python}\" \"$0\" \"$@\"\n' '''\n".encode()
+
+
+def install_script(src: str, dst: str, python: str):
+    """
+    Copy a script from the store, pointing its shebang at the environment's
+    interpreter in place of the one that installed it into the store.
+    """
+    with open(src, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+
+    if lines[:1] == [b"#!/bin/sh\n"] and lines[1:2] and lines[1].startswith(b"'''exec'"):
+        lines = [_shebang(python), *lines[3:]]
+    elif lines[:1] and lines[0].startswith(b"#!") and b"python" in lines[0]:
+        lines = [_shebang(python), *lines[1:]]
+
+    with open(dst, "wb") as f:
+        f.write(b"".join(lines))
+
+    shutil.copymode(src, dst)
+
+
+def venv_site_packages(venv_dir: str) -> str:
+    """
+    The site-packages directory of an environment created by the running
+    interpreter. The interpreter's default install scheme is not used, as
+    distributions may change it (Debian's posix_local installs under
+    local/), and the environment's sys.path does not follow.
+    """
+    if "venv" in sysconfig.get_scheme_names():
+        scheme = "venv"
+    else:
+        scheme = "nt" if os.name == "nt" else "posix_prefix"
+
+    return sysconfig.get_path("purelib", scheme, vars={"base": venv_dir, "platbase": venv_dir})
+
+
+def link_package(store_dir: str, venv_dir: str, stats: "LinkStats"):
+    """
+    Link the files of a stored package into an environment's
+    site-packages, and install its scripts into the environment.
+    """
+    site_packages = venv_site_packages(venv_dir)
+    scripts_dir = os.path.join(venv_dir, SCRIPTS_DIR)
+    python = os.path.join(scripts_dir, "python")
+
+    for (root, dirs, files) in os.walk(store_dir):
+        rel_root = os.path.relpath(root, store_dir)
+
+        if rel_root == SCRIPTS_DIR:
+            for filename in files:
+                install_script(
+                    os.path.join(root, filename), os.path.join(scripts_dir, filename), python
+                )
+            dirs.clear()
+            continue
+
+        target_root = os.path.normpath(os.path.join(site_packages, rel_root))
+        os.makedirs(target_root, exist_ok=True)
+
+        for filename in files:
+            target = os.path.join(target_root, filename)
+
+            if os.path.lexists(target):
+                os.remove(target)
+
+            stats.files += 1
+
+            if link_file(os.path.join(root, filename), target):
+                stats.linked_files += 1
+
+
+@dataclass(frozen=True)
+class ResolvedPackage:
+    name: str
+    version: str
+    url: "Optional[str]"
+    sha256: "Optional[str]"
+
+    @property
+    def requirement(self) -> str:
+        return f"{self.name}=={self.version}"
+
+    @property
+    def filename(self) -> "Optional[str]":
+        return posixpath.basename(urlparse(self.url).path) if self.url else None
+
+
+def canonical_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def supports_report(pip_cmd: "List[str]") -> bool:
+    """
+    Whether pip can report a resolution without installing it, which
+    requires pip 22.2 or later.
+    """
+    completed = subprocess.run([*pip_cmd, "--version"], capture_output=True, text=True)
+
+    match = re.match(r"pip (\d+)\.(\d+)", completed.stdout)
+
+    if match is None:
+        return False
+
+    return (int(match.group(1)), int(match.group(2))) >= (22, 2)
+
+
+def resolve_packages(
+    pip_cmd: "List[str]",
+    args: "List[str]",
+    constraints: "Sequence[str]" = (),
+    source_args: "Sequence[str]" = (),
+) -> "List[ResolvedPackage]":
+    """
+    Resolve args and their dependencies together, in a single pip
+    resolution that installs nothing. source_args are pip's index and
+    find-links options.
+    """
+    with tempfile.TemporaryDirectory(prefix="ddit-resolve-") as resolve_dir:
+        report_filename = os.path.join(resolve_dir, "report.json")
+
+        constraint_args = []
+
+        if constraints:
+            constraints_filename = os.path.join(resolve_dir, "constraints.txt")
+
+            with open(constraints_filename, "w") as f:
+                f.write("".join(f"{constraint}\n" for constraint in constraints))
+
+            constraint_args = ["--constraint", constraints_filename]
+
+        completed = subprocess.run(
+            [
+                *pip_cmd,
+                "install",
+                "--quiet",
+                "--dry-run",
+                "--ignore-installed",
+                "--report",
+                report_filename,
+                *constraint_args,
+                *source_args,
+                *args,
+            ]
+        )
+
+        if completed.returncode != 0:
+            die(f"Error resolving {args}")
+
+        with open(report_filename, "r") as f:
+            report = json.load(f)
+
+    packages = []
+
+    for item in report["install"]:
+        download_info = item.get("download_info") or {}
+        archive_info = download_info.get("archive_info") or {}
+
+        packages.append(
+            ResolvedPackage(
+                name=item["metadata"]["name"],
+                version=item["metadata"]["version"],
+                url=download_info.get("url"),
+                sha256=(archive_info.get("hashes") or {}).get("sha256"),
+            )
+        )
+
+    return packages
+
+
+def stored_wheel(package: "ResolvedPackage") -> "Optional[str]":
+    """
+    The path of a resolved wheel, if it is a local file or is already in
+    the wheel store.
+    """
+    filename = package.filename
+
+    if not (filename and filename.endswith(".whl")):
+        return None
+
+    if package.url and package.url.startswith("file:"):
+        return url2pathname(urlparse(package.url).path)
+
+    if package.sha256:
+        store_path = wheel_store_path(
+            LockedDistribution(
+                name=package.name,
+                version=package.version,
+                filename=filename,
+                sha256=package.sha256,
+            )
+        )
+
+        if os.path.isfile(store_path):
+            return store_path
+
+    return None
+
+
+def download_package(
+    pip_cmd: "List[str]", package: "ResolvedPackage", source_args: "Sequence[str]" = ()
+) -> str:
+    """
+    Download a resolved package as a wheel (building it, if it is a source
+    distribution), and add it to the wheel store.
+    """
+    download_dir = tempfile.mkdtemp(prefix="ddit-download-")
+
+    try:
+        completed = subprocess.run(
+            [
+                *pip_cmd,
+                "wheel",
+                "--quiet",
+                "--no-deps",
+                "--wheel-dir",
+                download_dir,
+                *source_args,
+                package.url or package.requirement,
+            ]
+        )
+
+        wheels = [f for f in os.listdir(download_dir) if f.endswith(".whl")]
+
+        if completed.returncode != 0 or len(wheels) != 1:
+            die(f"Error downloading {package.requirement}")
+
+        wheel_path = os.path.join(download_dir, wheels[0])
+
+        # A wheel is downloaded as resolved, and must match the hash pip
+        # reported for it. A wheel built from a source distribution has no
+        # hash to check against.
+        if package.sha256 and package.filename == wheels[0]:
+            downloaded_hash = artifact_file_hash(wheel_path)
+
+            if downloaded_hash != package.sha256:
+                die(
+                    f"Downloaded {wheels[0]} does not match its expected hash:"
+                    f" expected {package.sha256}, got {downloaded_hash}"
+                )
+
+        return wheel_store_path(store_distribution(wheel_path))
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+
+def download_wheels(
+    pip_cmd: "List[str]", args: "List[str]", source_args: "Sequence[str]" = ()
+) -> "List[str]":
+    """
+    Resolve args and their dependencies to a set of wheels in the wheel
+    store, building any that are only available as source distributions.
+    Used with versions of pip that cannot report a resolution.
+    """
+    with tempfile.TemporaryDirectory(prefix="ddit-wheels-") as wheel_dir:
+        completed = subprocess.run(
+            [*pip_cmd, "wheel", "--quiet", "--wheel-dir", wheel_dir, *source_args, *args]
+        )
+
+        if completed.returncode != 0:
+            die(f"Error resolving {args}")
+
+        return [
+            wheel_store_path(store_distribution(os.path.join(wheel_dir, filename)))
+            for filename in sorted(os.listdir(wheel_dir))
+            if filename.endswith(".whl")
+        ]
+
+
+def populate_venv(
+    venv_dir: str,
+    pip_cmd: "List[str]",
+    args: "List[str]",
+    phases: "PhaseTimes",
+    extra_wheels: "Sequence[str]" = (),
+    locked_dists: "Optional[Sequence[LockedDistribution]]" = None,
+    sources: "PackageSources" = DEFAULT_SOURCES,
+) -> "LinkStats":
+    """
+    Install args and their dependencies (and any extra_wheels) into the
+    environment at venv_dir, through the package store.
+
+    Dependencies are resolved together in a single resolution. Wheels for
+    locked dependencies are prefetched into the wheel store while that
+    resolution runs, and the resolution is constrained to the locked
+    versions. Wheels not already in the wheel store are then downloaded,
+    and packages not already in the package store installed, in parallel.
+
+    Offline, the index cannot supply locked versions to the resolution, so
+    the locked wheels are fetched first and offered to it as find-links.
+    """
+    stats = LinkStats()
+
+    source_args = sources.pip_args()
+
+    if sources.offline and locked_dists:
+        with phases.phase("prefetch"):
+            locked_wheels = _prefetch_locked(locked_dists, sources)
+
+        for locked_dir in sorted({os.path.dirname(wheel) for wheel in locked_wheels}):
+            source_args += ["--find-links", locked_dir]
+
+    with ThreadPoolExecutor() as executor:
+        prefetch_future = (
+            executor.submit(_prefetch_locked, locked_dists, sources)
+            if locked_dists and not sources.offline
+            else None
+        )
+
+        try:
+            if supports_report(pip_cmd):
+                with phases.phase("resolve"):
+                    packages = resolve_packages(
+                        pip_cmd,
+                        args,
+                        [dist.requirement for dist in locked_dists or []],
+                        source_args,
+                    )
+
+                if prefetch_future:
+                    with phases.phase("prefetch"):
+                        prefetch_future.result()
+
+                with phases.phase("download"):
+                    stored_wheels = {pkg: stored_wheel(pkg) for pkg in packages}
+
+                    missing = [pkg for (pkg, wheel) in stored_wheels.items() if wheel is None]
+
+                    downloaded = dict(
+                        zip(
+                            missing,
+                            executor.map(
+                                lambda pkg: download_package(pip_cmd, pkg, source_args), missing
+                            ),
+                        )
+                    )
+
+                    wheels = [stored_wheels[pkg] or downloaded[pkg] for pkg in packages]
+            else:
+                with phases.phase("resolve"):
+                    wheels = download_wheels(pip_cmd, args, source_args)
+        finally:
+            if prefetch_future:
+                prefetch_future.cancel()
+
+        with phases.phase("store"):
+            stored = list(
+                executor.map(
+                    lambda wheel: store_package(pip_cmd, wheel), [*extra_wheels, *wheels]
+                )
+            )
+
+    with phases.phase("link"):
+        for (store_dir, is_new) in stored:
+            link_package(store_dir, venv_dir, stats)
+
+            stats.packages += 1
+            stats.new_packages += int(is_new)
+
+    return stats
+
+
+def _prefetch_locked(
+    locked_dists: "Sequence[LockedDistribution]", sources: "PackageSources"
+) -> "List[str]":
+    from pex.platforms import Platform
+
+    with span("prefetch_locked", dists=len(locked_dists)):
+        return ensure_locked_distributions(Platform.current(), locked_dists, sources)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import stat
+import sys
+from typing import TYPE_CHECKING
+from zipfile import ZIP_STORED, ZipFile, ZipInfo
+
+from .dit_size import PEX_MEMBER_DATE_TIME
+
+if TYPE_CHECKING:
+    from pex.common import Chroot
+    from pex.platforms import Platform
+
+# The layout pex builds by default: a zipapp with deflated members and
+# bytecode for the integration's own sources only.
+PEX_LAYOUT_ZIPAPP = "zipapp"
+
+# A layout tuned for integration start time. Members are stored rather
+# than deflated, so the distributions pex unpacks into PEX_ROOT on first
+# run are copied rather than inflated, and the distributions carry
+# bytecode, so their modules are not compiled on first import.
+PEX_LAYOUT_STARTUP = "startup"
+
+PEX_LAYOUTS = [PEX_LAYOUT_ZIPAPP, PEX_LAYOUT_STARTUP]
+
+DEFAULT_PEX_LAYOUT = PEX_LAYOUT_ZIPAPP
+
+PEX_SHEBANG = "#!/usr/bin/env python3"
+
+
+def can_compile_for(platform: "Platform") -> bool:
+    """
+    True if bytecode compiled by the running interpreter can be loaded on
+    the given platform. Bytecode is specific to the interpreter version.
+    """
+    running_version = f"{sys.version_info[0]}{sys.version_info[1]}"
+
+    return (
+        sys.implementation.name == "cpython"
+        and platform.version.replace(".", "") == running_version
+    )
+
+
+def write_stored_pex(chroot: "Chroot", pex_filename: str):
+    """
+    Write a frozen PEX chroot to a PEX file as PEXBuilder.build does (the
+    shebang line followed by the chroot's files, sorted, with a fixed
+    timestamp), but without compressing the members.
+    """
+    root = chroot.path()
+
+    tmp_filename = f"{pex_filename}~"
+
+    with open(tmp_filename, "wb") as f:
+        f.write(f"{PEX_SHEBANG}\n".encode())
+
+    with ZipFile(tmp_filename, "a") as pexfile:
+        for relpath in sorted(chroot.files()):
+            path = os.path.join(root, relpath)
+
+            zinfo = ZipInfo(relpath.replace(os.sep, "/"), date_time=PEX_MEMBER_DATE_TIME)
+            zinfo.external_attr = (os.stat(path).st_mode & 0xFFFF) << 16
+            zinfo.compress_type = ZIP_STORED
+
+            with open(path, "rb") as f:
+                pexfile.writestr(zinfo, f.read())
+
+    os.replace(tmp_filename, pex_filename)
+
+    mode = os.stat(pex_filename).st_mode
+    os.chmod(pex_filename, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
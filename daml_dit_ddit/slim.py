@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from hashlib import sha1
+from typing import TYPE_CHECKING, AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+from .log import LOG
+
+if TYPE_CHECKING:
+    from pex.pex_builder import PEXBuilder
+
+# Files in distributions and sources that are not needed to run an
+# integration. Patterns are matched against paths within a distribution
+# (or within src/), and * matches across directories.
+DEFAULT_SLIM_PATTERNS = [
+    "tests/*",
+    "*/tests/*",
+    "test/*",
+    "*/test/*",
+    "__pycache__/*",
+    "*/__pycache__/*",
+    "*.pyi",
+    "*.pyx",
+    "*.pxd",
+]
+
+# Distribution metadata is read by pex and pkg_resources at runtime, and
+# is never removed.
+PROTECTED_PATTERNS = ["*.dist-info/*", "*.egg-info/*"]
+
+
+@dataclass
+class SlimPolicy:
+    """
+    Exclusion rules for the contents of the intermediate PEX file. Keep
+    patterns override exclude patterns. Bytecode files next to their
+    sources (in the legacy location, rather than __pycache__) are
+    also excluded, as pex compiles sources itself.
+    """
+
+    exclude_patterns: "List[str]" = field(default_factory=lambda: list(DEFAULT_SLIM_PATTERNS))
+    keep_patterns: "List[str]" = field(default_factory=list)
+
+    def excludes(self, relpath: str, relpaths: "AbstractSet[str]" = frozenset()) -> bool:
+        if any(fnmatch(relpath, pattern) for pattern in PROTECTED_PATTERNS):
+            return False
+
+        if any(fnmatch(relpath, pattern) for pattern in self.keep_patterns):
+            return False
+
+        if relpath.endswith(".pyc") and relpath[:-1] in relpaths:
+            return True
+
+        return any(fnmatch(relpath, pattern) for pattern in self.exclude_patterns)
+
+
+@dataclass
+class SlimStats:
+    files: int = 0
+    removed_files: int = 0
+    removed_bytes: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"removed {self.removed_files} of {self.files} file(s),"
+            f" {self.removed_bytes} bytes uncompressed"
+        )
+
+
+def slim_policy(
+    slim: bool, exclude_patterns: "Sequence[str]", keep_patterns: "Sequence[str]"
+) -> "Optional[SlimPolicy]":
+    if not (slim or exclude_patterns):
+        return None
+
+    policy = SlimPolicy()
+    policy.exclude_patterns.extend(exclude_patterns)
+    policy.keep_patterns.extend(keep_patterns)
+
+    return policy
+
+
+def _chroot_groups(pex_builder: "PEXBuilder") -> "Dict[Tuple[Optional[str], str], List[str]]":
+    """
+    Group the distribution and source files in the builder's chroot by
+    (label, group root), where a distribution's root is its directory in
+    the internal cache.
+    """
+    chroot = pex_builder.chroot()
+    internal_cache = pex_builder.info.internal_cache
+
+    groups: "Dict[Tuple[Optional[str], str], List[str]]" = {}
+
+    for path in chroot.filesets.get("source", ()):
+        groups.setdefault(("source", ""), []).append(path)
+
+    # pex adds distribution files without a label.
+    for path in chroot.filesets.get(None, ()):
+        parts = path.split(os.sep)
+
+        if len(parts) > 2 and parts[0] == internal_cache:
+            groups.setdefault((None, os.path.join(parts[0], parts[1])), []).append(path)
+
+    return groups
+
+
+def slim_pex(pex_builder: "PEXBuilder", policy: "SlimPolicy") -> "SlimStats":
+    """
+    Remove the files excluded by policy from the distributions and sources
+    in an unfrozen PEX builder.
+    """
+    chroot = pex_builder.chroot()
+
+    stats = SlimStats()
+
+    groups = _chroot_groups(pex_builder)
+
+    for ((label, root), paths) in sorted(groups.items(), key=lambda item: item[0][1]):
+        relpaths = [os.path.relpath(path, root or ".").replace(os.sep, "/") for path in paths]
+        relpath_set = set(relpaths)
+
+        stats.files += len(paths)
+
+        removed = [
+            path
+            for (path, relpath) in zip(paths, relpaths)
+            if policy.excludes(relpath, relpath_set)
+        ]
+
+        if not removed:
+            continue
+
+        removed_bytes = sum(os.path.getsize(os.path.join(chroot.path(), path)) for path in removed)
+
+        # Files are only dropped from the chroot's fileset, which is what
+        # pex writes to the PEX file. The chroot is discarded afterwards.
+        for path in removed:
+            chroot.filesets[label].discard(path)
+
+        group = os.path.basename(root) if root else "src"
+
+        LOG.debug(f"  Slimmed {group}: {len(removed)} file(s), {removed_bytes} bytes")
+
+        stats.removed_files += len(removed)
+        stats.removed_bytes += removed_bytes
+
+        if root:
+            # Distributions are unpacked at runtime into a cache keyed by
+            # this hash, which must not be shared with an unslimmed copy.
+            dist_name = os.path.basename(root)
+            dist_hash = pex_builder.info.distributions[dist_name]
+
+            pex_builder.info.add_distribution(
+                dist_name, sha1(f"{dist_hash}\0{policy!r}".encode()).hexdigest()
+            )
+
+    return stats
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .common import die
+from .log import LOG
+from .timing import format_bytes, max_rss_bytes
+
+DEFAULT_RUNS = 5
+
+MODE_COLD = "cold"
+MODE_WARM = "warm"
+MODE_PYTHON = "python"
+
+# Stands in for the integration framework. It records when it is first
+# imported and when its entrypoint is called, and then exits, so a run
+# measures only the PEX bootstrap.
+STUB_INIT = """\
+import json, os, time
+_first_import = time.time()
+
+def record(**times):
+    with open(os.environ["DDIT_BENCH_OUTPUT"], "w") as f:
+        json.dump({"first_import": _first_import, **times}, f)
+"""
+
+STUB_MAIN = """\
+import time
+
+def main():
+    import daml_dit_if
+    daml_dit_if.record(entrypoint=time.time())
+"""
+
+
+@dataclass
+class StartSample:
+    first_import: "Optional[float]"
+    entrypoint: "Optional[float]"
+    total: float
+    max_rss: int
+
+
+def _write_stub(stub_dir: str):
+    package_dir = os.path.join(stub_dir, "daml_dit_if")
+    os.makedirs(package_dir)
+
+    with open(os.path.join(package_dir, "__init__.py"), "w") as f:
+        f.write(STUB_INIT)
+
+    with open(os.path.join(package_dir, "main.py"), "w") as f:
+        f.write(STUB_MAIN)
+
+
+def run_once(args: "List[str]", env: "Dict[str, str]", output_filename: str) -> "StartSample":
+    """
+    Run a command to completion, returning the times (from just before it
+    is started) at which the stub was first imported and its entrypoint
+    called, and the process's peak RSS.
+    """
+    if os.path.exists(output_filename):
+        os.remove(output_filename)
+
+    # Output goes to a file rather than a pipe, which would not be read
+    # while the process is waited on.
+    with tempfile.TemporaryFile("w+") as stderr_file:
+        start = time.time()
+
+        proc = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=stderr_file)
+
+        # The process is reaped with wait4, which also returns its resource
+        # usage, and the Popen object is then told how it exited.
+        (_, status, rusage) = os.wait4(proc.pid, 0)
+
+        total = time.time() - start
+
+        proc.returncode = (
+            os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        )
+
+        if proc.returncode != 0:
+            stderr_file.seek(0)
+            die(
+                f"Benchmark run failed (rc={proc.returncode}): {' '.join(args)}\n"
+                + stderr_file.read()
+            )
+
+    times: "Dict[str, float]" = {}
+
+    if os.path.isfile(output_filename):
+        with open(output_filename, "r") as f:
+            times = json.load(f)
+
+    return StartSample(
+        first_import=times["first_import"] - start if "first_import" in times else None,
+        entrypoint=times["entrypoint"] - start if "entrypoint" in times else None,
+        total=total,
+        max_rss=max_rss_bytes(rusage.ru_maxrss),
+    )
+
+
+def _tree_size(path: str) -> "Tuple[int, int]":
+    (files, size) = (0, 0)
+
+    for (root, _, filenames) in os.walk(path):
+        for filename in filenames:
+            files += 1
+            size += os.path.getsize(os.path.join(root, filename))
+
+    return (files, size)
+
+
+def _median(values: "List[Optional[float]]") -> "Optional[float]":
+    present = [value for value in values if value is not None]
+
+    return statistics.median(present) if present else None
+
+
+def _format_time(value: "Optional[float]") -> str:
+    return "-" if value is None else f"{value * 1000:.0f}ms"
+
+
+def bench_start(
+    dit_filenames: "List[str]", python: str, runs: int, work_dir: str
+) -> "Dict[str, Dict[str, List[StartSample]]]":
+    """
+    Measure the start of each DIT, returning samples by DIT and mode. The
+    interpreter baseline is measured once and shared by every DIT.
+    """
+    stub_dir = os.path.join(work_dir, "stub")
+    _write_stub(stub_dir)
+
+    output_filename = os.path.join(work_dir, "times.json")
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": stub_dir,
+        "PEX_INHERIT_PATH": "prefer",
+        "DDIT_BENCH_OUTPUT": output_filename,
+    }
+
+    # A baseline for interpreter startup, without the PEX.
+    baseline = [
+        run_once([python, "-c", "import daml_dit_if.main as m; m.main()"], env, output_filename)
+        for _ in range(runs)
+    ]
+
+    return {
+        dit_filename: bench_dit(
+            dit_filename, python, runs, os.path.join(work_dir, f"dit-{index}"), env, baseline
+        )
+        for (index, dit_filename) in enumerate(dit_filenames)
+    }
+
+
+def bench_dit(
+    dit_filename: str,
+    python: str,
+    runs: int,
+    work_dir: str,
+    env: "Dict[str, str]",
+    baseline: "List[StartSample]",
+) -> "Dict[str, List[StartSample]]":
+    output_filename = env["DDIT_BENCH_OUTPUT"]
+
+    samples: "Dict[str, List[StartSample]]" = {
+        MODE_PYTHON: baseline,
+        MODE_COLD: [],
+        MODE_WARM: [],
+    }
+
+    for run in range(runs):
+        pex_root = os.path.join(work_dir, f"pex-root-cold-{run}")
+
+        samples[MODE_COLD].append(
+            run_once([python, dit_filename], {**env, "PEX_ROOT": pex_root}, output_filename)
+        )
+
+        if run == 0:
+            (files, size) = _tree_size(pex_root)
+            LOG.info(f"First run extracted {files} file(s), {format_bytes(size)} into PEX_ROOT")
+
+        shutil.rmtree(pex_root, ignore_errors=True)
+
+    warm_root = os.path.join(work_dir, "pex-root-warm")
+    warm_env = {**env, "PEX_ROOT": warm_root}
+
+    # Populates the cache for the warm runs.
+    run_once([python, dit_filename], warm_env, output_filename)
+
+    for _ in range(runs):
+        samples[MODE_WARM].append(run_once([python, dit_filename], warm_env, output_filename))
+
+    if any(sample.entrypoint is None for sample in samples[MODE_COLD]):
+        die(
+            f"{dit_filename} did not call the stub daml_dit_if entrypoint. DITs that bundle"
+            " daml-dit-if, or that do not run daml_dit_if.main, cannot be measured."
+        )
+
+    return samples
+
+
+def start_table(samples: "Dict[str, List[StartSample]]") -> str:
+    header = (
+        f"{'mode':<8} {'runs':>5} {'first import':>13} {'entrypoint':>11}"
+        f" {'exit':>9} {'peak rss':>10}"
+    )
+
+    lines = [header, "-" * len(header)]
+
+    for (mode, mode_samples) in samples.items():
+        lines.append(
+            f"{mode:<8} {len(mode_samples):>5}"
+            f" {_format_time(_median([s.first_import for s in mode_samples])):>13}"
+            f" {_format_time(_median([s.entrypoint for s in mode_samples])):>11}"
+            f" {_format_time(_median([s.total for s in mode_samples])):>9}"
+            f" {format_bytes(max(s.max_rss for s in mode_samples)):>10}"
+        )
+
+    return "\n".join(lines)
+
+
+def _entrypoint(samples: "Dict[str, List[StartSample]]", mode: str) -> "Optional[float]":
+    return _median([sample.entrypoint for sample in samples[mode]])
+
+
+def comparison_table(dit_samples: "Dict[str, Dict[str, List[StartSample]]]") -> str:
+    """
+    Compare the median times to the entrypoint of several DITs, relative
+    to the first.
+    """
+    header = (
+        f"{'dit':<40} {'size':>10} {'cold':>9} {'warm':>9} {'extraction':>11} {'cold vs 1st':>12}"
+    )
+
+    lines = [header, "-" * len(header)]
+
+    first_cold = None
+
+    for (dit_filename, samples) in dit_samples.items():
+        cold = _entrypoint(samples, MODE_COLD)
+        warm = _entrypoint(samples, MODE_WARM)
+
+        extraction = cold - warm if cold is not None and warm is not None else None
+
+        if first_cold is None:
+            first_cold = cold
+
+        relative = "-"
+
+        if cold is not None and first_cold:
+            relative = f"{100.0 * (cold - first_cold) / first_cold:+.1f}%"
+
+        lines.append(
+            f"{os.path.basename(dit_filename)[-40:]:<40}"
+            f" {format_bytes(os.path.getsize(dit_filename)):>10}"
+            f" {_format_time(cold):>9} {_format_time(warm):>9}"
+            f" {_format_time(extraction):>11} {relative:>12}"
+        )
+
+    return "\n".join(lines)
+
+
+def subcommand_main(
+    dit_filenames: "List[str]",
+    python: "Optional[str]",
+    runs: int,
+    json_filename: "Optional[str]",
+):
+    for dit_filename in dit_filenames:
+        if not os.path.exists(dit_filename):
+            die(f"DIT file not found: {dit_filename}")
+
+    if not hasattr(os, "wait4"):
+        die("bench-start is not supported on this platform.")
+
+    if runs < 1:
+        die("--runs must be at least 1.")
+
+    python = python or sys.executable
+
+    LOG.info(
+        f"Measuring start of {', '.join(dit_filenames)} with {python}"
+        f" ({runs} run(s) per mode)..."
+    )
+
+    with tempfile.TemporaryDirectory(prefix="ddit-bench-start-") as work_dir:
+        dit_samples = bench_start(
+            [os.path.abspath(dit_filename) for dit_filename in dit_filenames],
+            python,
+            runs,
+            work_dir,
+        )
+
+    for (index, (dit_filename, samples)) in enumerate(dit_samples.items()):
+        if index > 0:
+            print()
+
+        if len(dit_samples) > 1:
+            print(f"{os.path.basename(dit_filename)}:")
+
+        print(start_table(samples))
+
+        cold_entry = _entrypoint(samples, MODE_COLD)
+        warm_entry = _entrypoint(samples, MODE_WARM)
+        python_entry = _entrypoint(samples, MODE_PYTHON)
+
+        if cold_entry is not None and warm_entry is not None:
+            print()
+            print(
+                f"PEX extraction (cold - warm entrypoint): {_format_time(cold_entry - warm_entry)}"
+            )
+
+        if warm_entry is not None and python_entry is not None:
+            print(
+                f"PEX bootstrap (warm - python entrypoint):"
+                f" {_format_time(warm_entry - python_entry)}"
+            )
+
+    if len(dit_samples) > 1:
+        print()
+        print(comparison_table(dit_samples))
+
+    if json_filename:
+        with open(json_filename, "w") as f:
+            json.dump(
+                {
+                    "python": python,
+                    "dits": [
+                        {
+                            "dit": dit_filename,
+                            "samples": {
+                                mode: [asdict(sample) for sample in mode_samples]
+                                for (mode, mode_samples) in samples.items()
+                            },
+                        }
+                        for (dit_filename, samples) in dit_samples.items()
+                    ],
+                },
+                f,
+                indent=2,
+            )
+
+
+def setup(sp):
+    sp.add_argument(
+        "dit_filenames",
+        metavar="dit_filename",
+        nargs="+",
+        help="DIT file to measure. Several DIT files (such as builds of one project"
+        " with different --pex-layout options) are measured in turn and compared.",
+    )
+
+    sp.add_argument(
+        "--python",
+        help="Interpreter to run the DIT with (default: the interpreter running ddit).",
+        dest="python",
+        action="store",
+        default=None,
+    )
+
+    sp.add_argument(
+        "--runs",
+        help=f"Number of runs in each mode (default: {DEFAULT_RUNS}).",
+        dest="runs",
+        type=int,
+        default=DEFAULT_RUNS,
+    )
+
+    sp.add_argument(
+        "--json",
+        help="Also write every sample to a JSON file.",
+        dest="json_filename",
+        action="store",
+        default=None,
+    )
+
+    return subcommand_main
@@ -3,11 +3,24 @@ from __future__ import annotations
 import json
 import os
 import subprocess
-from dataclasses import replace
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from datetime import date
-from pathlib import Path
-from typing import Optional, Sequence, Tuple
-from zipfile import ZipFile
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 from daml_dit_api import (
     DABL_META_NAME,
@@ -16,16 +29,44 @@ from daml_dit_api import (
     IntegrationTypeInfo,
     PackageMetadata,
 )
-from dazl.damlast.lookup import parse_type_con_name
-from dazl.damlast.util import package_ref
-from pex.pex import PEX
-from pex.pex_builder import PEXBuilder
-from pex.platforms import Platform
-from pex.resolver import Unsatisfiable, resolve, ResolvedDistribution
 
+from .archive import (
+    DEFAULT_COMPRESS_LEVEL,
+    DEFAULT_STORE_PATTERNS,
+    FAST_COMPRESS_LEVEL,
+    CompressionPolicy,
+    CompressionStats,
+    PrecompressedFiles,
+    PrecompressedMember,
+    collect_tree,
+    precompress_file,
+    write_precompressed,
+)
+from .build_config import (
+    DAR_CACHE_KIND,
+    DEFAULT_DAML_SOURCE,
+    DIT_CACHE_KIND,
+    PEX_CACHE_KIND,
+    PKG_DIR,
+    PLATFORM_HUB,
+    BuildTarget,
+    add_platform_arguments,
+    build_targets,
+    daml_source_files,
+)
+from .cache import (
+    InputDigest,
+    cache_dir,
+    copy_from_cache,
+    lookup_artifact,
+    package_version,
+    store_artifact,
+)
 from .common import (
+    DAML_YAML_NAME,
+    PYTHON_LOCK_FILE,
     PYTHON_REQUIREMENT_FILE,
-    artifact_hash,
+    accept_dabl_meta_bytes,
     daml_yaml_version,
     die,
     load_dabl_meta,
@@ -34,13 +75,46 @@ from .common import (
     package_dit_filename,
     package_meta_integration_types,
     package_meta_yaml,
-    read_binary_file,
     with_catalog,
 )
+from .dar import DarFormatError, read_dar
+from .dit_size import dit_size_breakdown, parse_size, size_table
+from .hashing import artifact_file_hash
+from .lockfile import (
+    RESOLVE_CACHE_KIND,
+    ensure_locked_distributions,
+    locked_distributions,
+)
 from .log import LOG
+from .package_sources import (
+    DEFAULT_SOURCES,
+    PackageSources,
+    add_package_source_arguments,
+)
+from .pex_layout import (
+    DEFAULT_PEX_LAYOUT,
+    PEX_LAYOUT_STARTUP,
+    PEX_LAYOUTS,
+    PEX_SHEBANG,
+    can_compile_for,
+    write_stored_pex,
+)
+from .slim import SlimPolicy, slim_pex, slim_policy
+from .timing import format_bytes, span
+
+# pex and dazl are imported where they are used, rather than here. Each
+# takes a substantial fraction of a second to import, and neither is
+# needed when the build is satisfied entirely from the build cache.
+if TYPE_CHECKING:
+    from pex.platforms import Platform
+    from pex.resolver import ResolvedDistribution
 
 IF_PROJECT_NAME = "daml-dit-if"
 
+PEX_ENTRY_POINT = "daml_dit_if.main:main"
+
+DAR_MANIFEST_NAME = ".ddit-dar-manifest.json"
+
 
 def check_target_file(filename: str, force: bool):
     if os.path.exists(filename):
@@ -50,37 +124,209 @@ def check_target_file(filename: str, force: bool):
             die(f"Target file already exists: {filename}")
 
 
-def pex_writestr(pex: ZipFile, filepath: str, filebytes: bytes):
-    if filepath in pex.namelist():
+def pex_members(pex: ZipFile) -> "Set[str]":
+    """
+    Index of the members of an archive, seeded once from its central
+    directory and then maintained by pex_write and pex_writestr.
+    """
+    return set(pex.namelist())
+
+
+def pex_writestr(
+    pex: ZipFile,
+    members: "Set[str]",
+    filepath: str,
+    filebytes: "Union[str, bytes]",
+    policy: "CompressionPolicy",
+):
+    if filepath in members:
         LOG.warn(f"  File {filepath} exists in archive -- skipping.")
     else:
-        pex.writestr(filepath, filebytes)
+        level = policy.level_for(filepath)
+
+        pex.writestr(
+            filepath,
+            filebytes,
+            compress_type=ZIP_STORED if level is None else ZIP_DEFLATED,
+            compresslevel=level,
+        )
+        members.add(filepath)
+
+
+def pex_write(
+    pex: ZipFile,
+    members: "Set[str]",
+    filepath: str,
+    policy: "CompressionPolicy",
+    stats: "CompressionStats",
+    arcname: Optional[str] = None,
+):
+    pex_write_precompressed(
+        pex, members, precompress_file(filepath, arcname or filepath, policy), stats
+    )
+
 
+def pex_write_precompressed(
+    pex: ZipFile,
+    members: "Set[str]",
+    member: "PrecompressedMember",
+    stats: "CompressionStats",
+    keep: bool = False,
+):
+    if member.zinfo.filename in members:
+        LOG.warn(f"  File {member.zinfo.filename} exists in archive -- skipping.")
 
-def pex_write(pex: ZipFile, filepath: str, arcname: Optional[str] = None):
-    filename = filepath.split("/")[-1]
-    if filename in pex.namelist():
-        LOG.warn(f"  File {filename} exists in archive -- skipping.")
+        if not keep:
+            member.close()
     else:
-        pex.write(filepath, arcname=arcname)
+        write_precompressed(pex, member, keep)
+        members.add(member.zinfo.filename)
+        stats.record(member)
 
 
-def build_pex(pex_filename: str, local_only: bool) -> str:
-    pex_builder = PEXBuilder()
-    pex_builder.info.includes_tools = True
-    pex_builder.info.inherit_path = True
-    pex_builder.set_entry_point("daml_dit_if.main:main")
-    pex_builder.set_shebang("/usr/bin/env python3")
+def compression_policy(
+    store_patterns: "Sequence[str]",
+    compress_levels: "Sequence[str]",
+    fast_compression: bool,
+) -> "CompressionPolicy":
+    level_patterns = []
 
-    if local_only:
+    for compress_level in compress_levels:
+        (pattern, sep, level) = compress_level.rpartition("=")
+
+        if not sep or not pattern or not level.isdigit() or int(level) > 9:
+            die(f"Invalid --compress-level (expected GLOB=LEVEL, LEVEL 0-9): {compress_level}")
+
+        level_patterns.append((pattern, int(level)))
+
+    return CompressionPolicy(
+        store_patterns=[*DEFAULT_STORE_PATTERNS, *store_patterns],
+        level_patterns=level_patterns,
+        default_level=FAST_COMPRESS_LEVEL if fast_compression else DEFAULT_COMPRESS_LEVEL,
+    )
+
+
+def target_dit_filename(dabl_meta: "PackageMetadata", target: "BuildTarget", single: bool) -> str:
+    """
+    The DIT filename for a build target. The Daml Hub DIT, and the DIT of
+    a single-platform build, have the package's usual DIT filename. Other
+    DITs are suffixed with their platform.
+    """
+    if single or target.name == PLATFORM_HUB:
+        return package_dit_filename(dabl_meta)
+
+    return f"{package_dit_basename(dabl_meta)}-{target.name}.dit"
+
+
+def pex_input_digest(
+    platform_id: str, slim: "Optional[SlimPolicy]" = None, layout: str = DEFAULT_PEX_LAYOUT
+) -> str:
+    digest = InputDigest(PEX_CACHE_KIND)
+
+    if slim is not None:
+        digest.add_str("slim", repr(slim))
+
+    if layout != DEFAULT_PEX_LAYOUT:
+        digest.add_str("layout", layout)
+
+        # Whether distributions can be compiled, and the bytecode they
+        # are compiled to, depend on the interpreter running the build.
+        digest.add_str("interpreter", sys.implementation.cache_tag or "")
+
+    digest.add_str("pex", package_version("pex"))
+    digest.add_str("platform", platform_id)
+    digest.add_str("entry_point", PEX_ENTRY_POINT)
+    digest.add_file("requirements", PYTHON_REQUIREMENT_FILE)
+    digest.add_file("lock", PYTHON_LOCK_FILE)
+    digest.add_tree("src", "src/")
+
+    return digest.hexdigest()
+
+
+def resolve_input_digest(platform_id: str) -> str:
+    digest = InputDigest(RESOLVE_CACHE_KIND)
+
+    digest.add_str("pex", package_version("pex"))
+    digest.add_str("platform", platform_id)
+    digest.add_file("requirements", PYTHON_REQUIREMENT_FILE)
+    digest.add_file("lock", PYTHON_LOCK_FILE)
+
+    return digest.hexdigest()
+
+
+# Resolved distributions are memoized for the life of the process, keyed
+# by the resolve inputs, so that repeated builds in watch mode only
+# resolve dependencies again when the requirements change.
+_resolve_memo: "Dict[str, List[ResolvedDistribution]]" = {}
+
+
+def build_pex(
+    pex_filename: str,
+    target: "BuildTarget",
+    use_cache: bool = True,
+    sources: "PackageSources" = DEFAULT_SOURCES,
+    slim: "Optional[SlimPolicy]" = None,
+    layout: str = DEFAULT_PEX_LAYOUT,
+) -> str:
+    if target.local_only:
         LOG.warn("Local-only build. THIS DIT WILL NOT RUN IN DAML HUB.")
-        platform = Platform.current()
-    else:
-        platform = Platform("manylinux_2_17", "x86_64", "3.8", "cp38m")
 
-    daml_dit_if_bundled = False
+    with span("pex.digest", platform=target.name):
+        pex_key = pex_input_digest(target.platform_id, slim, layout)
 
-    try:
+    if use_cache:
+        with span("pex.cache_lookup"):
+            cached = lookup_artifact(PEX_CACHE_KIND, pex_key)
+
+            if cached:
+                (artifact_path, info) = cached
+
+                if copy_from_cache(artifact_path, pex_filename, info["artifact_hash"]):
+                    LOG.info(
+                        f"Reusing cached intermediate PEX file for {target.name}"
+                        " (inputs unchanged)."
+                    )
+                    return info["runtime"]
+
+    runtime = _build_pex_uncached(
+        pex_filename, target.platform(), target.platform_id, sources, slim, layout
+    )
+
+    if use_cache:
+        with span("pex.cache_store"):
+            store_artifact(PEX_CACHE_KIND, pex_key, pex_filename, {"runtime": runtime})
+
+    return runtime
+
+
+def resolve_distributions(
+    platform: "Platform", platform_id: str, sources: "PackageSources" = DEFAULT_SOURCES
+) -> "List[ResolvedDistribution]":
+    from pex.resolver import resolve
+
+    resolve_key = resolve_input_digest(platform_id)
+
+    resolveds = _resolve_memo.get(resolve_key)
+
+    if resolveds is not None:
+        LOG.info("Reusing dependencies resolved earlier (requirements unchanged).")
+        return resolveds
+
+    locked_dists = locked_distributions(platform_id)
+
+    if locked_dists is not None:
+        LOG.info(f"Bundling locked dependencies from {PYTHON_LOCK_FILE}...")
+
+        # Locked builds install exactly the pinned wheels from the
+        # local wheel store, with no resolution and no index access.
+        resolveds = resolve(
+            requirements=ensure_locked_distributions(platform, locked_dists, sources),
+            transitive=False,
+            platform=platform,
+            indexes=[],
+            cache=cache_dir(RESOLVE_CACHE_KIND),
+        )
+    else:
         if os.path.isfile(PYTHON_REQUIREMENT_FILE):
             LOG.info(f"Bundling dependencies from {PYTHON_REQUIREMENT_FILE}...")
             requirement_files = [PYTHON_REQUIREMENT_FILE]
@@ -90,10 +336,46 @@ def build_pex(pex_filename: str, local_only: bool) -> str:
             )
             requirement_files = []
 
-        resolveds: list[ResolvedDistribution] = resolve(
-            requirements=[], requirement_files=requirement_files, platform=platform
+        resolveds = resolve(
+            requirements=[],
+            requirement_files=requirement_files,
+            platform=platform,
+            indexes=sources.indexes,
+            find_links=sources.find_links,
+            cache=cache_dir(RESOLVE_CACHE_KIND),
         )
 
+    _resolve_memo[resolve_key] = resolveds
+
+    return resolveds
+
+
+def _build_pex_uncached(
+    pex_filename: str,
+    platform: "Platform",
+    platform_id: str,
+    sources: "PackageSources",
+    slim: "Optional[SlimPolicy]",
+    layout: str = DEFAULT_PEX_LAYOUT,
+) -> str:
+    from pex.pex import PEX
+    from pex.pex_builder import PEXBuilder
+    from pex.resolver import Unsatisfiable
+
+    from .bytecode import compile_chroot
+
+    pex_builder = PEXBuilder()
+    pex_builder.info.includes_tools = True
+    pex_builder.info.inherit_path = True
+    pex_builder.set_entry_point(PEX_ENTRY_POINT)
+    pex_builder.set_shebang(PEX_SHEBANG)
+
+    daml_dit_if_bundled = False
+
+    try:
+        with span("pex.resolve"):
+            resolveds = resolve_distributions(platform, platform_id, sources)
+
         for resolved_dist in resolveds:
             if (
                 resolved_dist.distribution.project_name == IF_PROJECT_NAME
@@ -131,7 +413,31 @@ def build_pex(pex_filename: str, local_only: bool) -> str:
 
     walk_and_do(pex_builder.add_source, "src/")
 
-    pex_builder.freeze(bytecode_compile=True)
+    if slim is not None:
+        with span("pex.slim"):
+            slim_stats = slim_pex(pex_builder, slim)
+
+        LOG.info("Slimmed: %s", slim_stats.summary())
+
+    compile_distributions = layout == PEX_LAYOUT_STARTUP
+
+    if compile_distributions and not can_compile_for(platform):
+        LOG.warn(
+            f"Bundled dependencies will not be precompiled: this build targets Python"
+            f" {platform.version}, and ddit is running on Python"
+            f" {sys.version_info[0]}.{sys.version_info[1]}."
+        )
+        compile_distributions = False
+
+    # Sources are compiled by ddit rather than by pex, which compiles
+    # them serially in a single subprocess and does not cache the output.
+    with span("pex.freeze"):
+        pex_builder.freeze(bytecode_compile=False)
+
+    with span("pex.compile"):
+        bytecode_stats = compile_chroot(pex_builder.chroot(), distributions=compile_distributions)
+
+    LOG.info("Bytecode: %s", bytecode_stats.summary())
 
     # Entry point verification is disabled because ddit does not
     # formally depend on the integration framework, and it is not
@@ -153,11 +459,15 @@ def build_pex(pex_filename: str, local_only: bool) -> str:
         verify_entry_point=False,
     )
 
-    LOG.info("Building intermediate PEX file...")
+    LOG.info(f"Building intermediate PEX file for {platform_id}...")
 
     LOG.debug("PEX info: %r", pex_builder.info)
 
-    pex_builder.build(pex_filename, bytecode_compile=True, deterministic_timestamp=True)
+    with span("pex.build"):
+        if layout == PEX_LAYOUT_STARTUP:
+            write_stored_pex(pex_builder.chroot(), pex_filename)
+        else:
+            pex_builder.build(pex_filename, bytecode_compile=False, deterministic_timestamp=True)
 
     if daml_dit_if_bundled:
         return "python-direct"
@@ -165,10 +475,107 @@ def build_pex(pex_filename: str, local_only: bool) -> str:
         return "python-direct-hub-if"
 
 
-def build_dar(
-    dabl_meta: "PackageMetadata", rebuild_dar: bool
-) -> "Optional[Tuple[str, DamlModelInfo]]":
-    if load_daml_yaml() is None:
+def dar_input_digest(daml_yaml: "Dict[str, Any]") -> str:
+    digest = InputDigest(DAR_CACHE_KIND)
+
+    digest.add_file(DAML_YAML_NAME, DAML_YAML_NAME)
+
+    source = daml_yaml.get("source", DEFAULT_DAML_SOURCE)
+    if os.path.isdir(source):
+        # Only Daml files are inputs, as the source directory may hold the
+        # rest of the project (and its build outputs) as well.
+        for path in daml_source_files(source):
+            rel_path = os.path.relpath(path, source).replace(os.sep, "/")
+            digest.add_file(f"source:{rel_path}", path)
+    else:
+        digest.add_file("source", source)
+
+    for deps_key in ["dependencies", "data-dependencies"]:
+        for dependency in daml_yaml.get(deps_key) or []:
+            # Dependencies are either SDK package names (which are versioned
+            # by sdk-version in daml.yaml) or paths to DAR files.
+            if os.path.isfile(dependency):
+                digest.add_file(f"{deps_key}:{dependency}", dependency)
+            else:
+                digest.add_str(deps_key, dependency)
+
+    return digest.hexdigest()
+
+
+def load_dar_manifest() -> "Optional[Dict[str, Any]]":
+    try:
+        with open(DAR_MANIFEST_NAME, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        LOG.warn(f"Ignoring invalid DAR manifest: {DAR_MANIFEST_NAME}")
+        return None
+
+
+def write_dar_manifest(dar_filename: str, inputs_digest: str, main_package_id: str):
+    manifest = {
+        "dar": dar_filename,
+        "dar_hash": artifact_file_hash(dar_filename),
+        "inputs_digest": inputs_digest,
+        "main_package_id": main_package_id,
+    }
+
+    with open(DAR_MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def is_dar_current(dar_filename: str, inputs_digest: str) -> "Optional[str]":
+    """
+    Return the cached main package ID of the DAR if it exists and was
+    built from the current Daml sources, or None if it must be rebuilt.
+    """
+    if not os.path.exists(dar_filename):
+        return None
+
+    manifest = load_dar_manifest()
+
+    if manifest is None:
+        LOG.info(f"No DAR manifest found for existing DAR: {dar_filename}")
+        return None
+
+    if manifest.get("dar") != dar_filename:
+        return None
+
+    if manifest.get("inputs_digest") != inputs_digest:
+        LOG.info(f"Daml sources have changed since last build of {dar_filename}")
+        return None
+
+    if manifest.get("dar_hash") != artifact_file_hash(dar_filename):
+        LOG.info(f"DAR file has been modified since last build: {dar_filename}")
+        return None
+
+    return manifest.get("main_package_id")
+
+
+@dataclass(frozen=True)
+class DarPlan:
+    name: str
+    version: str
+    filename: str
+    inputs_digest: str
+
+    # Set when the existing DAR is current and will be retained.
+    main_package_id: "Optional[str]" = None
+
+    @property
+    def needs_build(self) -> bool:
+        return self.main_package_id is None
+
+
+def plan_dar(dabl_meta: "PackageMetadata", rebuild_dar: bool) -> "Optional[DarPlan]":
+    """
+    Determine the DAR for the project's Daml model and whether it must be
+    built, or return None if there is no Daml model.
+    """
+    daml_yaml = load_daml_yaml()
+
+    if daml_yaml is None:
         LOG.info(f"No Daml model found, skipping DAR build.")
         return None
 
@@ -180,36 +587,76 @@ def build_dar(
 
     dar_filename = f"{base_filename}-{dar_version}.dar"
 
-    compile_dar = True
+    inputs_digest = dar_input_digest(daml_yaml)
+
+    main_package_id = None
 
-    if os.path.exists(dar_filename):
-        if rebuild_dar:
+    if rebuild_dar:
+        if os.path.exists(dar_filename):
             LOG.warn(f">>>>> REPLACING EXISTING DAR: {dar_filename}.")
             os.remove(dar_filename)
-        else:
-            compile_dar = False
-            LOG.info(f"Retaining existing DAR: {dar_filename}.")
+    else:
+        main_package_id = is_dar_current(dar_filename, inputs_digest)
+
+    return DarPlan(
+        name=catalog.name,
+        version=dar_version,
+        filename=dar_filename,
+        inputs_digest=inputs_digest,
+        main_package_id=main_package_id,
+    )
+
 
-    if compile_dar:
-        LOG.info(f"Building DAR file: {dar_filename}")
+def complete_dar(plan: "DarPlan") -> "Tuple[str, DamlModelInfo]":
+    main_package_id = plan.main_package_id
 
-        completed = subprocess.run(["daml", "build", "-o", dar_filename])
+    if main_package_id:
+        LOG.info(f"Daml sources unchanged, retaining existing DAR: {plan.filename}.")
+    else:
+        LOG.info(f"Building DAR file: {plan.filename}")
+
+        with span("dar.build"):
+            completed = subprocess.run(["daml", "build", "-o", plan.filename])
 
         if completed.returncode != 0:
             die(f"Error building DAR file, rc={completed.returncode}")
 
-    main_package_id = get_dar_main_package_id(dar_filename)
+        with span("dar.inspect"):
+            main_package_id = get_dar_main_package_id(plan.filename)
+
+        with span("dar.manifest"):
+            write_dar_manifest(plan.filename, plan.inputs_digest, main_package_id)
 
     daml_model_info = DamlModelInfo(
-        name=catalog.name, version=dar_version, main_package_id=main_package_id
+        name=plan.name, version=plan.version, main_package_id=main_package_id
     )
 
     LOG.info("Main package ID: %r", main_package_id)
 
-    return (dar_filename, daml_model_info)
+    return (plan.filename, daml_model_info)
+
+
+def build_dar(
+    dabl_meta: "PackageMetadata", rebuild_dar: bool
+) -> "Optional[Tuple[str, DamlModelInfo]]":
+    plan = plan_dar(dabl_meta, rebuild_dar)
+
+    return None if plan is None else complete_dar(plan)
 
 
 def get_dar_main_package_id(dar_filename: str) -> str:
+    try:
+        return read_dar(dar_filename).main_package_id
+    except DarFormatError as e:
+        LOG.warn(
+            f"Unable to read DAR directly ({e}), falling back to"
+            f" 'daml damlc inspect-dar'."
+        )
+
+    return inspect_dar_main_package_id(dar_filename)
+
+
+def inspect_dar_main_package_id(dar_filename: str) -> str:
     completed = subprocess.run(
         ["daml", "damlc", "inspect-dar", "--json", dar_filename],
         capture_output=True,
@@ -237,51 +684,266 @@ def get_dar_main_package_id(dar_filename: str) -> str:
     return main_package_id
 
 
-def subcommand_main(
+def assemble_dit(
+    tmp_filename: str,
+    dabl_meta: "PackageMetadata",
+    integration_runtime: str,
+    daml_model_info: "Optional[DamlModelInfo]",
+    dar_filename: "Optional[str]",
+    add_subdeployments: "Sequence[str]",
+    pkg_members: "PrecompressedFiles",
+    policy: "CompressionPolicy",
+    keep_members: bool = False,
+) -> "Tuple[List[str], Set[str], CompressionStats]":
+    """
+    Add the package resources and normalized metadata to the DIT file,
+    returning its subdeployments, resource files and compression stats.
+    With keep_members, the package files are left open for another DIT.
+    """
+    # Subdeployments added on the command line may also be named in the
+    # project metadata, as they are in workspace builds.
+    subdeployments = list(
+        dict.fromkeys(
+            [
+                *(dabl_meta.subdeployments or []),
+                *[os.path.basename(sd_filename) for sd_filename in add_subdeployments],
+            ]
+        )
+    )
+
+    icon_file = None if dabl_meta.catalog is None else dabl_meta.catalog.icon_file
+
+    resource_files = set()
+
+    compression_stats = CompressionStats()
+
+    LOG.info("Enriching output DIT file...")
+    with ZipFile(tmp_filename, "a") as pexfile:
+        members = pex_members(pexfile)
+
+        if len(pkg_members):
+            pkg_bytes = 0
+
+            # Package files are compressed in parallel, starting with the
+            # build and continuing ahead of the members being written, so
+            # this includes waiting on any still in progress.
+            with span("dit.pkg", files=len(pkg_members)):
+                for member in pkg_members.members(keep_members):
+                    resource_files.add(member.zinfo.filename)
+                    pkg_bytes += member.zinfo.file_size
+
+                    LOG.debug(
+                        f"  Adding package file: {member.zinfo.filename},"
+                        f" len=={member.zinfo.file_size}"
+                    )
+                    pex_write_precompressed(
+                        pexfile, members, member, compression_stats, keep_members
+                    )
+
+            LOG.info(f"  Added {len(pkg_members)} package file(s), len=={pkg_bytes}")
+        else:
+            LOG.info("No pkg directory found, not adding any resources.")
+
+        for sd_filename in add_subdeployments:
+            arcname = os.path.basename(sd_filename)
+            resource_files.add(arcname)
+            LOG.info(f"  Adding package file: {sd_filename} as {arcname}")
+            pex_write(
+                pexfile, members, sd_filename, policy, compression_stats, arcname=arcname
+            )
+
+        if icon_file and os.path.isfile(icon_file):
+            pex_write(pexfile, members, icon_file, policy, compression_stats)
+            resource_files.add(icon_file)
+
+        if dar_filename:
+            pex_write(pexfile, members, dar_filename, policy, compression_stats)
+            resource_files.add(dar_filename)
+
+            subdeployments = [*subdeployments, dar_filename]
+
+        dabl_meta = replace(
+            dabl_meta,
+            catalog=replace(dabl_meta.catalog, release_date=date.today())
+            if dabl_meta.catalog is not None
+            else None,
+            daml_model=daml_model_info,
+            subdeployments=subdeployments,
+            integration_types=[
+                normalize_integration_type(ittype, integration_runtime, daml_model_info)
+                for ittype in (dabl_meta.integration_types or [])
+            ],
+        )
+
+        # Write metadata under two names to account for both old and new
+        # conventions.
+        yaml_filebytes = package_meta_yaml(dabl_meta)
+        pex_writestr(pexfile, members, DIT_META_NAME, yaml_filebytes, policy)
+        pex_writestr(pexfile, members, DABL_META_NAME, yaml_filebytes, policy)
+
+    return (subdeployments, resource_files, compression_stats)
+
+
+def restamp_dit(dit_filename: str, policy: "CompressionPolicy") -> "Optional[bool]":
+    """
+    Stamp today's release date into the metadata of a DIT file, which
+    assemble_dit writes as its last two members. The metadata members are
+    truncated from the archive and rewritten in place. Returns whether
+    the DIT was modified, or None if its metadata is not where expected.
+    """
+    with ZipFile(dit_filename, "a") as pexfile:
+        meta_infos = pexfile.infolist()[-2:]
+
+        if [info.filename for info in meta_infos] != [DIT_META_NAME, DABL_META_NAME]:
+            return None
+
+        dabl_meta = accept_dabl_meta_bytes(pexfile.read(DABL_META_NAME))
+
+        if dabl_meta.catalog is None or dabl_meta.catalog.release_date == date.today():
+            return False
+
+        dabl_meta = replace(
+            dabl_meta, catalog=replace(dabl_meta.catalog, release_date=date.today())
+        )
+
+        # Appends start at the first of the removed members, overwriting
+        # them. The central directory is rewritten after the new members
+        # when the archive is closed, and the file truncated there.
+        for info in meta_infos:
+            pexfile.filelist.remove(info)
+            del pexfile.NameToInfo[info.filename]
+
+        pexfile.start_dir = min(info.header_offset for info in meta_infos)
+
+        members = {info.filename for info in pexfile.infolist()}
+
+        yaml_filebytes = package_meta_yaml(dabl_meta)
+        pex_writestr(pexfile, members, DIT_META_NAME, yaml_filebytes, policy)
+        pex_writestr(pexfile, members, DABL_META_NAME, yaml_filebytes, policy)
+
+    return True
+
+
+def reuse_cached_dit(dit_key: str, dit_filename: str, policy: "CompressionPolicy") -> bool:
+    """
+    Copy a DIT file built from the same inputs from the build cache. The
+    cached DIT is keyed on its inputs alone, so it is re-stamped with the
+    current release date as it is reused.
+    """
+    with span("dit.cache_lookup"):
+        cached = lookup_artifact(DIT_CACHE_KIND, dit_key)
+
+    if not cached:
+        return False
+
+    (artifact_path, info) = cached
+
+    with span("dit.cache_copy"):
+        if not copy_from_cache(artifact_path, dit_filename, info["artifact_hash"]):
+            return False
+
+    with span("dit.restamp"):
+        restamped = restamp_dit(dit_filename, policy)
+
+    if restamped is None:
+        LOG.warn(f"Cached DIT file has unexpected metadata, ignoring: {artifact_path}")
+        os.remove(dit_filename)
+        return False
+
+    artifact_hash = info["artifact_hash"]
+
+    if restamped:
+        # Stored again, so later builds today reuse it without re-stamping.
+        artifact_hash = store_artifact(DIT_CACHE_KIND, dit_key, dit_filename, {}) or (
+            artifact_file_hash(dit_filename)
+        )
+
+    LOG.info(f"Build inputs unchanged, reused cached DIT file: {dit_filename}")
+    LOG.info("Artifact hash: %r", artifact_hash)
+
+    return True
+
+
+@dataclass
+class DitVariant:
+    """
+    One of the DIT files written by a build, with its build target.
+    """
+
+    target: "BuildTarget"
+    dit_filename: str
+    tmp_filename: str
+    dit_key: str = ""
+
+
+@contextmanager
+def removing_files(filenames: "Sequence[str]") -> "Iterator[None]":
+    """
+    Remove any of the files that exist when the block exits, such as the
+    temporary files of a failed build.
+    """
+    try:
+        yield
+    finally:
+        for filename in filenames:
+            if os.path.exists(filename):
+                LOG.debug(f"Removing temporary file: {filename}")
+                os.remove(filename)
+
+
+def build_project(
     force_integration: bool,
     force: bool,
     skip_dar_build: bool,
     rebuild_dar: bool,
     local_only: bool,
     add_subdeployments: "Sequence[str]",
+    use_cache: bool = True,
+    store_patterns: "Sequence[str]" = (),
+    compress_levels: "Sequence[str]" = (),
+    fast_compression: bool = False,
+    sources: "PackageSources" = DEFAULT_SOURCES,
+    slim: bool = False,
+    slim_excludes: "Sequence[str]" = (),
+    slim_keeps: "Sequence[str]" = (),
+    size_budget: "Optional[str]" = None,
+    pex_layout: str = DEFAULT_PEX_LAYOUT,
+    platforms: "Sequence[str]" = (),
 ):
-    dabl_meta = load_dabl_meta()
+    with span("metadata"):
+        dabl_meta = load_dabl_meta()
 
     integration_types = package_meta_integration_types(dabl_meta)
 
-    base_filename = package_dit_basename(dabl_meta)
+    targets = build_targets(platforms, local_only)
 
-    tmp_filename = f"{base_filename}.tmp"
+    base_filename = package_dit_basename(dabl_meta)
 
-    dit_filename = package_dit_filename(dabl_meta)
+    variants = [
+        DitVariant(
+            target=target,
+            dit_filename=target_dit_filename(dabl_meta, target, len(targets) == 1),
+            tmp_filename=(
+                f"{base_filename}.tmp"
+                if len(targets) == 1
+                else f"{base_filename}-{target.name}.tmp"
+            ),
+        )
+        for target in targets
+    ]
 
-    if os.path.exists(tmp_filename):
-        LOG.warn(f"Deleting temporary file: {tmp_filename}")
-        os.remove(tmp_filename)
+    for variant in variants:
+        if os.path.exists(variant.tmp_filename):
+            LOG.warn(f"Deleting temporary file: {variant.tmp_filename}")
+            os.remove(variant.tmp_filename)
 
-    check_target_file(dit_filename, force)
+        check_target_file(variant.dit_filename, force)
 
     for sd_filename in add_subdeployments:
         if not os.path.exists(sd_filename):
             die(f"Additional subdeployment file not found to be added: {sd_filename}")
 
-    LOG.info(f"Building {dit_filename}")
-
-    daml_model_info = None
-
-    if skip_dar_build:
-        LOG.info(
-            "Skipping DAR build (--skip-dar-build specified, no Daml model"
-            " information will be availble in build.)"
-        )
-        dar_filename = None
-    else:
-        dar_build_result = build_dar(dabl_meta, rebuild_dar)
-
-        if dar_build_result:
-            (dar_filename, daml_model_info) = dar_build_result
-
-    integration_runtime = "python-direct"
+    LOG.info(f"Building {', '.join(variant.dit_filename for variant in variants)}")
 
     is_integration = len(integration_types) > 0
 
@@ -290,7 +952,6 @@ def subcommand_main(
             "Integration types found in project - building as integration."
             " Authorization will be required to install in Daml Hub."
         )
-        integration_runtime = build_pex(tmp_filename, local_only)
 
     elif local_only:
         die(
@@ -298,66 +959,190 @@ def subcommand_main(
             f" integration types defined in project.)"
         )
 
+    elif targets != [BuildTarget(PLATFORM_HUB)]:
+        die(
+            f"--platform may just be used on integration builds. (Builds with"
+            f" integration types defined in project.)"
+        )
+
     if force_integration and not is_integration:
         die(f"--integration build specified with no integration types defined.")
 
-    subdeployments = [
-        *(dabl_meta.subdeployments or []),
-        *[os.path.basename(sd_filename) for sd_filename in add_subdeployments],
-    ]
+    if fast_compression and not all(target.local_only for target in targets):
+        die("--fast-compression may only be used on --local-only builds.")
 
-    icon_file = None if dabl_meta.catalog is None else dabl_meta.catalog.icon_file
+    policy = compression_policy(store_patterns, compress_levels, fast_compression)
 
-    resource_files = set()
+    slim_rules = slim_policy(slim, slim_excludes, slim_keeps)
 
-    LOG.info("Enriching output DIT file...")
-    with ZipFile(tmp_filename, "a") as pexfile:
-        if os.path.isdir("pkg"):
-            for pkg_filename in os.listdir("pkg"):
-                resource_files.add(pkg_filename)
-                file_bytes = Path(f"pkg/{pkg_filename}").read_bytes()
+    budget = None
+
+    if size_budget is not None:
+        budget = parse_size(size_budget)
+
+        if budget is None:
+            die(f"Invalid --size-budget (expected a size such as 512K or 20M): {size_budget}")
+
+    if skip_dar_build:
+        LOG.info(
+            "Skipping DAR build (--skip-dar-build specified, no Daml model"
+            " information will be availble in build.)"
+        )
 
-                LOG.info(
-                    f"  Adding package file: {pkg_filename}, len=={len(file_bytes)}"
+    with span("dar.plan"):
+        dar_plan = None if skip_dar_build else plan_dar(dabl_meta, rebuild_dar)
+
+    def reuse_cached_dits(
+        candidates: "List[DitVariant]",
+        daml_model_info: "Optional[DamlModelInfo]",
+        dar_filename: "Optional[str]",
+    ) -> "List[DitVariant]":
+        """
+        Compute each variant's DIT cache key, and return the variants that
+        could not be reused from the cache.
+        """
+        pending = []
+
+        for variant in candidates:
+            with span("dit.digest", platform=variant.target.name):
+                variant.dit_key = dit_input_digest(
+                    dabl_meta,
+                    daml_model_info,
+                    dar_filename,
+                    add_subdeployments,
+                    is_integration,
+                    variant.target.platform_id,
+                    policy,
+                    slim_rules,
+                    pex_layout,
                 )
-                pex_writestr(pexfile, pkg_filename, file_bytes)
-        else:
-            LOG.info("No pkg directory found, not adding any resources.")
 
-        for sd_filename in add_subdeployments:
-            arcname = os.path.basename(sd_filename)
-            resource_files.add(arcname)
-            LOG.info(f"  Adding package file: {sd_filename} as {arcname}")
-            pex_write(pexfile, sd_filename, arcname=arcname)
+            if use_cache and reuse_cached_dit(variant.dit_key, variant.dit_filename, policy):
+                check_size_budget(variant.dit_filename, budget)
+            else:
+                pending.append(variant)
 
-        if icon_file and os.path.isfile(icon_file):
-            pex_write(pexfile, icon_file)
-            resource_files.add(icon_file)
+        return pending
 
-        if dar_filename:
-            pex_write(pexfile, dar_filename)
-            resource_files.add(dar_filename)
+    pending = variants
 
-            subdeployments = [*subdeployments, dar_filename]
+    if dar_plan is None or not dar_plan.needs_build:
+        # With no DAR to build, the DIT cache can be checked before
+        # starting any other work.
+        (dar_filename, daml_model_info) = (
+            (None, None) if dar_plan is None else complete_dar(dar_plan)
+        )
 
-        dabl_meta = replace(
-            dabl_meta,
-            catalog=replace(dabl_meta.catalog, release_date=date.today())
-            if dabl_meta.catalog is not None
-            else None,
-            daml_model=daml_model_info,
-            subdeployments=subdeployments,
-            integration_types=[
-                normalize_integration_type(ittype, integration_runtime, daml_model_info)
-                for ittype in (dabl_meta.integration_types or [])
-            ],
+        pending = reuse_cached_dits(variants, daml_model_info, dar_filename)
+
+        if not pending:
+            return
+
+    pkg_files = collect_tree(PKG_DIR) if os.path.isdir(PKG_DIR) else []
+
+    # The DAR build, the PEX builds and compression of the package files
+    # share no inputs, so they run concurrently, and assembly of each DIT
+    # waits on all three. PEX files for different platforms resolve and
+    # build concurrently, sharing the download, resolve and bytecode
+    # caches. When a DAR is built, the DIT cache keys are only known once
+    # the DAR is complete.
+    stage_workers = 1 + len(pending)
+
+    # Temporary files are removed once the executors have shut down, so
+    # none is written by a stage still running when the build fails.
+    with removing_files(
+        [variant.tmp_filename for variant in pending]
+    ), ThreadPoolExecutor(stage_workers) as stage_executor, ThreadPoolExecutor() as executor:
+        dar_future = (
+            stage_executor.submit(complete_dar, dar_plan)
+            if dar_plan is not None and dar_plan.needs_build
+            else None
         )
 
-        # Write metadata under two names to account for both old and new
-        # conventions.
-        yaml_filebytes = package_meta_yaml(dabl_meta)
-        pex_writestr(pexfile, DIT_META_NAME, filebytes=yaml_filebytes)
-        pex_writestr(pexfile, DABL_META_NAME, filebytes=yaml_filebytes)
+        pex_futures = {
+            variant.target: stage_executor.submit(
+                build_pex,
+                variant.tmp_filename,
+                variant.target,
+                use_cache,
+                sources,
+                slim_rules,
+                pex_layout,
+            )
+            for variant in pending
+            if is_integration
+        }
+
+        pkg_members = PrecompressedFiles(pkg_files, policy, executor)
+
+        try:
+            if dar_future:
+                (dar_filename, daml_model_info) = dar_future.result()
+
+                remaining = reuse_cached_dits(pending, daml_model_info, dar_filename)
+
+                for variant in pending:
+                    if variant not in remaining and variant.target in pex_futures:
+                        pex_futures.pop(variant.target).result()
+
+                pending = remaining
+
+                if not pending:
+                    return
+
+            for (index, variant) in enumerate(pending):
+                pex_future = pex_futures.get(variant.target)
+
+                integration_runtime = pex_future.result() if pex_future else "python-direct"
+
+                with span("dit.assemble", platform=variant.target.name):
+                    (subdeployments, resource_files, compression_stats) = assemble_dit(
+                        variant.tmp_filename,
+                        dabl_meta,
+                        integration_runtime,
+                        daml_model_info,
+                        dar_filename,
+                        add_subdeployments,
+                        pkg_members,
+                        policy,
+                        keep_members=index < len(pending) - 1,
+                    )
+
+                complete_dit(
+                    variant,
+                    dabl_meta,
+                    subdeployments,
+                    resource_files,
+                    compression_stats,
+                    use_cache,
+                    budget,
+                )
+        except BaseException:
+            # Stages not yet started are cancelled; those running are
+            # waited on as the executors shut down.
+            for future in pex_futures.values():
+                future.cancel()
+
+            raise
+        finally:
+            pkg_members.close()
+
+
+def complete_dit(
+    variant: "DitVariant",
+    dabl_meta: "PackageMetadata",
+    subdeployments: "Sequence[str]",
+    resource_files: "Set[str]",
+    compression_stats: "CompressionStats",
+    use_cache: bool,
+    budget: "Optional[int]",
+):
+    """
+    Check an assembled DIT file, move it into place, and cache it.
+    """
+    LOG.info("Compression: %s", compression_stats.summary())
+
+    icon_file = None if dabl_meta.catalog is None else dabl_meta.catalog.icon_file
 
     for subdeployment in subdeployments:
         if subdeployment not in resource_files:
@@ -368,11 +1153,156 @@ def subcommand_main(
     if icon_file and icon_file not in resource_files:
         die(f"Icon {icon_file} not available in DIT file resources: {resource_files}")
 
-    os.rename(tmp_filename, dit_filename)
+    # Checked before the DIT is moved into place or cached, so a DIT over
+    # budget is neither left behind nor reused by a later build.
+    check_size_budget(variant.tmp_filename, budget, variant.dit_filename)
 
-    dit_file_contents = read_binary_file(dit_filename)
+    os.rename(variant.tmp_filename, variant.dit_filename)
 
-    LOG.info("Artifact hash: %r", artifact_hash(dit_file_contents))
+    # When caching, the artifact hash is computed in the same pass that
+    # copies the DIT into the cache, rather than by reading it again.
+    dit_hash = None
+
+    if use_cache:
+        with span("dit.cache_store"):
+            dit_hash = store_artifact(DIT_CACHE_KIND, variant.dit_key, variant.dit_filename, {})
+
+    if dit_hash is None:
+        with span("dit.hash"):
+            dit_hash = artifact_file_hash(variant.dit_filename)
+
+    LOG.info("Artifact hash: %r", dit_hash)
+
+
+def check_size_budget(
+    filename: str, budget: "Optional[int]", dit_filename: "Optional[str]" = None
+):
+    """
+    Fail the build if a DIT file (at filename, to be moved to dit_filename)
+    is over the size budget. The file is removed, after its largest
+    contributors are logged.
+    """
+    if budget is None:
+        return
+
+    dit_filename = dit_filename or filename
+
+    size = os.path.getsize(filename)
+
+    if size <= budget:
+        LOG.info(f"DIT size {format_bytes(size)} is within budget of {format_bytes(budget)}")
+        return
+
+    try:
+        LOG.error(
+            "Largest contributors to DIT size:\n%s", size_table(dit_size_breakdown(filename), 10)
+        )
+    finally:
+        os.remove(filename)
+
+    die(
+        f"DIT file {dit_filename} is {format_bytes(size)}, over the size budget of"
+        f" {format_bytes(budget)}, and was not written."
+    )
+
+
+def watch_project(build_args: "Dict[str, Any]"):
+    """
+    Build the project, and then build it again whenever its inputs change.
+    Stages with unchanged inputs are reused from the build cache, and
+    metadata and resolved dependencies from memory. Failed builds are
+    reported, and the next change triggers another attempt.
+    """
+    from .watch import ProjectWatcher
+
+    watcher = ProjectWatcher()
+
+    while True:
+        try:
+            build_project(**build_args)
+        except SystemExit:
+            LOG.error("Build failed.")
+        except Exception:
+            LOG.exception("Build failed.")
+
+        # Later builds replace the DIT file written by the first.
+        build_args = {**build_args, "force": True}
+
+        LOG.info("Watching for changes (Ctrl-C to stop)...")
+
+        watcher.wait()
+
+
+def subcommand_main(
+    workspace: "Optional[str]" = None,
+    jobs: "Optional[int]" = None,
+    watch: bool = False,
+    wheelhouse: "Optional[str]" = None,
+    offline: bool = False,
+    **build_args,
+):
+    build_args["sources"] = PackageSources.from_args(wheelhouse, offline)
+
+    if workspace is None:
+        if watch:
+            try:
+                watch_project(build_args)
+            except KeyboardInterrupt:
+                LOG.info("Stopped watching.")
+        else:
+            build_project(**build_args)
+
+        return
+
+    if build_args.get("add_subdeployments"):
+        die("--subdeployment may not be used with --workspace.")
+
+    if watch:
+        die("--watch may not be used with --workspace.")
+
+    # Imported here, as workspace builds run project builds in worker
+    # processes that import this module.
+    from .workspace import build_workspace
+
+    build_workspace(workspace, jobs, build_project, build_args)
+
+
+def dit_input_digest(
+    dabl_meta: "PackageMetadata",
+    daml_model_info: "Optional[DamlModelInfo]",
+    dar_filename: "Optional[str]",
+    add_subdeployments: "Sequence[str]",
+    is_integration: bool,
+    platform_id: str,
+    policy: "CompressionPolicy",
+    slim: "Optional[SlimPolicy]" = None,
+    pex_layout: str = DEFAULT_PEX_LAYOUT,
+) -> str:
+    digest = InputDigest(DIT_CACHE_KIND)
+
+    digest.add_str("compression", repr(policy))
+
+    # The release date stamped into the output metadata is not an input:
+    # cached DIT files are re-stamped as they are reused.
+    digest.add_str("metadata", package_meta_yaml(dabl_meta))
+    digest.add_str("daml_model", repr(daml_model_info))
+
+    if is_integration:
+        digest.add_str("pex", pex_input_digest(platform_id, slim, pex_layout))
+
+    digest.add_tree("pkg", PKG_DIR)
+
+    for sd_filename in add_subdeployments:
+        digest.add_file(f"subdeployment:{os.path.basename(sd_filename)}", sd_filename)
+
+    icon_file = None if dabl_meta.catalog is None else dabl_meta.catalog.icon_file
+    if icon_file:
+        digest.add_file(f"icon:{icon_file}", icon_file)
+
+    if dar_filename:
+        digest.add_file(f"dar:{dar_filename}", dar_filename)
+
+    return digest.hexdigest()
 
 
 def normalize_integration_type(
@@ -395,6 +1325,9 @@ def normalize_integration_type(
     }
 
     if itype.instance_template:
+        from dazl.damlast.lookup import parse_type_con_name
+        from dazl.damlast.util import package_ref
+
         if daml_model_info is None:
             # This could be fixed by adding another option to
             # explicitly bind a Daml model even when ddit is not
@@ -448,7 +1381,7 @@ def setup(sp):
 
     sp.add_argument(
         "--rebuild-dar",
-        help="Rebuild and overwrite the DAR if it already exists",
+        help="Rebuild and overwrite the DAR even if its Daml sources are unchanged",
         dest="rebuild_dar",
         action="store_true",
         default=False,
@@ -456,12 +1389,20 @@ def setup(sp):
 
     sp.add_argument(
         "--local-only",
-        help="Build a local-only DIT that will not run in cluster.",
+        help="Build a local-only DIT that will not run in cluster. An alias for --platform local.",
         dest="local_only",
         action="store_true",
         default=False,
     )
 
+    add_platform_arguments(
+        sp,
+        "Platform to build the integration for",
+        f"Defaults to {PLATFORM_HUB}. A DIT is built for each platform in one run; the"
+        f" {PLATFORM_HUB} DIT keeps the usual filename, and the others are suffixed"
+        " with their platform.",
+    )
+
     sp.add_argument(
         "--subdeployment",
         help="Add one or more subdeployments, by name, to the DIT file.",
@@ -470,4 +1411,111 @@ def setup(sp):
         default=[],
     )
 
+    sp.add_argument(
+        "--store",
+        help="Store files matching a glob pattern without compression. Already"
+        " compressed types (DARs, DITs, wheels, images, etc.) are stored by default.",
+        dest="store_patterns",
+        action="append",
+        default=[],
+    )
+
+    sp.add_argument(
+        "--compress-level",
+        help="Set the deflate level (0-9, 0 to store) for files matching a glob,"
+        " as GLOB=LEVEL. May be repeated, the first matching pattern applies.",
+        dest="compress_levels",
+        action="append",
+        default=[],
+    )
+
+    sp.add_argument(
+        "--slim",
+        help="Exclude files not needed at runtime (tests, type stubs, stray bytecode,"
+        " Cython sources) from bundled dependencies and sources.",
+        dest="slim",
+        action="store_true",
+        default=False,
+    )
+
+    sp.add_argument(
+        "--slim-exclude",
+        help="Also exclude files matching a glob pattern from bundled dependencies"
+        " and sources. May be repeated, implies --slim.",
+        dest="slim_excludes",
+        action="append",
+        default=[],
+    )
+
+    sp.add_argument(
+        "--slim-keep",
+        help="Keep files matching a glob pattern that --slim would exclude. May be repeated.",
+        dest="slim_keeps",
+        action="append",
+        default=[],
+    )
+
+    sp.add_argument(
+        "--size-budget",
+        help="Fail the build if the DIT file is larger than this size (such as 512K or 20M).",
+        dest="size_budget",
+        action="store",
+        default=None,
+    )
+
+    sp.add_argument(
+        "--pex-layout",
+        help=f"Layout of the bundled PEX file (default: {DEFAULT_PEX_LAYOUT}). 'startup'"
+        " stores members uncompressed and precompiles bundled dependencies, for a faster"
+        " first start at the cost of a larger DIT file.",
+        dest="pex_layout",
+        choices=PEX_LAYOUTS,
+        default=DEFAULT_PEX_LAYOUT,
+    )
+
+    sp.add_argument(
+        "--fast-compression",
+        help="Favor build speed over DIT size for --local-only builds.",
+        dest="fast_compression",
+        action="store_true",
+        default=False,
+    )
+
+    sp.add_argument(
+        "--no-cache",
+        help="Rebuild all outputs, ignoring and bypassing the build cache.",
+        dest="use_cache",
+        action="store_false",
+        default=True,
+    )
+
+    add_package_source_arguments(sp)
+
+    sp.add_argument(
+        "--watch",
+        help="Rebuild whenever the project's sources, resources, Daml model,"
+        " dependencies or metadata change.",
+        dest="watch",
+        action="store_true",
+        default=False,
+    )
+
+    sp.add_argument(
+        "--workspace",
+        help="Build every ddit project beneath a workspace directory (the current"
+        " directory by default), ordered by their subdeployments.",
+        dest="workspace",
+        nargs="?",
+        const=".",
+        default=None,
+    )
+
+    sp.add_argument(
+        "--jobs",
+        help="Number of workspace projects to build in parallel (default: CPU count).",
+        dest="jobs",
+        type=int,
+        default=None,
+    )
+
     return subcommand_main
@@ -8,9 +8,15 @@ from typing import Optional
 from .common import VIRTUAL_ENV_DIR, die, load_dabl_meta, package_dit_filename
 from .log import LOG
 
+SECONDS_PER_DAY = 24 * 60 * 60
 
-def subcommand_main():
-    if os.path.isdir(VIRTUAL_ENV_DIR):
+
+def clean_project():
+    # The virtual environment is normally a link to a shared environment
+    # in the user-level cache, which is left in place.
+    if os.path.islink(VIRTUAL_ENV_DIR):
+        os.remove(VIRTUAL_ENV_DIR)
+    elif os.path.isdir(VIRTUAL_ENV_DIR):
         shutil.rmtree(VIRTUAL_ENV_DIR)
 
     target_file = package_dit_filename(load_dabl_meta())
@@ -19,5 +25,73 @@ def subcommand_main():
         os.remove(target_file)
 
 
+def clean_cache(max_age_days: "Optional[float]"):
+    # The build modules are only needed here, and are imported here to
+    # keep the project clean fast.
+    from .build_config import DIT_CACHE_KIND, PEX_CACHE_KIND
+    from .bytecode import BYTECODE_CACHE_KIND
+    from .cache import cache_root, evict_cache_entries
+    from .lockfile import RESOLVE_CACHE_KIND, WHEEL_STORE_KIND
+    from .timing import format_bytes
+
+    # Virtual environments, and the installed packages they link to, are
+    # evicted by 'ddit install' as it creates them, and are left in place.
+    kinds = [
+        DIT_CACHE_KIND,
+        PEX_CACHE_KIND,
+        BYTECODE_CACHE_KIND,
+        WHEEL_STORE_KIND,
+        RESOLVE_CACHE_KIND,
+    ]
+
+    max_age = 0.0 if max_age_days is None else max_age_days * SECONDS_PER_DAY
+
+    (total_entries, total_bytes) = (0, 0)
+
+    for kind in kinds:
+        (removed, removed_bytes) = evict_cache_entries(kind, max_age=max_age)
+
+        if removed:
+            LOG.info(f"  Removed {removed} {kind} entries, {format_bytes(removed_bytes)}")
+
+        total_entries += removed
+        total_bytes += removed_bytes
+
+    LOG.info(
+        f"Removed {total_entries} build cache entries, {format_bytes(total_bytes)},"
+        f" from {cache_root()}"
+    )
+
+
+def subcommand_main(cache: bool, max_age_days: "Optional[float]"):
+    if max_age_days is not None and not cache:
+        die("--max-age may only be used with --cache.")
+
+    if max_age_days is not None and max_age_days < 0:
+        die("--max-age must not be negative.")
+
+    if cache:
+        clean_cache(max_age_days)
+    else:
+        clean_project()
+
+
 def setup(sp):
+    sp.add_argument(
+        "--cache",
+        help="Clean the user-level build cache (built DIT and PEX files, bytecode,"
+        " downloaded dependencies), rather than the project.",
+        dest="cache",
+        action="store_true",
+        default=False,
+    )
+
+    sp.add_argument(
+        "--max-age",
+        help="With --cache, only remove entries not used for this many days.",
+        dest="max_age_days",
+        type=float,
+        default=None,
+    )
+
     return subcommand_main
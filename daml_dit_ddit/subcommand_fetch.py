@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Sequence
+
+from .build_config import (
+    PLATFORM_HUB,
+    PLATFORM_LOCAL,
+    BuildTarget,
+    add_platform_arguments,
+    build_targets,
+)
+from .cache import cache_dir
+from .common import PYTHON_REQUIREMENT_FILE, die
+from .lockfile import (
+    RESOLVE_CACHE_KIND,
+    SDIST_EXTENSIONS,
+    download_distributions,
+    ensure_locked_distributions,
+    locked_distributions,
+    wheel_store_path,
+)
+from .log import LOG
+from .package_store import link_file
+from .venv_cache import VenvSpec
+
+DEFAULT_WHEELHOUSE = "wheelhouse"
+
+
+def fetch_platform(target: "BuildTarget", requirements: "Sequence[str]" = ()) -> "List[str]":
+    """
+    Fetch the project's dependencies for a build target (the locked
+    versions, if there are any), along with requirements, into the wheel
+    store. Returns their paths in the store.
+    """
+    (platform, platform_id) = (target.platform(), target.platform_id)
+
+    paths = []
+
+    locked_dists = locked_distributions(platform_id)
+
+    if locked_dists is not None:
+        LOG.info(f"Fetching locked dependencies for {platform_id}...")
+        paths += ensure_locked_distributions(platform, locked_dists)
+    elif os.path.isfile(PYTHON_REQUIREMENT_FILE):
+        LOG.info(f"Fetching dependencies from {PYTHON_REQUIREMENT_FILE} for {platform_id}...")
+        dists = download_distributions(platform, requirement_files=[PYTHON_REQUIREMENT_FILE])
+        paths += [wheel_store_path(dist) for dist in dists]
+
+    if requirements:
+        LOG.info(f"Fetching {', '.join(requirements)} for {platform_id}...")
+        dists = download_distributions(platform, requirements=requirements)
+        paths += [wheel_store_path(dist) for dist in dists]
+
+    return paths
+
+
+def build_wheels(sdist_paths: "Sequence[str]", wheelhouse: str) -> int:
+    """
+    Build wheels for the current platform from source distributions, so
+    that installs from the wheelhouse need no build dependencies. Returns
+    the number of wheels added to the wheelhouse.
+    """
+    from pex.interpreter import PythonInterpreter
+    from pex.jobs import Job
+    from pex.pip import spawn_build_wheels
+
+    LOG.info(f"Building {len(sdist_paths)} wheel(s) from source distributions...")
+
+    with tempfile.TemporaryDirectory(prefix="ddit-wheels-") as wheel_dir:
+        job = spawn_build_wheels(
+            list(sdist_paths),
+            wheel_dir,
+            interpreter=PythonInterpreter.get(),
+            cache=cache_dir(RESOLVE_CACHE_KIND),
+        )
+
+        try:
+            job.wait()
+        except Job.Error as e:
+            die(f"Error building wheels: {e}")
+
+        added = 0
+
+        for filename in os.listdir(wheel_dir):
+            target_path = os.path.join(wheelhouse, filename)
+
+            if not os.path.exists(target_path):
+                shutil.move(os.path.join(wheel_dir, filename), target_path)
+                added += 1
+
+    return added
+
+
+def subcommand_main(
+    wheelhouse: str,
+    if_version: "Optional[str]" = None,
+    if_file: "Optional[str]" = None,
+    platforms: "Sequence[str]" = (),
+):
+    if if_version and if_file:
+        die("Cannot specify both --if-version and --if-file")
+
+    # Without --platform, dependencies are fetched for both Daml Hub builds
+    # and the local virtual environment.
+    targets = (
+        build_targets(platforms)
+        if platforms
+        else [BuildTarget(PLATFORM_HUB), BuildTarget(PLATFORM_LOCAL)]
+    )
+
+    if (if_version or if_file) and BuildTarget(PLATFORM_LOCAL) not in targets:
+        die(f"--if-version and --if-file may only be used with --platform {PLATFORM_LOCAL}.")
+
+    os.makedirs(wheelhouse, exist_ok=True)
+
+    paths = []
+
+    for target in targets:
+        # Daml Hub supplies daml-dit-if to integrations, so it is only
+        # fetched for the local virtual environment.
+        requirements = (
+            VenvSpec(if_version=if_version, if_file=if_file).install_args()
+            if target.local_only
+            else []
+        )
+
+        paths += fetch_platform(target, requirements)
+
+    sdist_paths = []
+    added = 0
+
+    for path in sorted(set(paths)):
+        if any(path.endswith(ext) for ext in SDIST_EXTENSIONS):
+            sdist_paths.append(path)
+            continue
+
+        target_path = os.path.join(wheelhouse, os.path.basename(path))
+
+        if not os.path.exists(target_path):
+            link_file(path, target_path)
+            added += 1
+
+    if sdist_paths:
+        added += build_wheels(sdist_paths, wheelhouse)
+
+    LOG.info(f"Added {added} distribution(s) to wheelhouse: {wheelhouse}")
+    LOG.info(f"Build or install offline with: --offline --wheelhouse {wheelhouse}")
+
+
+def setup(sp):
+    sp.add_argument(
+        "wheelhouse",
+        metavar="wheelhouse",
+        help=f"Directory to fill with wheels, defaults to {DEFAULT_WHEELHOUSE}.",
+        nargs="?",
+        default=DEFAULT_WHEELHOUSE,
+    )
+
+    sp.add_argument(
+        "--if-version",
+        help="Fetch a specific version of daml-dit-if.",
+        dest="if_version",
+        action="store",
+        default=None,
+    )
+
+    sp.add_argument(
+        "--if-file",
+        help="Fetch the dependencies of daml-dit-if from a specific file source.",
+        dest="if_file",
+        action="store",
+        default=None,
+    )
+
+    add_platform_arguments(
+        sp,
+        "Platform to fetch dependencies for",
+        f"Defaults to both {PLATFORM_HUB} and {PLATFORM_LOCAL}.",
+    )
+
+    return subcommand_main
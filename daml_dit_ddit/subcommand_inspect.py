@@ -1,38 +1,37 @@
 from __future__ import annotations
 
-import io
 import os
-from typing import Dict
 from zipfile import ZipFile
 
 from daml_dit_api import DIT_META_NAMES, PackageMetadata
 
-from .common import (
-    accept_dabl_meta_bytes,
-    artifact_hash,
-    die,
-    read_binary_file,
-    show_package_summary,
-)
+from .common import accept_dabl_meta_bytes, die, show_package_summary
+from .hashing import artifact_file_hash, artifact_stream_hash
 from .log import LOG
 
 
-def show_subdeployments(dabl_meta: "PackageMetadata", contents):
+def subdeployment_status(ditfile: "ZipFile", sd: str) -> str:
+    try:
+        ditfile.getinfo(sd)
+    except KeyError:
+        return "MISSING"
+
+    # Subdeployments are hashed as they are decompressed, rather than
+    # being read fully into memory.
+    with ditfile.open(sd) as sd_file:
+        (sd_hash, sd_len) = artifact_stream_hash(sd_file)
+
+    return f"{sd_len} bytes, {sd_hash}"
+
+
+def show_subdeployments(dabl_meta: "PackageMetadata", ditfile: "ZipFile"):
     subdeployments = dabl_meta.subdeployments
 
     if subdeployments is not None and len(subdeployments) > 0:
         print("\nSubdeployments:")
 
         for sd in subdeployments:
-            sd_data = contents.get(sd)
-
-            status = (
-                "MISSING"
-                if (sd_data is None)
-                else f"{len(sd_data)} bytes, {artifact_hash(sd_data)}"
-            )
-
-            print(f"   {sd} ({status})")
+            print(f"   {sd} ({subdeployment_status(ditfile, sd)})")
     else:
         print("\nSubdeployments: None")
 
@@ -41,39 +40,35 @@ def subcommand_main(dit_filename: str):
     if not os.path.exists(dit_filename):
         die(f"DIT file not found: {dit_filename}")
 
-    contents: Dict[str, bytes] = {}
-
-    dit_file_contents = read_binary_file(dit_filename)
-
-    print("Artifact hash: ", artifact_hash(dit_file_contents))
+    print("Artifact hash: ", artifact_file_hash(dit_filename))
     print()
 
-    with ZipFile(io.BytesIO(dit_file_contents), "r") as ditfile:
+    with ZipFile(dit_filename, "r") as ditfile:
         filenames = set(ditfile.namelist())
 
-        for zi in ditfile.infolist():
-            contents[zi.filename] = ditfile.read(zi)
+        dabl_meta = None
 
-    dabl_meta = None
+        for subfile_name in DIT_META_NAMES:
+            if subfile_name not in filenames:
+                continue
 
-    for subfile_name in DIT_META_NAMES:
-        meta_contents = contents.get(subfile_name)
+            meta_contents = ditfile.read(subfile_name)
 
-        if meta_contents:
-            if dabl_meta:
-                LOG.debug(
-                    f" Additional metadata subfile ignored: {subfile_name}. (This"
-                    f" is expected in DIT files built to be compatible with"
-                    f" both the old and new metadata filenames.)"
-                )
+            if meta_contents:
+                if dabl_meta:
+                    LOG.debug(
+                        f" Additional metadata subfile ignored: {subfile_name}. (This"
+                        f" is expected in DIT files built to be compatible with"
+                        f" both the old and new metadata filenames.)"
+                    )
 
-            dabl_meta = accept_dabl_meta_bytes(contents[subfile_name])
+                dabl_meta = accept_dabl_meta_bytes(meta_contents)
 
-    if dabl_meta is None:
-        die(f"DIT file missing metadata ({DIT_META_NAMES[0]} missing): {dit_filename}")
+        if dabl_meta is None:
+            die(f"DIT file missing metadata ({DIT_META_NAMES[0]} missing): {dit_filename}")
 
-    show_package_summary(dabl_meta)
-    show_subdeployments(dabl_meta, contents)
+        show_package_summary(dabl_meta)
+        show_subdeployments(dabl_meta, ditfile)
 
 
 def setup(sp):
@@ -1,27 +1,27 @@
 from __future__ import annotations
 
 import os
-import subprocess
-import venv
 from typing import Optional
 
-from .common import PYTHON_REQUIREMENT_FILE, VIRTUAL_ENV_DIR, die
+from .common import VIRTUAL_ENV_DIR, die
 from .log import LOG
-
-
-def install(cmd_suffix):
-    install_cmd = [f"{VIRTUAL_ENV_DIR}/bin/pip3", "install"]
-
-    returncode = subprocess.run([*install_cmd, *cmd_suffix]).returncode
-
-    if returncode != 0:
-        die(f"Error installing {cmd_suffix}")
+from .package_sources import PackageSources, add_package_source_arguments
+from .venv_cache import VenvSpec, install_project_venv
 
 
 def subcommand_main(
-    force: bool, if_version: "Optional[str]" = None, if_file: "Optional[str]" = None
+    force: bool,
+    if_version: "Optional[str]" = None,
+    if_file: "Optional[str]" = None,
+    wheelhouse: "Optional[str]" = None,
+    offline: bool = False,
 ):
-    if os.path.isdir(VIRTUAL_ENV_DIR):
+    if if_version and if_file:
+        die("Cannot specify both --if-version and --if-file")
+
+    sources = PackageSources.from_args(wheelhouse, offline)
+
+    if os.path.isdir(VIRTUAL_ENV_DIR) and not os.path.islink(VIRTUAL_ENV_DIR):
         if force:
             LOG.info(f"Forcibly overwriting virtual environment: {VIRTUAL_ENV_DIR}")
         else:
@@ -29,31 +29,18 @@ def subcommand_main(
     else:
         LOG.info(f"Installing into virtual environment: {VIRTUAL_ENV_DIR}")
 
-    venv.EnvBuilder(with_pip=True, clear=force).create(VIRTUAL_ENV_DIR)
-
-    if if_version and if_file:
-        die("Cannot specify both --if-version and --if-file")
-
-    elif if_version:
-        LOG.info("Installing specific version of daml-dit-if from PyPi: %r", if_version)
-        install([f"daml_dit_if=={if_version}"])
-
-    elif if_file:
-        LOG.info("Installing daml-dit-if from %r", if_file)
-        install([f"{if_file}"])
-
-    else:
-        LOG.info("Installing latest daml-dit-if from PyPi")
-        install(["daml_dit_if"])
-
-    if os.path.isfile(PYTHON_REQUIREMENT_FILE):
-        install(["-r", "requirements.txt"])
+    # Environments are shared between projects through the user-level
+    # cache, keyed by the daml-dit-if version and the project's
+    # requirements. --force rebuilds the cached environment.
+    install_project_venv(
+        VenvSpec(if_version=if_version, if_file=if_file), rebuild=force, sources=sources
+    )
 
 
 def setup(sp):
     sp.add_argument(
         "--force",
-        help="Forcibly overwrite the virtual environment if it exists.",
+        help="Forcibly rebuild the virtual environment if it exists.",
         dest="force",
         action="store_true",
         default=False,
@@ -75,4 +62,6 @@ def setup(sp):
         default=None,
     )
 
+    add_package_source_arguments(sp)
+
     return subcommand_main
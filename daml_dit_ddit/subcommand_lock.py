@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+from typing import Optional, Sequence
+
+from .build_config import (
+    PLATFORM_HUB,
+    BuildTarget,
+    add_platform_arguments,
+    build_targets,
+)
+from .common import PYTHON_LOCK_FILE, PYTHON_REQUIREMENT_FILE, die
+from .lockfile import download_distributions, write_lockfile
+from .log import LOG
+from .package_sources import PackageSources, add_package_source_arguments
+
+
+def lock_platform(target: "BuildTarget", sources: "PackageSources"):
+    platform_id = target.platform_id
+
+    LOG.info(f"Resolving dependencies from {PYTHON_REQUIREMENT_FILE} for {platform_id}...")
+
+    dists = download_distributions(
+        target.platform(),
+        requirement_files=[PYTHON_REQUIREMENT_FILE],
+        sources=sources,
+    )
+
+    for dist in dists:
+        LOG.info(f"  {dist.requirement} ({dist.filename}, sha256={dist.sha256})")
+
+    write_lockfile(platform_id, dists)
+
+    LOG.info(f"Locked {len(dists)} distribution(s) for {platform_id} in {PYTHON_LOCK_FILE}")
+
+
+def subcommand_main(
+    local_only: bool,
+    platforms: "Sequence[str]" = (),
+    wheelhouse: "Optional[str]" = None,
+    offline: bool = False,
+):
+    if not os.path.isfile(PYTHON_REQUIREMENT_FILE):
+        die(f"No dependency file found to lock: {PYTHON_REQUIREMENT_FILE}")
+
+    sources = PackageSources.from_args(wheelhouse, offline)
+
+    for target in build_targets(platforms, local_only):
+        lock_platform(target, sources)
+
+
+def setup(sp):
+    sp.add_argument(
+        "--local-only",
+        help="Lock dependencies for local-only builds, rather than for Daml Hub."
+        " An alias for --platform local.",
+        dest="local_only",
+        action="store_true",
+        default=False,
+    )
+
+    add_platform_arguments(
+        sp, "Platform to lock dependencies for", f"Defaults to {PLATFORM_HUB}."
+    )
+
+    add_package_source_arguments(sp)
+
+    return subcommand_main
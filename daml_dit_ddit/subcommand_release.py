@@ -15,6 +15,7 @@ from .common import (
     package_dit_filename,
     with_catalog,
 )
+from .hashing import artifact_file_hash
 from .log import LOG, is_verbose
 
 REQUIRED_SCOPES = set(["repo", "write:packages", "delete:packages"])
@@ -142,7 +143,11 @@ def subcommand_main(force: bool, dry_run: bool, skip_if_present: bool):
         prerelease=prerelease,
     )
 
-    LOG.info("Uploading release asset: %r", dit_filename)
+    LOG.info(
+        "Uploading release asset: %r (artifact hash: %r)",
+        dit_filename,
+        artifact_file_hash(dit_filename),
+    )
     github_release.upload_asset(dit_filename, dit_filename)
 
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 import subprocess
 from dataclasses import replace
-from typing import Optional
+from typing import Dict, Optional
 
 from .common import (
     INTEGRATION_ARG_FILE,
@@ -14,12 +14,107 @@ from .common import (
     package_meta_yaml,
 )
 from .log import LOG
+from .package_sources import PackageSources, add_package_source_arguments
 from .subcommand_build import build_dar
 from .subcommand_genargs import subcommand_main as subcommand_genargs
-from .subcommand_install import subcommand_main as subcommand_install
+from .venv_cache import VenvSpec, install_project_venv, project_venv_spec
 
 RUNTIME_DIT_META_NAME = ".ddit-dit-meta.yaml"
 
+# Seconds to wait for the integration to exit after asking it to stop,
+# before it is killed.
+STOP_TIMEOUT = 10
+
+
+def write_runtime_meta(rebuild_dar: bool):
+    dabl_meta = load_dabl_meta()
+
+    dar_build_result = build_dar(dabl_meta, rebuild_dar)
+
+    if dar_build_result:
+        (dar_filename, daml_model_info) = dar_build_result
+
+        dabl_meta = replace(dabl_meta, daml_model=daml_model_info)
+
+    with open(RUNTIME_DIT_META_NAME, "w") as runtime_meta_file:
+        runtime_meta_file.write(package_meta_yaml(dabl_meta))
+
+
+def start_integration(env: "Dict[str, str]") -> "subprocess.Popen":
+    return subprocess.Popen([f"{VIRTUAL_ENV_DIR}/bin/python3", "-m", "daml_dit_if.main"], env=env)
+
+
+def stop_integration(proc: "subprocess.Popen"):
+    if proc.poll() is not None:
+        return
+
+    LOG.info("Stopping integration...")
+
+    proc.terminate()
+
+    try:
+        proc.wait(timeout=STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        LOG.warn(f"Integration did not stop within {STOP_TIMEOUT}s, killing it.")
+        proc.kill()
+        proc.wait()
+
+
+def watch_integration(env: "Dict[str, str]", venv_spec: "VenvSpec", sources: "PackageSources"):
+    """
+    Run the integration, restarting it whenever the project changes. Python
+    sources are run in place, so source changes need only a restart. Daml
+    model and metadata changes rewrite the runtime metadata (rebuilding
+    the DAR if needed), and requirement changes switch to the cached
+    virtual environment for the new requirements, before the restart. If
+    that preparation fails, the running integration is left as it is until
+    the next change.
+
+    The DAR is only rebuilt on a change to its sources, regardless of
+    whether --rebuild-dar forced the initial build.
+    """
+    from .watch import STAGE_DAML, STAGE_DEPENDENCIES, STAGE_METADATA, ProjectWatcher
+
+    watcher = ProjectWatcher()
+
+    proc = start_integration(env)
+
+    exit_reported = False
+
+    def report_exit():
+        nonlocal exit_reported
+
+        if proc.poll() is not None and not exit_reported:
+            LOG.warn(f"Integration exited (rc={proc.returncode}), waiting for changes.")
+            exit_reported = True
+
+    try:
+        while True:
+            (_, stages) = watcher.wait(on_idle=report_exit)
+
+            try:
+                if STAGE_METADATA in stages or STAGE_DAML in stages:
+                    write_runtime_meta(False)
+
+                if STAGE_DEPENDENCIES in stages:
+                    install_project_venv(venv_spec, sources=sources)
+            except SystemExit:
+                LOG.error("Unable to prepare the integration, not restarting.")
+                continue
+            except Exception:
+                LOG.exception("Unable to prepare the integration, not restarting.")
+                continue
+
+            stop_integration(proc)
+
+            LOG.info("Restarting integration...")
+            proc = start_integration(env)
+            exit_reported = False
+    except KeyboardInterrupt:
+        LOG.info("Stopped watching.")
+    finally:
+        stop_integration(proc)
+
 
 def subcommand_main(
     integration_type_id: str,
@@ -30,22 +125,15 @@ def subcommand_main(
     args_file: "str",
     ledger_url: "Optional[str]",
     rebuild_dar: bool,
+    watch: bool = False,
+    wheelhouse: "Optional[str]" = None,
+    offline: bool = False,
 ):
     # Ensure that the integration type is known, and print a useful error
     # message if not.
     get_itype(integration_type_id)
 
-    dabl_meta = load_dabl_meta()
-
-    dar_build_result = build_dar(dabl_meta, rebuild_dar)
-
-    if dar_build_result:
-        (dar_filename, daml_model_info) = dar_build_result
-
-        dabl_meta = replace(dabl_meta, daml_model=daml_model_info)
-
-    with open(RUNTIME_DIT_META_NAME, "w") as runtime_meta_file:
-        runtime_meta_file.write(package_meta_yaml(dabl_meta))
+    write_runtime_meta(rebuild_dar)
 
     if os.path.isfile(args_file):
         LOG.info(f"Argument file found: {args_file}")
@@ -54,6 +142,11 @@ def subcommand_main(
         subcommand_genargs(integration_type_id, args_file)
         die("Cannot run integration with un-edited argument file.")
 
+    if if_file and if_version:
+        die("Cannot specify both --if-version and --if-file")
+
+    sources = PackageSources.from_args(wheelhouse, offline)
+
     if if_file or if_version:
         # Forcibly ensure the use of a specific version of
         # daml-dit-if. These options are intended to streamline the cases
@@ -61,11 +154,14 @@ def subcommand_main(
         # downlevel versions of the framework that might still be in
         # use in production Daml Hub.
         LOG.info(f"Ensuring specific version of daml-dit-if: {if_version or if_file}")
-        subcommand_install(True, if_version, if_file)
+        venv_spec = VenvSpec(if_version=if_version, if_file=if_file)
+    else:
+        # Otherwise, keep the version the environment was installed with.
+        venv_spec = project_venv_spec()
 
-    elif not os.path.isdir(VIRTUAL_ENV_DIR):
-        LOG.info("Virtual environment missing, installing now.")
-        subcommand_install(False)
+    # The environment is relinked (and if necessary, created) whenever it
+    # does not match the requirements, so that it never runs stale.
+    install_project_venv(venv_spec, sources=sources)
 
     url_dict = {"DABL_LEDGER_URL": ledger_url} if ledger_url else {}
     env = {
@@ -81,9 +177,10 @@ def subcommand_main(
     if log_level:
         env["DABL_LOG_LEVEL"] = log_level
 
-    subprocess.run(
-        [f"{VIRTUAL_ENV_DIR}/bin/python3", "-m", "daml_dit_if.main"], env=env
-    )
+    if watch:
+        watch_integration(env, venv_spec, sources)
+    else:
+        start_integration(env).wait()
 
 
 def setup(sp):
@@ -108,12 +205,21 @@ def setup(sp):
 
     sp.add_argument(
         "--rebuild-dar",
-        help="Rebuild and overwrite the DAR if it already exists",
+        help="Rebuild and overwrite the DAR even if its Daml sources are unchanged",
         dest="rebuild_dar",
         action="store_true",
         default=False,
     )
 
+    sp.add_argument(
+        "--watch",
+        help="Restart the integration whenever the project's sources, Daml model,"
+        " dependencies or metadata change.",
+        dest="watch",
+        action="store_true",
+        default=False,
+    )
+
     sp.add_argument(
         "--if-version",
         help="Ensure the integration is run with a specific daml-dit-if, by version.",
@@ -130,6 +236,8 @@ def setup(sp):
         default=None,
     )
 
+    add_package_source_arguments(sp)
+
     sp.add_argument(
         "--args-file",
         help=f"Use a specified arguments file, defaults to {INTEGRATION_ARG_FILE}.",
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from .dit_size import dit_size_breakdown, group_totals, size_table
+from .timing import format_bytes
+
+
+def subcommand_main(dit_filename: str, limit: "Optional[int]" = None):
+    entries = dit_size_breakdown(dit_filename)
+
+    print(f"{dit_filename}: {format_bytes(os.path.getsize(dit_filename))}")
+    print()
+    print(size_table(group_totals(entries)))
+    print()
+    print(size_table(entries, limit))
+
+
+def setup(sp):
+    sp.add_argument("dit_filename", metavar="dit_filename")
+
+    sp.add_argument(
+        "--limit",
+        help="Show only the largest entries.",
+        dest="limit",
+        type=int,
+        default=None,
+    )
+
+    return subcommand_main
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None  # type: ignore
+
+PROC_IO_FILE = "/proc/self/io"
+
+
+@dataclass
+class Span:
+    """
+    A timed block. Wall and CPU time are the span's own thread's. Child
+    CPU time, bytes read and written, and peak RSS are measured for the
+    whole process, so they overlap between spans that run concurrently.
+    """
+
+    name: str
+    thread_id: int
+    depth: int
+    start: float
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    child_cpu_time: float = 0.0
+    read_bytes: "Optional[int]" = None
+    write_bytes: "Optional[int]" = None
+    max_rss: "Optional[int]" = None
+    args: "Dict[str, Any]" = field(default_factory=dict)
+
+
+def _io_counters() -> "Optional[Tuple[int, int]]":
+    """
+    Bytes read and written by this process, including reads served from
+    the page cache. Only available on Linux.
+    """
+    try:
+        with open(PROC_IO_FILE, "r") as f:
+            counters = dict(line.split(":", 1) for line in f.read().splitlines())
+    except (OSError, ValueError):
+        return None
+
+    return (int(counters["rchar"]), int(counters["wchar"]))
+
+
+def _child_cpu_time() -> float:
+    if resource is None:
+        return 0.0
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    return usage.ru_utime + usage.ru_stime
+
+
+def max_rss_bytes(ru_maxrss: int) -> int:
+    """
+    Convert a peak resident set size reported by getrusage or wait4 to
+    bytes. ru_maxrss is reported in bytes on macOS and in kilobytes
+    elsewhere.
+    """
+    return ru_maxrss if sys.platform == "darwin" else ru_maxrss * 1024
+
+
+def _max_rss() -> "Optional[int]":
+    """
+    Peak resident set size in bytes, of this process or its largest
+    waited-for child process.
+    """
+    if resource is None:
+        return None
+
+    return max_rss_bytes(
+        max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        )
+    )
+
+
+class _ActiveSpan:
+    def __init__(self, recorder: "TimingRecorder", name: str, args: "Dict[str, Any]"):
+        self._recorder = recorder
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        stack = self._recorder._stack()
+
+        self._span = Span(
+            name=self._name,
+            thread_id=threading.get_ident(),
+            depth=stack[-1].depth + 1 if stack else self._recorder._base_depth(),
+            start=0.0,
+            args=self._args,
+        )
+
+        stack.append(self._span)
+
+        self._cpu_start = time.thread_time()
+        self._child_cpu_start = _child_cpu_time()
+        self._io_start = _io_counters()
+        self._wall_start = time.perf_counter()
+
+        # The span starts where its wall time is measured from, after the
+        # counters are read, so it lies within its parent in a trace.
+        self._span.start = self._wall_start - self._recorder.origin
+
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        span = self._span
+
+        span.wall_time = time.perf_counter() - self._wall_start
+        span.cpu_time = time.thread_time() - self._cpu_start
+        span.child_cpu_time = _child_cpu_time() - self._child_cpu_start
+        span.max_rss = _max_rss()
+
+        io_end = _io_counters()
+
+        if self._io_start and io_end:
+            span.read_bytes = io_end[0] - self._io_start[0]
+            span.write_bytes = io_end[1] - self._io_start[1]
+
+        if exc_type is not None:
+            span.args["error"] = exc_type.__name__
+
+        self._recorder._stack().pop()
+        self._recorder._add(span)
+
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class TimingRecorder:
+    """
+    Records nested timing spans from any thread. I/O counters are process
+    wide, so spans that overlap with work on other threads include that
+    work's I/O, and child CPU time is attributed when child processes are
+    waited for.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: "List[Span]" = []
+        self._main_stack: "List[Span]" = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> "List[Span]":
+        if threading.current_thread() is threading.main_thread():
+            return self._main_stack
+
+        stack = getattr(self._local, "stack", None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+    def _base_depth(self) -> int:
+        """
+        Depth of a span opened outside of any other span on its thread.
+        Work on other threads is started from the main thread, so such
+        spans are nested beneath the innermost span open on the main
+        thread.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return 0
+
+        return len(self._main_stack)
+
+    def _add(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+    def span(self, name: str, **args) -> "_ActiveSpan":
+        return _ActiveSpan(self, name, args)
+
+    def sorted_spans(self) -> "List[Span]":
+        with self._lock:
+            return sorted(self.spans, key=lambda span: (span.start, span.depth))
+
+
+_recorder: "Optional[TimingRecorder]" = None
+
+
+def enable_timings() -> "TimingRecorder":
+    global _recorder
+
+    _recorder = TimingRecorder()
+
+    return _recorder
+
+
+def span(name: str, **args):
+    """
+    Time a block as a named span, when timings are enabled. Spans opened
+    within the block on the same thread are nested beneath it.
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+
+    return _recorder.span(name, **args)
+
+
+class PhaseTimes:
+    """
+    Wall time spent in each phase of an operation, for reporting in its
+    log output whether or not timings are enabled. Each phase is also
+    timed as a span.
+    """
+
+    def __init__(self):
+        self.times: "Dict[str, float]" = {}
+
+    @contextmanager
+    def phase(self, name: str, **args) -> "Iterator[None]":
+        start = time.perf_counter()
+
+        try:
+            with span(name, **args):
+                yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {elapsed:.2f}s" for (name, elapsed) in self.times.items())
+
+
+def format_bytes(value: "Optional[int]") -> str:
+    if value is None:
+        return "-"
+
+    if abs(value) < 1024:
+        return f"{value}B"
+
+    scaled = float(value)
+
+    for unit in ["KiB", "MiB", "GiB"]:
+        scaled /= 1024
+
+        if abs(scaled) < 1024 or unit == "GiB":
+            break
+
+    return f"{scaled:.1f}{unit}"
+
+
+# Marks the table columns measured for the whole process, rather than the
+# span's own thread.
+PROCESS_WIDE_MARK = "*"
+
+
+def timings_table(recorder: "TimingRecorder") -> str:
+    mark = PROCESS_WIDE_MARK
+
+    header = (
+        f"{'span':<40} {'wall':>9} {'cpu':>9} {'child cpu' + mark:>10}"
+        f" {'read' + mark:>10} {'written' + mark:>10} {'peak rss' + mark:>10}"
+    )
+
+    lines = [header, "-" * len(header)]
+
+    for span in recorder.sorted_spans():
+        name = ("  " * span.depth + span.name)[:40]
+
+        lines.append(
+            f"{name:<40}"
+            f" {span.wall_time:>8.3f}s"
+            f" {span.cpu_time:>8.3f}s"
+            f" {span.child_cpu_time:>9.3f}s"
+            f" {format_bytes(span.read_bytes):>10}"
+            f" {format_bytes(span.write_bytes):>10}"
+            f" {format_bytes(span.max_rss):>10}"
+        )
+
+    lines.append(
+        f"{mark} Measured for the whole process. Spans that run at the same time each"
+        " include the\n  other's child processes and I/O. Peak RSS is the highest so far."
+    )
+
+    return "\n".join(lines)
+
+
+def chrome_trace(recorder: "TimingRecorder") -> "Dict[str, Any]":
+    """
+    Render the recorded spans as complete ("X") events in the Chrome trace
+    event format, for viewing in chrome://tracing or Perfetto.
+    """
+    pid = os.getpid()
+
+    events = []
+
+    for span in recorder.sorted_spans():
+        events.append(
+            {
+                "name": span.name,
+                "ph": "X",
+                "pid": pid,
+                "tid": span.thread_id,
+                "ts": span.start * 1e6,
+                "dur": span.wall_time * 1e6,
+                "args": {
+                    **span.args,
+                    "cpu_time": span.cpu_time,
+                    "process_child_cpu_time": span.child_cpu_time,
+                    "process_read_bytes": span.read_bytes,
+                    "process_write_bytes": span.write_bytes,
+                    "process_max_rss": span.max_rss,
+                },
+            }
+        )
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(recorder: "TimingRecorder", trace_filename: str):
+    with open(trace_filename, "w") as f:
+        json.dump(chrome_trace(recorder), f, indent=1)
@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import venv
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .build_config import build_platform_id
+from .cache import InputDigest, cache_dir
+from .common import PYTHON_REQUIREMENT_FILE, VIRTUAL_ENV_DIR, die
+from .lockfile import LockedDistribution, locked_distributions
+from .log import LOG
+from .package_sources import DEFAULT_SOURCES, PackageSources
+from .package_store import bundled_wheels, populate_venv
+from .timing import PhaseTimes
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where concurrent installs are not guarded.
+    fcntl = None  # type: ignore
+
+VENV_CACHE_KIND = "venvs"
+
+# Written into each cached environment once it is completely installed.
+VENV_INFO_NAME = "ddit-venv.json"
+
+# Cached environments beyond this number are evicted, least recently
+# used first.
+MAX_CACHED_VENVS = 8
+
+# Cached environments are named by a prefix of their key, which keeps
+# the paths written into console script shebangs short.
+VENV_KEY_LENGTH = 16
+
+# An environment with the latest daml-dit-if (rather than a given version
+# or file) is reinstalled once it is this old, to pick up new releases.
+LATEST_IF_MAX_AGE = 24 * 60 * 60
+
+# Requirements file options that include another requirements file.
+REQUIREMENT_INCLUDE_OPTIONS = ("-r", "--requirement", "-c", "--constraint")
+
+REQUIREMENT_EDITABLE_OPTIONS = ("-e", "--editable")
+
+
+@dataclass(frozen=True)
+class VenvSpec:
+    """
+    The version of daml-dit-if to install into an environment: a release
+    from PyPI by version, a local file, or (with neither) the latest
+    release.
+    """
+
+    if_version: "Optional[str]" = None
+    if_file: "Optional[str]" = None
+
+    @property
+    def is_latest(self) -> bool:
+        return not (self.if_version or self.if_file)
+
+    def describe(self) -> str:
+        if self.if_version:
+            return f"daml-dit-if=={self.if_version}"
+        elif self.if_file:
+            return f"daml-dit-if from {self.if_file}"
+        else:
+            return "latest daml-dit-if"
+
+    def install_args(self) -> "List[str]":
+        if self.if_version:
+            return [f"daml_dit_if=={self.if_version}"]
+        elif self.if_file:
+            return [self.if_file]
+        else:
+            return ["daml_dit_if"]
+
+
+def _requirement_lines(filename: str) -> "List[str]":
+    """
+    The lines of a requirements file, with continuations joined and
+    comments removed.
+    """
+    with open(filename, "r") as f:
+        text = f.read()
+
+    lines = []
+
+    for line in re.sub(r"\\\n", "", text).splitlines():
+        line = re.sub(r"(^|\s)#.*$", "", line).strip()
+
+        if line:
+            lines.append(line)
+
+    return lines
+
+
+def _is_local_requirement(requirement: str) -> bool:
+    """
+    Whether a requirement installs from a local file or directory, rather
+    than from a package index or a URL.
+    """
+    if "file:" in requirement:
+        return True
+
+    return "://" not in requirement and (requirement.startswith((".", "~")) or "/" in requirement)
+
+
+def requirement_inputs(filename: str) -> "Tuple[List[str], List[str]]":
+    """
+    The requirements files an environment is installed from: filename and
+    the files it includes with -r and -c, followed recursively. Also
+    returns the requirements whose contents are not in those files (local
+    paths, and requirements files included by URL).
+    """
+    files: "List[str]" = []
+    unhashed = []
+
+    pending = [os.path.normpath(filename)]
+
+    while pending:
+        path = pending.pop(0)
+
+        if path in files:
+            continue
+
+        files.append(path)
+
+        if not os.path.isfile(path):
+            continue
+
+        for line in _requirement_lines(path):
+            match = re.match(r"(-[a-zA-Z]|--[a-z-]+)\s*=?\s*(.*)$", line)
+
+            (option, value) = match.groups() if match else (None, line)
+
+            if option in REQUIREMENT_INCLUDE_OPTIONS:
+                if "://" in value:
+                    unhashed.append(value)
+                else:
+                    # Included files are relative to the including file.
+                    pending.append(os.path.normpath(os.path.join(os.path.dirname(path), value)))
+            elif option in REQUIREMENT_EDITABLE_OPTIONS or option is None:
+                if _is_local_requirement(value):
+                    unhashed.append(value)
+
+    return (files, unhashed)
+
+
+def venv_key(
+    spec: "VenvSpec", locked_dists: "Optional[Sequence[LockedDistribution]]" = None
+) -> str:
+    """
+    The cache key of an environment for spec, the project's requirements
+    (including the requirements files they include) and the pins (if any)
+    it is installed with.
+    """
+    digest = InputDigest(VENV_CACHE_KIND)
+
+    digest.add_str("python", f"{os.path.realpath(sys.executable)} {sys.version}")
+    digest.add_str("if_version", spec.if_version)
+
+    if spec.if_file:
+        digest.add_file("if_file", spec.if_file)
+
+    (requirement_files, _) = requirement_inputs(PYTHON_REQUIREMENT_FILE)
+
+    for (index, path) in enumerate(requirement_files):
+        digest.add_file("requirements" if index == 0 else f"requirements:{path}", path)
+
+    if locked_dists is not None:
+        digest.add_str("lock", json.dumps([asdict(dist) for dist in locked_dists]))
+
+    return digest.hexdigest()[:VENV_KEY_LENGTH]
+
+
+def read_venv_info(venv_dir: str) -> "Optional[Dict[str, Any]]":
+    try:
+        with open(os.path.join(venv_dir, VENV_INFO_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def project_venv_spec() -> "VenvSpec":
+    """
+    The specification the project's virtual environment was installed
+    with, so that it is kept when the environment is brought up to date.
+    """
+    info = read_venv_info(VIRTUAL_ENV_DIR)
+
+    if info is None:
+        return VenvSpec()
+
+    return VenvSpec(if_version=info.get("if_version"), if_file=info.get("if_file"))
+
+
+@contextmanager
+def _venv_lock(key: str) -> "Iterator[None]":
+    if fcntl is None:
+        yield
+        return
+
+    with open(os.path.join(cache_dir(VENV_CACHE_KIND), f".{key}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _create_venv(
+    venv_dir: str,
+    spec: "VenvSpec",
+    key: str,
+    locked_dists: "Optional[Sequence[LockedDistribution]]",
+    sources: "PackageSources",
+):
+    LOG.info(f"Creating virtual environment with {spec.describe()}: {venv_dir}")
+
+    phases = PhaseTimes()
+
+    extra_wheels = bundled_wheels()
+
+    pip_wheel = next(
+        (wheel for wheel in extra_wheels if os.path.basename(wheel).startswith("pip-")), None
+    )
+
+    with phases.phase("create"):
+        if pip_wheel:
+            # pip is run from its bundled wheel, and then linked into the
+            # environment from the package store like any other package.
+            venv.EnvBuilder(with_pip=False, clear=True).create(venv_dir)
+
+            pip_cmd = [os.path.join(venv_dir, "bin", "python"), os.path.join(pip_wheel, "pip")]
+        else:
+            venv.EnvBuilder(with_pip=True, clear=True).create(venv_dir)
+
+            pip_cmd = [os.path.join(venv_dir, "bin", "pip3")]
+            extra_wheels = []
+
+    args = spec.install_args()
+
+    if os.path.isfile(PYTHON_REQUIREMENT_FILE):
+        args = [*args, "-r", PYTHON_REQUIREMENT_FILE]
+
+    stats = populate_venv(venv_dir, pip_cmd, args, phases, extra_wheels, locked_dists, sources)
+
+    LOG.info("Installed %s", stats.summary())
+    LOG.info("Install phases: %s", phases.summary())
+
+    # The info file marks the environment as complete, so an install that
+    # fails part way is rebuilt rather than reused.
+    with open(os.path.join(venv_dir, VENV_INFO_NAME), "w") as f:
+        json.dump({"key": key, "created": time.time(), **asdict(spec)}, f)
+
+
+def _remove_venv_builds(venv_link: str, keep: "Optional[str]" = None):
+    """
+    Remove the builds of a cached environment other than keep, including
+    any left by failed installs. Called with the environment's lock held.
+    """
+    (kind_dir, key) = os.path.split(venv_link)
+
+    for name in os.listdir(kind_dir):
+        if name.startswith(f"{key}.") and name != keep:
+            shutil.rmtree(os.path.join(kind_dir, name), ignore_errors=True)
+
+
+def _swap_venv(venv_link: str, build_dir: str):
+    """
+    Point a cached environment's link at a completed build, replacing the
+    previous build in a single step, so projects linked to the
+    environment never see it partially installed.
+    """
+    if os.path.isdir(venv_link) and not os.path.islink(venv_link):
+        # Cached by an earlier version of ddit, which installed in place.
+        shutil.rmtree(venv_link)
+
+    tmp_link = os.path.join(os.path.dirname(build_dir), f".{os.path.basename(build_dir)}.link")
+
+    os.symlink(os.path.basename(build_dir), tmp_link)
+    os.replace(tmp_link, venv_link)
+
+    _remove_venv_builds(venv_link, keep=os.path.basename(build_dir))
+
+
+def evict_venvs(keep: str):
+    """
+    Remove the least recently used cached environments beyond
+    MAX_CACHED_VENVS, other than keep.
+    """
+    kind_dir = cache_dir(VENV_CACHE_KIND)
+
+    entries = []
+
+    for name in os.listdir(kind_dir):
+        info_path = os.path.join(kind_dir, name, VENV_INFO_NAME)
+
+        # Environments are links named by key, to builds named by key and
+        # a suffix, and locks and staging links start with a dot.
+        if name != keep and "." not in name and os.path.isfile(info_path):
+            entries.append((os.path.getmtime(info_path), name))
+
+    for (_, name) in sorted(entries)[: max(0, len(entries) + 1 - MAX_CACHED_VENVS)]:
+        with _venv_lock(name):
+            LOG.info(f"Evicting least recently used virtual environment: {name}")
+
+            venv_link = os.path.join(kind_dir, name)
+
+            if os.path.islink(venv_link):
+                os.remove(venv_link)
+            else:
+                shutil.rmtree(venv_link, ignore_errors=True)
+
+            _remove_venv_builds(venv_link)
+
+
+def cached_venv(
+    spec: "VenvSpec", rebuild: bool = False, sources: "PackageSources" = DEFAULT_SOURCES
+) -> str:
+    """
+    Return the path of a cached environment for spec and the project's
+    requirements, creating it if it is not already cached.
+
+    The path is a link to the environment's current build. Environments
+    are rebuilt into a new directory, and the link is then switched to
+    it, so a rebuild does not disturb projects using the environment.
+    """
+    # Dependencies locked for local builds are locked for this interpreter,
+    # so the environment is installed with the same versions.
+    locked_dists = locked_distributions(build_platform_id(True))
+
+    key = venv_key(spec, locked_dists)
+
+    (_, unhashed) = requirement_inputs(PYTHON_REQUIREMENT_FILE)
+
+    if unhashed and not rebuild:
+        LOG.warn(
+            f"{PYTHON_REQUIREMENT_FILE} installs from {', '.join(unhashed)}, which the"
+            " virtual environment cache cannot track, so the environment is reinstalled."
+        )
+        rebuild = True
+
+    kind_dir = cache_dir(VENV_CACHE_KIND)
+    venv_dir = os.path.abspath(os.path.join(kind_dir, key))
+
+    with _venv_lock(key):
+        info = read_venv_info(venv_dir)
+
+        if info is not None and info.get("key") == key and spec.is_latest:
+            age = time.time() - info.get("created", 0)
+
+            if age > LATEST_IF_MAX_AGE:
+                LOG.info(
+                    f"Cached virtual environment with {spec.describe()} is"
+                    f" {age / 3600:.0f} hours old, reinstalling to pick up new releases."
+                )
+                rebuild = True
+
+        if info is not None and info.get("key") == key and not rebuild:
+            LOG.info(f"Reusing cached virtual environment with {spec.describe()}: {key}")
+
+            # The info file's mtime records when the environment was last
+            # used, for eviction.
+            os.utime(os.path.join(venv_dir, VENV_INFO_NAME))
+        else:
+            # Builds are named by key and a unique suffix, and are created
+            # at their final path, which is written into console scripts.
+            build_dir = tempfile.mkdtemp(prefix=f"{key}.", dir=os.path.abspath(kind_dir))
+            os.chmod(build_dir, 0o755)
+
+            try:
+                _create_venv(build_dir, spec, key, locked_dists, sources)
+            except BaseException:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise
+
+            _swap_venv(venv_dir, build_dir)
+
+    evict_venvs(keep=key)
+
+    return venv_dir
+
+
+def install_project_venv(
+    spec: "VenvSpec", rebuild: bool = False, sources: "PackageSources" = DEFAULT_SOURCES
+):
+    """
+    Point the project's virtual environment at the cached environment for
+    spec and the project's current requirements. A project-local
+    environment (a directory rather than a link) is only replaced when
+    rebuilding.
+    """
+    is_local_venv = os.path.isdir(VIRTUAL_ENV_DIR) and not os.path.islink(VIRTUAL_ENV_DIR)
+
+    if is_local_venv and not rebuild:
+        die(
+            f"Virtual environment already exists: {VIRTUAL_ENV_DIR}. Run 'ddit install"
+            " --force' to replace it with a shared environment."
+        )
+
+    if spec.if_file:
+        # The file is recorded with the environment, which may be shared
+        # with projects in other directories.
+        spec = replace(spec, if_file=os.path.abspath(spec.if_file))
+
+    venv_dir = cached_venv(spec, rebuild, sources)
+
+    if os.path.islink(VIRTUAL_ENV_DIR):
+        if os.readlink(VIRTUAL_ENV_DIR) == venv_dir:
+            return
+
+        os.remove(VIRTUAL_ENV_DIR)
+
+    elif is_local_venv:
+        LOG.info(f"Replacing project-local virtual environment: {VIRTUAL_ENV_DIR}")
+        shutil.rmtree(VIRTUAL_ENV_DIR)
+
+    os.symlink(venv_dir, VIRTUAL_ENV_DIR)
+
+    LOG.info(f"Linked {VIRTUAL_ENV_DIR} to {venv_dir}")
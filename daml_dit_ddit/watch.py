@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from .build_config import DEFAULT_DAML_SOURCE, PKG_DIR, daml_source_files
+from .common import (
+    DAML_YAML_NAME,
+    PYTHON_LOCK_FILE,
+    PYTHON_REQUIREMENT_FILE,
+    FileSignature,
+    file_signature,
+    load_daml_yaml,
+    metadata_file_names,
+)
+from .log import LOG
+
+WATCH_INTERVAL = 0.5
+
+SRC_DIR = "src"
+
+# Build stages affected by a change, in the order they are reported.
+STAGE_METADATA = "metadata"
+STAGE_DAML = "daml"
+STAGE_DEPENDENCIES = "dependencies"
+STAGE_SOURCES = "sources"
+STAGE_PKG = "pkg"
+
+STAGES = [STAGE_METADATA, STAGE_DAML, STAGE_DEPENDENCIES, STAGE_SOURCES, STAGE_PKG]
+
+IGNORED_PATTERNS = ["*.pyc", "*.pyo", "*.swp", "*~", ".#*"]
+
+Snapshot = Dict[str, FileSignature]
+
+
+def _is_ignored(filename: str) -> bool:
+    return any(fnmatch.fnmatch(filename, pattern) for pattern in IGNORED_PATTERNS)
+
+
+def daml_source() -> "Optional[str]":
+    """
+    The Daml source path named in daml.yaml, or None if daml.yaml cannot
+    currently be parsed (as it may not be, part way through an edit).
+    """
+    try:
+        daml_yaml = load_daml_yaml()
+    except yaml.YAMLError:
+        return None
+
+    return os.path.normpath((daml_yaml or {}).get("source", DEFAULT_DAML_SOURCE))
+
+
+def _scan_tree(snapshot: "Snapshot", root: str):
+    for (dirpath, dirnames, filenames) in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "__pycache__"]
+
+        for filename in filenames:
+            if _is_ignored(filename):
+                continue
+
+            path = os.path.normpath(os.path.join(dirpath, filename))
+            snapshot[path] = file_signature(path)
+
+
+def project_snapshot(source: str) -> "Snapshot":
+    """
+    Signatures (mtime and size) of every file that is an input to a build
+    of the project in the current directory, with Daml sources at source.
+    """
+    snapshot: "Snapshot" = {}
+
+    for filename in [*metadata_file_names(), PYTHON_REQUIREMENT_FILE, PYTHON_LOCK_FILE]:
+        snapshot[filename] = file_signature(filename)
+
+    _scan_tree(snapshot, SRC_DIR)
+    _scan_tree(snapshot, PKG_DIR)
+
+    # Daml sources may share a directory with the rest of the project, so
+    # only Daml files are watched there, as they are hashed for the DAR.
+    if os.path.isdir(source):
+        for path in daml_source_files(source):
+            snapshot[path] = file_signature(path)
+    else:
+        snapshot[source] = file_signature(source)
+
+    return snapshot
+
+
+def changed_files(old: "Snapshot", new: "Snapshot") -> "Set[str]":
+    return {path for path in set(old) | set(new) if old.get(path) != new.get(path)}
+
+
+def _is_within(path: str, root: str) -> bool:
+    return root == "." or path == root or path.startswith(root + os.sep)
+
+
+def changed_stages(paths: "Set[str]", source: str) -> "List[str]":
+    """
+    The build stages whose inputs include any of the changed paths.
+    """
+    stages = set()
+
+    for path in paths:
+        if path in metadata_file_names():
+            stages.add(STAGE_METADATA)
+
+        if path == DAML_YAML_NAME or (path.endswith(".daml") and _is_within(path, source)):
+            stages.add(STAGE_DAML)
+
+        if path in (PYTHON_REQUIREMENT_FILE, PYTHON_LOCK_FILE):
+            stages.add(STAGE_DEPENDENCIES)
+
+        if _is_within(path, SRC_DIR):
+            stages.add(STAGE_SOURCES)
+
+        if _is_within(path, PKG_DIR):
+            stages.add(STAGE_PKG)
+
+    return [stage for stage in STAGES if stage in stages]
+
+
+class ProjectWatcher:
+    """
+    Polls the current project's build inputs for changes. Polling is used
+    rather than filesystem notifications, so that watching works the same
+    way on every platform and needs no additional dependencies.
+    """
+
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+        self._source = daml_source() or DEFAULT_DAML_SOURCE
+        self._snapshot = project_snapshot(self._source)
+
+    def poll(self) -> "Set[str]":
+        # The previous Daml source path is kept while daml.yaml is invalid.
+        self._source = daml_source() or self._source
+
+        snapshot = project_snapshot(self._source)
+
+        changed = changed_files(self._snapshot, snapshot)
+
+        self._snapshot = snapshot
+
+        return changed
+
+    def wait(
+        self, on_idle: "Optional[Callable[[], None]]" = None
+    ) -> "Tuple[Set[str], List[str]]":
+        """
+        Block until build inputs change, returning the changed paths and
+        the stages they affect. Changes are collected until a full polling
+        interval passes without further changes, so that a save touching
+        several files is handled as one change. on_idle is called between
+        polls while nothing has changed.
+        """
+        changed: "Set[str]" = set()
+
+        while True:
+            time.sleep(self.interval)
+
+            latest = self.poll()
+
+            if latest:
+                changed |= latest
+            elif changed:
+                break
+            elif on_idle:
+                on_idle()
+
+        stages = changed_stages(changed, self._source)
+
+        LOG.info(
+            f"Detected changes to {len(changed)} file(s)"
+            + (f", affecting: {', '.join(stages)}" if stages else "")
+        )
+
+        for path in sorted(changed):
+            LOG.debug(f"  Changed: {path}")
+
+        return (changed, stages)
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from daml_dit_api import DIT_META_KEY_NAME, DIT_META_NAMES
+
+from .bytecode import process_pool_context
+from .common import (
+    DAML_YAML_NAME,
+    VIRTUAL_ENV_DIR,
+    die,
+    load_dabl_meta,
+    load_daml_yaml,
+    package_dit_filename,
+)
+from .log import LOG, setup_default_logging
+
+# Directories that never contain workspace projects.
+IGNORED_DIRS = {VIRTUAL_ENV_DIR, "node_modules", "__pycache__"}
+
+
+@dataclass(frozen=True)
+class WorkspaceProject:
+    path: str
+    name: str
+    dit_filename: str
+    subdeployments: "List[str]"
+
+    @property
+    def dit_path(self) -> str:
+        return os.path.join(self.path, self.dit_filename)
+
+
+@contextmanager
+def project_dir(path: str) -> "Iterator[None]":
+    cwd = os.getcwd()
+
+    os.chdir(path)
+
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def is_project_dir(path: str) -> bool:
+    for file_name in DIT_META_NAMES:
+        if os.path.isfile(os.path.join(path, file_name)):
+            return True
+
+    if os.path.isfile(os.path.join(path, DAML_YAML_NAME)):
+        with project_dir(path):
+            daml_yaml = load_daml_yaml()
+
+        return bool(daml_yaml and daml_yaml.get(DIT_META_KEY_NAME))
+
+    return False
+
+
+def discover_projects(root: str) -> "List[WorkspaceProject]":
+    """
+    Find the ddit projects beneath root. Directories within a project are
+    part of that project, and are not searched for further projects.
+    """
+    projects = []
+
+    root = os.path.abspath(root)
+
+    for (dirpath, dirnames, filenames) in os.walk(root):
+        if is_project_dir(dirpath):
+            dirnames.clear()
+
+            with project_dir(dirpath):
+                dabl_meta = load_dabl_meta()
+
+            projects.append(
+                WorkspaceProject(
+                    path=dirpath,
+                    name=os.path.basename(dirpath)
+                    if dirpath == root
+                    else os.path.relpath(dirpath, root),
+                    dit_filename=package_dit_filename(dabl_meta),
+                    subdeployments=list(dabl_meta.subdeployments or []),
+                )
+            )
+        else:
+            dirnames[:] = sorted(
+                d for d in dirnames if not d.startswith(".") and d not in IGNORED_DIRS
+            )
+
+    return projects
+
+
+def project_dependencies(
+    projects: "List[WorkspaceProject]",
+) -> "Dict[str, List[WorkspaceProject]]":
+    """
+    Map each project's path to the projects whose DIT files it names as
+    subdeployments.
+    """
+    by_dit_filename: "Dict[str, WorkspaceProject]" = {}
+
+    for project in projects:
+        other = by_dit_filename.get(project.dit_filename)
+
+        if other:
+            die(
+                f"Projects {other.name} and {project.name} both build"
+                f" {project.dit_filename}"
+            )
+
+        by_dit_filename[project.dit_filename] = project
+
+    return {
+        project.path: [
+            by_dit_filename[sd] for sd in project.subdeployments if sd in by_dit_filename
+        ]
+        for project in projects
+    }
+
+
+def check_acyclic(
+    projects: "List[WorkspaceProject]", dependencies: "Dict[str, List[WorkspaceProject]]"
+):
+    visited: "Set[str]" = set()
+    visiting: "List[str]" = []
+
+    def visit(project: "WorkspaceProject"):
+        if project.path in visiting:
+            cycle = [*visiting[visiting.index(project.path) :], project.path]
+            die(
+                "Subdeployment cycle between workspace projects: "
+                + " -> ".join(os.path.basename(path) for path in cycle)
+            )
+
+        if project.path in visited:
+            return
+
+        visiting.append(project.path)
+
+        for dependency in dependencies[project.path]:
+            visit(dependency)
+
+        visiting.pop()
+        visited.add(project.path)
+
+    for project in projects:
+        visit(project)
+
+
+def _build_workspace_project(
+    build_fn: "Callable[..., None]",
+    project: "WorkspaceProject",
+    build_args: "Dict[str, Any]",
+    log_level: int,
+) -> "Optional[Any]":
+    """
+    Build a single project in a worker process, returning the exit status
+    of a failed build or None on success.
+    """
+    setup_default_logging(
+        level=log_level,
+        format=f"%(asctime)s [%(levelname)s] (%(name)s) [{project.name}] %(message)s",
+        force=True,
+    )
+
+    os.chdir(project.path)
+
+    try:
+        build_fn(**build_args)
+    except SystemExit as e:
+        return e.code or 1
+
+    return None
+
+
+def build_workspace(
+    root: str,
+    jobs: "Optional[int]",
+    build_fn: "Callable[..., None]",
+    build_args: "Dict[str, Any]",
+):
+    """
+    Build every project in a workspace. Each project is built in its own
+    worker process and working directory, once the projects it uses as
+    subdeployments have been built. Independent projects are built in
+    parallel.
+    """
+    projects = discover_projects(root)
+
+    if not projects:
+        die(f"No ddit projects found in workspace: {root}")
+
+    dependencies = project_dependencies(projects)
+
+    check_acyclic(projects, dependencies)
+
+    LOG.info(f"Building {len(projects)} workspace project(s) in {root}")
+
+    for project in projects:
+        deps = dependencies[project.path]
+
+        LOG.info(
+            f"  {project.name}: {project.dit_filename}"
+            + (f" (uses {', '.join(dep.name for dep in deps)})" if deps else "")
+        )
+
+    pending = list(projects)
+    running: "Dict[Future[Optional[Any]], WorkspaceProject]" = {}
+    built: "Set[str]" = set()
+    failed: "Set[str]" = set()
+
+    log_level = logging.root.level
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=process_pool_context()) as executor:
+        while pending or running:
+            for project in list(pending):
+                deps = dependencies[project.path]
+
+                if any(dep.path in failed for dep in deps):
+                    LOG.error(f"Skipping {project.name}, a subdeployment failed to build.")
+                    failed.add(project.path)
+                    pending.remove(project)
+
+                elif all(dep.path in built for dep in deps):
+                    project_args = {
+                        **build_args,
+                        "add_subdeployments": [dep.dit_path for dep in deps],
+                    }
+
+                    future = executor.submit(
+                        _build_workspace_project, build_fn, project, project_args, log_level
+                    )
+
+                    running[future] = project
+                    pending.remove(project)
+
+            if not running:
+                continue
+
+            (completed, _) = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in completed:
+                project = running.pop(future)
+                status = future.result()
+
+                if status is None:
+                    LOG.info(f"Built {project.name}: {project.dit_filename}")
+                    built.add(project.path)
+                else:
+                    LOG.error(f"Build failed for {project.name} (status {status})")
+                    failed.add(project.path)
+
+    if failed:
+        die(
+            f"{len(failed)} of {len(projects)} workspace project(s) failed: "
+            + ", ".join(project.name for project in projects if project.path in failed)
+        )
+
+    LOG.info(f"Built {len(projects)} workspace project(s).")
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def project_dir(tmp_path, monkeypatch):
+    """
+    An empty project directory, made the working directory, with a
+    build cache of its own.
+    """
+    project = tmp_path / "project"
+    project.mkdir()
+
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("DDIT_CACHE_DIR", str(tmp_path / "cache"))
+
+    return project
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile
+
+from daml_dit_ddit.archive import (
+    CompressionPolicy,
+    PrecompressedFiles,
+    collect_tree,
+    write_precompressed,
+)
+
+
+def make_tree(root, count):
+    root.mkdir()
+
+    for i in range(count):
+        # Alternately compressible and stored by the default policy.
+        name = f"file{i:03}.txt" if i % 2 else f"file{i:03}.png"
+        (root / name).write_bytes(f"member {i}\n".encode() * (i + 1))
+
+    return collect_tree(str(root))
+
+
+def write_archive(path, members, keep, window=None):
+    with ZipFile(path, "w") as zf:
+        for member in members.members(keep):
+            if window is not None:
+                assert len(members._futures) <= window
+
+            write_precompressed(zf, member, keep)
+
+
+def read_archive(path):
+    with ZipFile(path) as zf:
+        assert zf.testzip() is None
+
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def test_precompressed_files_window(tmp_path):
+    files = make_tree(tmp_path / "pkg", 50)
+
+    with ThreadPoolExecutor(4) as executor:
+        members = PrecompressedFiles(files, CompressionPolicy(), executor, window=4)
+
+        try:
+            write_archive(tmp_path / "a.zip", members, False, window=4)
+        finally:
+            members.close()
+
+    assert read_archive(tmp_path / "a.zip") == {
+        arcname: open(filename, "rb").read() for (filename, arcname) in files
+    }
+
+
+def test_precompressed_files_kept(tmp_path):
+    files = make_tree(tmp_path / "pkg", 20)
+
+    with ThreadPoolExecutor(4) as executor:
+        members = PrecompressedFiles(files, CompressionPolicy(), executor, window=4)
+
+        try:
+            write_archive(tmp_path / "a.zip", members, True)
+            write_archive(tmp_path / "b.zip", members, True)
+            write_archive(tmp_path / "c.zip", members, False)
+
+            spool_filename = members._spool_filename
+
+            assert spool_filename is not None and os.path.isfile(spool_filename)
+        finally:
+            members.close()
+
+    assert not os.path.exists(spool_filename)
+
+    expected = {arcname: open(filename, "rb").read() for (filename, arcname) in files}
+
+    for name in ["a.zip", "b.zip", "c.zip"]:
+        assert read_archive(tmp_path / name) == expected
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import os
+
+from pex.common import Chroot
+
+from daml_dit_ddit import bytecode
+
+
+def make_chroot(path, count):
+    chroot = Chroot(str(path))
+
+    for i in range(count):
+        chroot.write(f"VALUE = {i}\n".encode(), f"mod{i}.py", label="source")
+
+    return chroot
+
+
+def test_compile_chroot_workers(project_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(bytecode, "COMPILE_BATCH_SIZE", 2)
+
+    chroot = make_chroot(tmp_path / "chroot", 6)
+
+    stats = bytecode.compile_chroot(chroot, jobs=2)
+
+    assert (stats.files, stats.cached_files, stats.workers) == (6, 0, 2)
+    assert chroot.filesets[bytecode.BYTECODE_LABEL] == {f"mod{i}.pyc" for i in range(6)}
+
+    for i in range(6):
+        assert os.path.getsize(tmp_path / "chroot" / f"mod{i}.pyc") > 0
+
+    stats = bytecode.compile_chroot(make_chroot(tmp_path / "chroot2", 6), jobs=2)
+
+    assert (stats.files, stats.cached_files) == (6, 6)
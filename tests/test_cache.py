@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import time
+
+from daml_dit_ddit import cache
+
+
+def store(kind, key, size, last_used, tmp_path):
+    source = tmp_path / f"{key}.bin"
+    source.write_bytes(b"x" * size)
+
+    cache.store_artifact(kind, key, str(source), {})
+
+    info_path = os.path.join(cache.cache_root(), kind, key, cache.CACHE_INFO_NAME)
+    os.utime(info_path, (last_used, last_used))
+
+
+def cached_keys(kind):
+    return sorted(os.path.basename(entry.path) for entry in cache.cache_entries(kind))
+
+
+def test_evict_least_recently_used(project_dir, tmp_path):
+    now = time.time()
+
+    store("dit", "a", 100, now - 30, tmp_path)
+    store("dit", "b", 100, now - 10, tmp_path)
+    store("dit", "c", 100, now - 20, tmp_path)
+
+    assert cache.lookup_artifact("dit", "a") is not None
+
+    entry_size = cache.cache_entries("dit")[0].size
+
+    (removed, removed_bytes) = cache.evict_cache_entries("dit", max_bytes=2 * entry_size)
+
+    assert (removed, removed_bytes) == (1, entry_size)
+    assert cached_keys("dit") == ["a", "b"]
+
+
+def test_evict_by_age(project_dir, tmp_path):
+    now = time.time()
+
+    store("pex", "old", 10, now - 3600, tmp_path)
+    store("pex", "new", 10, now, tmp_path)
+
+    (removed, _) = cache.evict_cache_entries("pex", max_age=60)
+
+    assert removed == 1
+    assert cached_keys("pex") == ["new"]
+
+
+def test_evict_keeps_entries(project_dir, tmp_path):
+    store("pex", "a", 10, time.time() - 3600, tmp_path)
+
+    kept = os.path.join(cache.cache_root(), "pex", "a")
+
+    assert cache.evict_cache_entries("pex", max_age=0, keep=[kept]) == (0, 0)
+    assert cached_keys("pex") == ["a"]
+
+
+def tree_digest(path):
+    digest = cache.InputDigest("test")
+    digest.add_tree("src", str(path))
+
+    return digest.hexdigest()
+
+
+def test_digest_is_framed():
+    first = cache.InputDigest("test")
+    first.add_str("a", "bc")
+
+    second = cache.InputDigest("test")
+    second.add_str("ab", "c")
+
+    missing = cache.InputDigest("test")
+    missing.add_str("a", None)
+
+    empty = cache.InputDigest("test")
+    empty.add_str("a", "")
+
+    assert first.hexdigest() != second.hexdigest()
+    assert missing.hexdigest() != empty.hexdigest()
+    assert cache.InputDigest("dit").hexdigest() != cache.InputDigest("pex").hexdigest()
+
+
+def test_tree_digest_stability(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "y.py").write_text("y")
+    (tmp_path / "a" / "x.py").write_text("x")
+
+    digest = tree_digest(tmp_path)
+
+    # Timestamps are not inputs.
+    os.utime(tmp_path / "a" / "x.py", (0, 0))
+    assert tree_digest(tmp_path) == digest
+
+    (tmp_path / "a" / "x.py").write_text("changed")
+    assert tree_digest(tmp_path) != digest
+
+    (tmp_path / "a" / "x.py").write_text("x")
+    assert tree_digest(tmp_path) == digest
+
+    (tmp_path / "a" / "x.py").rename(tmp_path / "a" / "z.py")
+    assert tree_digest(tmp_path) != digest
+
+
+def test_lookup_miss_then_hit(project_dir, tmp_path):
+    assert cache.lookup_artifact("dit", "key") is None
+
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"artifact")
+
+    artifact_hash = cache.store_artifact("dit", "key", str(source), {"name": "x"})
+
+    (artifact_path, info) = cache.lookup_artifact("dit", "key")
+
+    assert info == {"name": "x", "artifact_hash": artifact_hash}
+    assert cache.lookup_artifact("dit", "other") is None
+
+    target = tmp_path / "target.bin"
+
+    assert cache.copy_from_cache(artifact_path, str(target), artifact_hash)
+    assert target.read_bytes() == b"artifact"
+
+
+def test_corrupt_entries_are_misses(project_dir, tmp_path):
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"artifact")
+
+    artifact_hash = cache.store_artifact("dit", "key", str(source), {})
+
+    (artifact_path, _) = cache.lookup_artifact("dit", "key")
+
+    with open(artifact_path, "wb") as f:
+        f.write(b"corrupt")
+
+    target = tmp_path / "target.bin"
+
+    assert not cache.copy_from_cache(artifact_path, str(target), artifact_hash)
+    assert not target.exists()
+
+    with open(os.path.join(os.path.dirname(artifact_path), cache.CACHE_INFO_NAME), "w") as f:
+        f.write("not json")
+
+    assert cache.lookup_artifact("dit", "key") is None
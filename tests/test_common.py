@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from daml_dit_ddit import common
+
+DIT_META = """\
+catalog:
+    name: test-proj
+    version: 1.2.3
+    description: Test project
+    release_date: 2021-02-03
+    tags: [integration]
+integration_types:
+    - id: test_int
+      name: Test Integration
+      description: Test
+      entrypoint: testint.main
+      env_class: testint.Env
+      fields: []
+"""
+
+
+@pytest.fixture
+def dit_meta(project_dir):
+    (project_dir / "dit-meta.yaml").write_text(DIT_META)
+
+    common._dabl_meta_memo.clear()
+
+    return project_dir
+
+
+def test_metadata_memoized(dit_meta, monkeypatch):
+    dabl_meta = common.load_dabl_meta()
+
+    def fail():
+        raise AssertionError("Metadata reloaded.")
+
+    monkeypatch.setattr(common, "_load_dabl_meta_uncached", fail)
+
+    assert common.load_dabl_meta() is dabl_meta
+
+
+def test_metadata_reloaded_when_changed(dit_meta):
+    dabl_meta = common.load_dabl_meta()
+
+    meta_file = dit_meta / "dit-meta.yaml"
+    meta_file.write_text(DIT_META.replace("1.2.3", "1.2.40"))
+    os.utime(meta_file, ns=(0, 0))
+
+    reloaded = common.load_dabl_meta()
+
+    assert dabl_meta.catalog.version == "1.2.3"
+    assert reloaded.catalog.version == "1.2.40"
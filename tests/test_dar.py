@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from hashlib import sha256
+from zipfile import ZipFile
+
+import pytest
+
+from daml_dit_ddit.dar import (
+    ARCHIVE_HASH_FIELD,
+    ARCHIVE_PAYLOAD_FIELD,
+    DAR_MANIFEST_PATH,
+    WIRETYPE_LENGTH_DELIMITED,
+    DarFormatError,
+    dalf_package_id,
+    parse_manifest,
+    read_dar,
+)
+
+PAYLOAD = b"daml-lf payload"
+
+
+def varint(value):
+    data = b""
+
+    while value > 0x7F:
+        data += bytes([(value & 0x7F) | 0x80])
+        value >>= 7
+
+    return data + bytes([value])
+
+
+def field(field_number, value):
+    key = (field_number << 3) | WIRETYPE_LENGTH_DELIMITED
+
+    return varint(key) + varint(len(value)) + value
+
+
+def dalf(payload=PAYLOAD, recorded_hash=None):
+    data = field(ARCHIVE_PAYLOAD_FIELD, payload)
+
+    if recorded_hash is not None:
+        data += field(ARCHIVE_HASH_FIELD, recorded_hash)
+
+    return data
+
+
+def write_dar(path, manifest, members):
+    with ZipFile(path, "w") as darfile:
+        if manifest is not None:
+            darfile.writestr(DAR_MANIFEST_PATH, manifest)
+
+        for (name, data) in members.items():
+            darfile.writestr(name, data)
+
+    return str(path)
+
+
+def test_parse_manifest_continuation_lines():
+    manifest = parse_manifest(
+        "Manifest-Version: 1.0\r\n"
+        "Main-Dalf: proj-1.0.0-0123456789abcdef/proj-1.0.0-01234\r\n"
+        " 56789abcdef.dalf\r\n"
+        "Dalfs: a.dalf, \r\n"
+        "  b.dalf\r\n"
+        "\r\n"
+    )
+
+    assert manifest == {
+        "Manifest-Version": "1.0",
+        "Main-Dalf": "proj-1.0.0-0123456789abcdef/proj-1.0.0-0123456789abcdef.dalf",
+        "Dalfs": "a.dalf,  b.dalf",
+    }
+
+
+def test_parse_manifest_invalid_line():
+    with pytest.raises(DarFormatError):
+        parse_manifest("Manifest-Version: 1.0\nnot an attribute\n")
+
+
+def test_dalf_package_id_is_payload_hash():
+    package_id = sha256(PAYLOAD).hexdigest()
+
+    assert dalf_package_id(dalf()) == package_id
+    assert dalf_package_id(dalf(recorded_hash=package_id.encode())) == package_id
+
+
+def test_dalf_package_id_hash_mismatch():
+    with pytest.raises(DarFormatError, match="mismatch"):
+        dalf_package_id(dalf(recorded_hash=sha256(b"other").hexdigest().encode()))
+
+
+def test_dalf_package_id_invalid_hash_text():
+    with pytest.raises(DarFormatError):
+        dalf_package_id(dalf(recorded_hash=b"\xff\xfe"))
+
+
+def test_dalf_package_id_truncated_varint():
+    with pytest.raises(DarFormatError, match="Truncated varint"):
+        dalf_package_id(dalf()[:1] + b"\x80")
+
+
+def test_dalf_package_id_no_payload():
+    with pytest.raises(DarFormatError, match="no payload"):
+        dalf_package_id(field(ARCHIVE_HASH_FIELD, b"abc"))
+
+
+def test_read_dar(tmp_path):
+    dar_filename = write_dar(
+        tmp_path / "proj.dar",
+        "Main-Dalf: main.dalf\nDalfs: main.dalf, dep.dalf\n",
+        {"main.dalf": dalf(), "dep.dalf": dalf(payload=b"dep")},
+    )
+
+    dar = read_dar(dar_filename)
+
+    assert dar.main_dalf == "main.dalf"
+    assert dar.main_package_id == sha256(PAYLOAD).hexdigest()
+    assert dar.package_ids == [sha256(PAYLOAD).hexdigest(), sha256(b"dep").hexdigest()]
+
+
+def test_read_dar_missing_manifest(tmp_path):
+    dar_filename = write_dar(tmp_path / "proj.dar", None, {"main.dalf": dalf()})
+
+    with pytest.raises(DarFormatError, match="has no"):
+        read_dar(dar_filename)
+
+
+def test_read_dar_invalid_manifest_text(tmp_path):
+    dar_filename = write_dar(tmp_path / "proj.dar", b"Main-Dalf: \xff.dalf\n", {})
+
+    with pytest.raises(DarFormatError, match="UTF-8"):
+        read_dar(dar_filename)
+
+
+def test_read_dar_missing_dalf(tmp_path):
+    dar_filename = write_dar(
+        tmp_path / "proj.dar",
+        "Main-Dalf: main.dalf\nDalfs: main.dalf, dep.dalf\n",
+        {"main.dalf": dalf()},
+    )
+
+    with pytest.raises(DarFormatError, match="dep.dalf"):
+        read_dar(dar_filename)
+
+
+def test_read_dar_not_a_zip(tmp_path):
+    dar_filename = tmp_path / "proj.dar"
+    dar_filename.write_bytes(b"not a zip")
+
+    with pytest.raises(DarFormatError):
+        read_dar(str(dar_filename))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from hashlib import sha256
+
+import pytest
+
+from daml_dit_ddit import lockfile
+from daml_dit_ddit.lockfile import (
+    LOCK_FORMAT_VERSION,
+    LockedDistribution,
+    ensure_locked_distributions,
+    locked_distributions,
+    read_lockfile,
+    store_distribution,
+    wheel_store_path,
+    write_lockfile,
+)
+
+WHEEL_NAME = "tinypkg-0.1-py3-none-any.whl"
+WHEEL_BYTES = b"wheel contents"
+
+
+def locked(name, version):
+    return LockedDistribution(
+        name, version, f"{name}-{version}-py3-none-any.whl", sha256(name.encode()).hexdigest()
+    )
+
+
+def test_lockfile_round_trip(project_dir):
+    (project_dir / "requirements.txt").write_text("six\nattrs\n")
+
+    dists = [locked("six", "1.16.0"), locked("attrs", "21.2.0")]
+
+    write_lockfile("hub", dists)
+
+    assert read_lockfile()["version"] == LOCK_FORMAT_VERSION
+    assert locked_distributions("hub") == dists
+
+
+def test_locked_distributions_per_platform(project_dir):
+    (project_dir / "requirements.txt").write_text("six\n")
+
+    write_lockfile("hub", [locked("six", "1.15.0")])
+    write_lockfile("local", [locked("six", "1.16.0")])
+
+    assert locked_distributions("hub") == [locked("six", "1.15.0")]
+    assert locked_distributions("local") == [locked("six", "1.16.0")]
+    assert locked_distributions("linux_x86_64-cp-39-cp39") is None
+
+
+def test_lock_discarded_when_requirements_change(project_dir):
+    (project_dir / "requirements.txt").write_text("six\n")
+
+    write_lockfile("hub", [locked("six", "1.16.0")])
+
+    (project_dir / "requirements.txt").write_text("six\nattrs\n")
+
+    assert locked_distributions("hub") is None
+
+    # Locking another platform starts over, rather than keeping pins made
+    # against the old requirements.
+    write_lockfile("local", [locked("six", "1.16.0"), locked("attrs", "21.2.0")])
+
+    assert locked_distributions("hub") is None
+    assert len(locked_distributions("local")) == 2
+
+
+def test_unsupported_lockfile_format(project_dir):
+    (project_dir / "requirements.lock").write_text("version: 99\n")
+
+    with pytest.raises(SystemExit):
+        read_lockfile()
+
+
+@pytest.fixture
+def fake_download(monkeypatch, tmp_path):
+    """
+    Replace downloads with storing a fixed wheel, recording the
+    requirements downloaded.
+    """
+    downloads = []
+
+    def download_distributions(platform, requirements, transitive, sources):
+        downloads.extend(requirements)
+
+        wheel = tmp_path / WHEEL_NAME
+        wheel.write_bytes(WHEEL_BYTES)
+
+        return [store_distribution(str(wheel))]
+
+    monkeypatch.setattr(lockfile, "download_distributions", download_distributions)
+
+    return downloads
+
+
+def test_ensure_locked_distributions_fetches_missing(project_dir, fake_download):
+    dist = LockedDistribution("tinypkg", "0.1", WHEEL_NAME, sha256(WHEEL_BYTES).hexdigest())
+
+    assert ensure_locked_distributions(None, [dist]) == [wheel_store_path(dist)]
+    assert ensure_locked_distributions(None, [dist]) == [wheel_store_path(dist)]
+
+    assert fake_download == ["tinypkg==0.1"]
+
+
+def test_ensure_locked_distributions_hash_mismatch(project_dir, fake_download):
+    dist = LockedDistribution("tinypkg", "0.1", WHEEL_NAME, sha256(b"other").hexdigest())
+
+    with pytest.raises(SystemExit):
+        ensure_locked_distributions(None, [dist])
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import venv
+from hashlib import sha256
+
+import pytest
+
+from daml_dit_ddit import package_store
+from daml_dit_ddit.cache import cache_root
+from daml_dit_ddit.lockfile import WHEEL_STORE_KIND
+from daml_dit_ddit.package_store import (
+    ResolvedPackage,
+    download_package,
+    venv_site_packages,
+)
+
+WHEEL_NAME = "tinypkg-0.1-py3-none-any.whl"
+WHEEL_BYTES = b"wheel contents"
+
+
+def test_venv_site_packages_is_on_sys_path(tmp_path):
+    venv_dir = str(tmp_path / "venv")
+
+    venv.EnvBuilder(with_pip=False).create(venv_dir)
+
+    sys_path = subprocess.check_output(
+        [os.path.join(venv_dir, "bin", "python"), "-c", "import sys; print(*sys.path, sep='\\n')"],
+        text=True,
+    ).splitlines()
+
+    assert venv_site_packages(venv_dir) in sys_path
+
+
+@pytest.fixture
+def fake_pip_wheel(monkeypatch):
+    """
+    Replace 'pip wheel' with one that writes a fixed wheel into the wheel
+    directory.
+    """
+
+    def run(args, **kwargs):
+        wheel_dir = args[args.index("--wheel-dir") + 1]
+
+        with open(os.path.join(wheel_dir, WHEEL_NAME), "wb") as f:
+            f.write(WHEEL_BYTES)
+
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(package_store.subprocess, "run", run)
+
+
+def resolved_wheel(wheel_hash):
+    return ResolvedPackage(
+        name="tinypkg",
+        version="0.1",
+        url=f"https://example.com/packages/{WHEEL_NAME}",
+        sha256=wheel_hash,
+    )
+
+
+def test_download_package_stores_wheel(project_dir, fake_pip_wheel):
+    wheel_hash = sha256(WHEEL_BYTES).hexdigest()
+
+    stored = download_package(["pip"], resolved_wheel(wheel_hash))
+
+    assert stored.endswith(os.path.join(wheel_hash, WHEEL_NAME))
+
+    with open(stored, "rb") as f:
+        assert f.read() == WHEEL_BYTES
+
+
+def test_download_package_hash_mismatch(project_dir, fake_pip_wheel):
+    with pytest.raises(SystemExit):
+        download_package(["pip"], resolved_wheel(sha256(b"other").hexdigest()))
+
+    assert not os.path.exists(os.path.join(cache_root(), WHEEL_STORE_KIND))
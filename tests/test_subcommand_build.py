@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import datetime
+import os
+import subprocess
+import threading
+from zipfile import ZipFile
+
+import pytest
+from daml_dit_api import DABL_META_NAME, DIT_META_NAME
+
+from daml_dit_ddit import subcommand_build
+from daml_dit_ddit.archive import CompressionPolicy, CompressionStats
+from daml_dit_ddit.build_config import (
+    DIT_CACHE_KIND,
+    PLATFORM_HUB,
+    PLATFORM_LOCAL,
+    BuildTarget,
+)
+from daml_dit_ddit.cache import cache_entries
+from daml_dit_ddit.common import accept_dabl_meta_bytes, die
+from daml_dit_ddit.pex_layout import PEX_LAYOUT_STARTUP
+from daml_dit_ddit.slim import SlimPolicy
+from daml_dit_ddit.subcommand_build import (
+    DarPlan,
+    DitVariant,
+    build_project,
+    complete_dar,
+    complete_dit,
+    pex_input_digest,
+    plan_dar,
+    restamp_dit,
+)
+
+DIT_META = b"""\
+catalog:
+    name: test-proj
+    version: 1.2.3
+    description: Test project
+    release_date: 2021-02-03
+"""
+
+
+def write_dit(path, members):
+    with open(path, "wb") as f:
+        f.write(b"#!/usr/bin/env python3\n")
+
+    with ZipFile(path, "a") as dit:
+        for (name, data) in members:
+            dit.writestr(name, data)
+
+
+def test_restamp_dit(tmp_path):
+    dit_filename = str(tmp_path / "test.dit")
+
+    write_dit(
+        dit_filename,
+        [("__main__.py", b"pass\n"), (DIT_META_NAME, DIT_META), (DABL_META_NAME, DIT_META)],
+    )
+
+    assert restamp_dit(dit_filename, CompressionPolicy()) is True
+
+    with ZipFile(dit_filename) as dit:
+        assert dit.testzip() is None
+        assert dit.namelist() == ["__main__.py", DIT_META_NAME, DABL_META_NAME]
+        assert dit.read("__main__.py") == b"pass\n"
+
+        for name in [DIT_META_NAME, DABL_META_NAME]:
+            catalog = accept_dabl_meta_bytes(dit.read(name)).catalog
+
+            assert catalog is not None
+            assert catalog.release_date == datetime.date.today()
+
+    assert restamp_dit(dit_filename, CompressionPolicy()) is False
+
+
+def test_restamp_dit_unexpected_layout(tmp_path):
+    dit_filename = str(tmp_path / "test.dit")
+
+    write_dit(dit_filename, [(DIT_META_NAME, DIT_META), ("__main__.py", b"pass\n")])
+
+    assert restamp_dit(dit_filename, CompressionPolicy()) is None
+
+
+def test_size_budget_failure_leaves_no_dit(project_dir):
+    variant = DitVariant(
+        target=BuildTarget(PLATFORM_HUB),
+        dit_filename="test-proj-1.2.3.dit",
+        tmp_filename="test-proj-1.2.3.dit.tmp",
+        dit_key="key",
+    )
+
+    write_dit(variant.tmp_filename, [("__main__.py", b"pass\n" * 1000)])
+
+    dabl_meta = accept_dabl_meta_bytes(DIT_META)
+
+    with pytest.raises(SystemExit):
+        complete_dit(variant, dabl_meta, [], set(), CompressionStats(), True, 100)
+
+    assert os.listdir(project_dir) == []
+    assert cache_entries(DIT_CACHE_KIND) == []
+
+
+PROJECT_META = b"""\
+catalog:
+    name: test-proj
+    version: 1.2.3
+    description: Test project
+integration_types:
+    - id: test_int
+      name: Test Integration
+      description: Test
+      entrypoint: testint.main
+      env_class: testint.Env
+      fields: []
+"""
+
+
+def test_dar_failure_leaves_no_temporary_files(project_dir, monkeypatch):
+    (project_dir / "dit-meta.yaml").write_bytes(PROJECT_META)
+    (project_dir / "pkg").mkdir()
+    (project_dir / "pkg" / "data.txt").write_text("data\n" * 100)
+
+    pex_started = threading.Semaphore(0)
+
+    def fake_build_pex(pex_filename, *args):
+        with open(pex_filename, "wb") as f:
+            f.write(b"#!/usr/bin/env python3\n")
+
+        pex_started.release()
+
+        return "python-direct"
+
+    def fake_complete_dar(plan):
+        # Fail once both PEX stages have written their temporary files.
+        for _ in range(2):
+            assert pex_started.acquire(timeout=10)
+
+        die("DAR build failed.")
+
+    monkeypatch.setattr(
+        subcommand_build,
+        "plan_dar",
+        lambda dabl_meta, rebuild_dar: DarPlan("test-proj", "1.2.3", "test.dar", "digest"),
+    )
+    monkeypatch.setattr(subcommand_build, "complete_dar", fake_complete_dar)
+    monkeypatch.setattr(subcommand_build, "build_pex", fake_build_pex)
+
+    with pytest.raises(SystemExit):
+        build_project(
+            force_integration=False,
+            force=False,
+            skip_dar_build=False,
+            rebuild_dar=False,
+            local_only=False,
+            add_subdeployments=[],
+            platforms=[PLATFORM_HUB, PLATFORM_LOCAL],
+        )
+
+    assert sorted(os.listdir(project_dir)) == ["dit-meta.yaml", "pkg"]
+
+
+def test_dar_reused_with_source_in_project_dir(project_dir, monkeypatch):
+    (project_dir / "dit-meta.yaml").write_bytes(PROJECT_META)
+    (project_dir / "daml.yaml").write_text(
+        "sdk-version: 1.0.0\nname: test-proj\nversion: 1.2.3\nsource: .\n"
+    )
+    (project_dir / "Main.daml").write_text("module Main where\n")
+
+    def fake_daml_build(args):
+        (project_dir / ".daml" / "dist").mkdir(parents=True, exist_ok=True)
+        (project_dir / ".daml" / "dist" / "out.dar").write_text("dar")
+        (project_dir / args[-1]).write_text("dar")
+
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(subcommand_build.subprocess, "run", fake_daml_build)
+    monkeypatch.setattr(subcommand_build, "get_dar_main_package_id", lambda filename: "pkgid")
+
+    dabl_meta = accept_dabl_meta_bytes(PROJECT_META)
+
+    plan = plan_dar(dabl_meta, False)
+    assert plan is not None and plan.needs_build
+
+    complete_dar(plan)
+
+    # Other build outputs in the source directory are not Daml inputs.
+    (project_dir / "test-proj-1.2.3.dit").write_text("dit")
+    (project_dir / "pkg").mkdir()
+    (project_dir / "pkg" / "data.txt").write_text("data")
+
+    plan = plan_dar(dabl_meta, False)
+    assert plan is not None and plan.main_package_id == "pkgid"
+
+    (project_dir / "Main.daml").write_text("module Main where\n\nx = 1\n")
+
+    plan = plan_dar(dabl_meta, False)
+    assert plan is not None and plan.needs_build
+
+
+def test_pex_input_digest_stability(project_dir):
+    (project_dir / "src").mkdir()
+    (project_dir / "src" / "main.py").write_text("pass\n")
+    (project_dir / "requirements.txt").write_text("six\n")
+
+    hub_id = BuildTarget(PLATFORM_HUB).platform_id
+
+    digest = pex_input_digest(hub_id)
+
+    # Outputs and other stages' inputs are not inputs to the PEX.
+    (project_dir / "pkg").mkdir()
+    (project_dir / "pkg" / "data.txt").write_text("data")
+    os.utime(project_dir / "src" / "main.py", (0, 0))
+
+    assert pex_input_digest(hub_id) == digest
+
+    variants = [
+        pex_input_digest(BuildTarget(PLATFORM_LOCAL).platform_id),
+        pex_input_digest(hub_id, slim=SlimPolicy()),
+        pex_input_digest(hub_id, layout=PEX_LAYOUT_STARTUP),
+    ]
+
+    (project_dir / "src" / "main.py").write_text("print()\n")
+    variants.append(pex_input_digest(hub_id))
+
+    (project_dir / "requirements.txt").write_text("six==1.16.0\n")
+    variants.append(pex_input_digest(hub_id))
+
+    (project_dir / "requirements.lock").write_text("{}\n")
+    variants.append(pex_input_digest(hub_id))
+
+    assert len({digest, *variants}) == len(variants) + 1
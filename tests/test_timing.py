@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import threading
+
+import pytest
+
+from daml_dit_ddit import timing
+from daml_dit_ddit.timing import (
+    PROCESS_WIDE_MARK,
+    TimingRecorder,
+    chrome_trace,
+    span,
+    timings_table,
+    write_chrome_trace,
+)
+
+
+def span_tree(recorder):
+    return [(span.depth, span.name) for span in recorder.sorted_spans()]
+
+
+def test_span_tree():
+    recorder = TimingRecorder()
+
+    with recorder.span("build"):
+        with recorder.span("dar"):
+            with recorder.span("dar.inspect"):
+                pass
+
+        with recorder.span("pex", platform="hub"):
+            pass
+
+    with recorder.span("hash"):
+        pass
+
+    assert span_tree(recorder) == [
+        (0, "build"),
+        (1, "dar"),
+        (2, "dar.inspect"),
+        (1, "pex"),
+        (0, "hash"),
+    ]
+
+    (build, dar, inspect, pex, _) = recorder.sorted_spans()
+
+    assert build.wall_time >= dar.wall_time >= inspect.wall_time
+    assert build.start <= dar.start <= inspect.start <= pex.start
+    assert pex.args == {"platform": "hub"}
+
+
+def test_thread_spans_nested_beneath_main_thread():
+    recorder = TimingRecorder()
+
+    def stage():
+        with recorder.span("stage"):
+            with recorder.span("stage.step"):
+                pass
+
+    with recorder.span("build"):
+        thread = threading.Thread(target=stage)
+        thread.start()
+        thread.join()
+
+    assert span_tree(recorder) == [(0, "build"), (1, "stage"), (2, "stage.step")]
+
+    (build, stage_span, _) = recorder.sorted_spans()
+
+    assert stage_span.thread_id != build.thread_id
+
+
+def test_span_records_error():
+    recorder = TimingRecorder()
+
+    with pytest.raises(ValueError):
+        with recorder.span("build"):
+            raise ValueError()
+
+    assert recorder.spans[0].args == {"error": "ValueError"}
+
+
+def test_spans_not_recorded_when_disabled(monkeypatch):
+    monkeypatch.setattr(timing, "_recorder", None)
+
+    with span("build") as active:
+        assert active is None
+
+    recorder = timing.enable_timings()
+
+    with span("build") as active:
+        assert active is not None
+
+    assert span_tree(recorder) == [(0, "build")]
+
+
+def test_timings_table_marks_process_wide_columns():
+    recorder = TimingRecorder()
+
+    with recorder.span("build"):
+        with recorder.span("dar"):
+            pass
+
+    lines = timings_table(recorder).splitlines()
+
+    for column in ["child cpu", "read", "written", "peak rss"]:
+        assert f"{column}{PROCESS_WIDE_MARK}" in lines[0]
+
+    assert f"wall{PROCESS_WIDE_MARK}" not in lines[0]
+    assert lines[2].startswith("build ")
+    assert lines[3].startswith("  dar ")
+    assert lines[4].startswith(PROCESS_WIDE_MARK)
+
+
+def test_chrome_trace(tmp_path):
+    recorder = TimingRecorder()
+
+    with recorder.span("build"):
+        with recorder.span("pex", platform="hub"):
+            pass
+
+    trace = chrome_trace(recorder)
+
+    (build, pex) = trace["traceEvents"]
+    (build_span, pex_span) = recorder.sorted_spans()
+
+    assert [event["name"] for event in trace["traceEvents"]] == ["build", "pex"]
+    assert {event["ph"] for event in trace["traceEvents"]} == {"X"}
+
+    assert build["ts"] == build_span.start * 1e6
+    assert build["dur"] == build_span.wall_time * 1e6
+    assert build["ts"] <= pex["ts"]
+    assert pex["ts"] + pex["dur"] <= build["ts"] + build["dur"]
+    assert pex["tid"] == build["tid"] == pex_span.thread_id
+
+    assert pex["args"]["platform"] == "hub"
+    assert set(pex["args"]) >= {
+        "cpu_time",
+        "process_child_cpu_time",
+        "process_read_bytes",
+        "process_write_bytes",
+        "process_max_rss",
+    }
+
+    trace_filename = str(tmp_path / "trace.json")
+    write_chrome_trace(recorder, trace_filename)
+
+    with open(trace_filename, "r") as f:
+        assert json.load(f) == trace
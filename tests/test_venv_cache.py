@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict
+
+import pytest
+
+from daml_dit_ddit import venv_cache
+from daml_dit_ddit.build_config import build_platform_id
+from daml_dit_ddit.common import VIRTUAL_ENV_DIR
+from daml_dit_ddit.lockfile import (
+    LockedDistribution,
+    locked_distributions,
+    write_lockfile,
+)
+from daml_dit_ddit.venv_cache import (
+    LATEST_IF_MAX_AGE,
+    VenvSpec,
+    cached_venv,
+    install_project_venv,
+    read_venv_info,
+    requirement_inputs,
+    venv_key,
+)
+
+
+def lock_six(version: str):
+    write_lockfile(
+        build_platform_id(True),
+        [LockedDistribution("six", version, f"six-{version}-py2.py3-none-any.whl", version * 8)],
+    )
+
+
+def test_venv_key_changes_with_lock(project_dir):
+    (project_dir / "requirements.txt").write_text("six\n")
+
+    unlocked_key = venv_key(VenvSpec(), locked_distributions(build_platform_id(True)))
+
+    lock_six("1.15.0")
+    old_key = venv_key(VenvSpec(), locked_distributions(build_platform_id(True)))
+
+    lock_six("1.16.0")
+    new_key = venv_key(VenvSpec(), locked_distributions(build_platform_id(True)))
+
+    assert len({unlocked_key, old_key, new_key}) == 3
+
+
+def test_requirement_inputs(project_dir):
+    (project_dir / "reqs").mkdir()
+    (project_dir / "requirements.txt").write_text(
+        "six  # comment\n"
+        "-r reqs/base.txt\n"
+        "--constraint=constraints.txt\n"
+        "-e ./vendored/lib\n"
+        "attrs @ file:///tmp/attrs.whl\n"
+        "-r https://example.com/requirements.txt\n"
+    )
+    (project_dir / "reqs" / "base.txt").write_text("-r ../requirements.txt\n-rmore.txt\n")
+
+    assert requirement_inputs("requirements.txt") == (
+        ["requirements.txt", "reqs/base.txt", "constraints.txt", "reqs/more.txt"],
+        ["./vendored/lib", "attrs @ file:///tmp/attrs.whl", "https://example.com/requirements.txt"],
+    )
+
+
+def test_venv_key_changes_with_included_requirements(project_dir):
+    (project_dir / "requirements.txt").write_text("-r base.txt\n")
+    (project_dir / "base.txt").write_text("six\n")
+
+    old_key = venv_key(VenvSpec())
+
+    (project_dir / "base.txt").write_text("six==1.16.0\n")
+
+    assert venv_key(VenvSpec()) != old_key
+
+
+@pytest.fixture
+def fake_create_venv(monkeypatch):
+    """
+    Replace environment installs with writing the info file, recording
+    each build directory.
+    """
+    builds = []
+
+    def create_venv(venv_dir, spec, key, locked_dists, sources):
+        builds.append(venv_dir)
+
+        with open(os.path.join(venv_dir, venv_cache.VENV_INFO_NAME), "w") as f:
+            json.dump({"key": key, "created": time.time(), **asdict(spec)}, f)
+
+    monkeypatch.setattr(venv_cache, "_create_venv", create_venv)
+
+    return builds
+
+
+def test_rebuild_swaps_build(project_dir, fake_create_venv):
+    spec = VenvSpec(if_version="1.0.0")
+
+    venv_dir = cached_venv(spec)
+    first_build = os.path.realpath(venv_dir)
+
+    assert fake_create_venv == [first_build]
+    assert cached_venv(spec) == venv_dir
+    assert len(fake_create_venv) == 1
+
+    assert cached_venv(spec, rebuild=True) == venv_dir
+
+    assert len(fake_create_venv) == 2
+    assert os.path.realpath(venv_dir) == fake_create_venv[1] != first_build
+    assert not os.path.exists(first_build)
+
+
+def test_latest_if_is_reinstalled_when_stale(project_dir, fake_create_venv):
+    venv_dir = cached_venv(VenvSpec())
+
+    info = read_venv_info(venv_dir)
+    assert info is not None
+
+    cached_venv(VenvSpec())
+    assert len(fake_create_venv) == 1
+
+    with open(os.path.join(venv_dir, venv_cache.VENV_INFO_NAME), "w") as f:
+        json.dump({**info, "created": time.time() - 2 * LATEST_IF_MAX_AGE}, f)
+
+    cached_venv(VenvSpec())
+    assert len(fake_create_venv) == 2
+
+
+def test_local_venv_is_kept_without_rebuild(project_dir, fake_create_venv):
+    (project_dir / VIRTUAL_ENV_DIR).mkdir()
+
+    with pytest.raises(SystemExit):
+        install_project_venv(VenvSpec())
+
+    assert (project_dir / VIRTUAL_ENV_DIR).is_dir()
+    assert fake_create_venv == []
+
+    install_project_venv(VenvSpec(), rebuild=True)
+
+    assert (project_dir / VIRTUAL_ENV_DIR).is_symlink()
+
+
+def test_local_requirements_reinstalled(project_dir, fake_create_venv):
+    (project_dir / "requirements.txt").write_text("./vendored/lib\n")
+
+    spec = VenvSpec(if_version="1.0.0")
+
+    cached_venv(spec)
+    cached_venv(spec)
+
+    assert len(fake_create_venv) == 2
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from daml_dit_ddit.watch import (
+    STAGE_DAML,
+    STAGE_DEPENDENCIES,
+    STAGE_METADATA,
+    STAGE_PKG,
+    STAGE_SOURCES,
+    ProjectWatcher,
+    changed_stages,
+)
+
+
+@pytest.mark.parametrize(
+    ("path", "stages"),
+    [
+        ("daml/Main.daml", [STAGE_DAML]),
+        ("daml/Sub/Model.daml", [STAGE_DAML]),
+        ("daml.yaml", [STAGE_METADATA, STAGE_DAML]),
+        ("dit-meta.yaml", [STAGE_METADATA]),
+        ("requirements.txt", [STAGE_DEPENDENCIES]),
+        ("requirements.lock", [STAGE_DEPENDENCIES]),
+        ("src/integration/main.py", [STAGE_SOURCES]),
+        ("pkg/data/config.json", [STAGE_PKG]),
+        ("other/Main.daml", []),
+        ("README.md", []),
+    ],
+)
+def test_changed_stages(path, stages):
+    assert changed_stages({os.path.normpath(path)}, "daml") == stages
+
+
+def test_changed_stages_with_source_in_project_dir():
+    paths = {"Main.daml", os.path.join("src", "Other.daml"), os.path.join("pkg", "x.txt")}
+
+    assert changed_stages(paths, ".") == [STAGE_DAML, STAGE_SOURCES, STAGE_PKG]
+
+
+def touch(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+    # Polling compares mtimes and sizes, so every write is made visible
+    # regardless of the filesystem's timestamp resolution.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_watcher_polls_changes(project_dir):
+    (project_dir / "daml.yaml").write_text("source: daml\n")
+    touch(project_dir / "daml" / "Main.daml", "module Main where\n")
+    touch(project_dir / "src" / "main.py", "pass\n")
+
+    watcher = ProjectWatcher()
+
+    assert watcher.poll() == set()
+
+    touch(project_dir / "daml" / "Main.daml", "module Main where\n-- changed\n")
+    touch(project_dir / "daml" / ".daml" / "dist" / "out.daml", "ignored\n")
+    touch(project_dir / "src" / "main.pyc", "ignored\n")
+    touch(project_dir / "requirements.txt", "six\n")
+
+    changed = watcher.poll()
+
+    assert changed == {os.path.join("daml", "Main.daml"), "requirements.txt"}
+    assert changed_stages(changed, "daml") == [STAGE_DAML, STAGE_DEPENDENCIES]
+
+    assert watcher.poll() == set()
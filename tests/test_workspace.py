@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from daml_dit_ddit.workspace import (
+    build_workspace,
+    check_acyclic,
+    discover_projects,
+    project_dependencies,
+)
+
+
+def write_project(root, name, subdeployments=()):
+    path = root / name
+    path.mkdir(parents=True)
+
+    (path / "dit-meta.yaml").write_text(
+        "catalog:\n"
+        f"    name: {name}\n"
+        "    version: 1.0.0\n"
+        "    description: Test project\n"
+        f"subdeployments: {json.dumps(list(subdeployments))}\n"
+    )
+
+    return path
+
+
+def record_build(add_subdeployments, log_filename):
+    """
+    A stand-in for the build subcommand, run in the workspace's worker
+    processes. Records the build in a log, and fails for projects named
+    broken.
+    """
+    name = os.path.basename(os.getcwd())
+
+    with open(log_filename, "a") as f:
+        f.write(json.dumps([name, sorted(os.path.basename(sd) for sd in add_subdeployments)]))
+        f.write("\n")
+
+    if name == "broken":
+        raise SystemExit(3)
+
+    with open(f"{name}-1.0.0.dit", "w") as f:
+        f.write(name)
+
+
+def build_log(log_filename):
+    with open(log_filename, "r") as f:
+        return [tuple(json.loads(line)) for line in f]
+
+
+@pytest.fixture
+def workspace(project_dir):
+    write_project(project_dir, "gamma", ["beta-1.0.0.dit", "alpha-1.0.0.dit"])
+    write_project(project_dir, "alpha")
+    write_project(project_dir, "beta", ["alpha-1.0.0.dit", "external-1.0.0.dit"])
+    write_project(project_dir, "delta")
+
+    return project_dir
+
+
+def test_project_dependencies(workspace):
+    projects = discover_projects(str(workspace))
+
+    assert [project.name for project in projects] == ["alpha", "beta", "delta", "gamma"]
+
+    dependencies = project_dependencies(projects)
+
+    names = {
+        os.path.basename(path): [dep.name for dep in deps] for (path, deps) in dependencies.items()
+    }
+
+    # Subdeployments not built in the workspace are not dependencies.
+    assert names == {"alpha": [], "beta": ["alpha"], "delta": [], "gamma": ["beta", "alpha"]}
+
+
+def test_build_workspace_in_dependency_order(workspace, tmp_path):
+    log_filename = str(tmp_path / "builds.log")
+
+    build_workspace(str(workspace), 2, record_build, {"log_filename": log_filename})
+
+    builds = build_log(log_filename)
+    order = [name for (name, _) in builds]
+
+    assert sorted(order) == ["alpha", "beta", "delta", "gamma"]
+    assert order.index("alpha") < order.index("beta") < order.index("gamma")
+
+    assert dict(builds) == {
+        "alpha": [],
+        "beta": ["alpha-1.0.0.dit"],
+        "delta": [],
+        "gamma": ["alpha-1.0.0.dit", "beta-1.0.0.dit"],
+    }
+
+
+def test_build_workspace_skips_dependents_of_failures(project_dir, tmp_path):
+    write_project(project_dir, "broken")
+    write_project(project_dir, "user", ["broken-1.0.0.dit"])
+    write_project(project_dir, "other")
+
+    log_filename = str(tmp_path / "builds.log")
+
+    with pytest.raises(SystemExit):
+        build_workspace(str(project_dir), 1, record_build, {"log_filename": log_filename})
+
+    assert sorted(name for (name, _) in build_log(log_filename)) == ["broken", "other"]
+
+
+def test_cycle_detected(project_dir):
+    write_project(project_dir, "alpha", ["gamma-1.0.0.dit"])
+    write_project(project_dir, "beta", ["alpha-1.0.0.dit"])
+    write_project(project_dir, "gamma", ["beta-1.0.0.dit"])
+    write_project(project_dir, "delta")
+
+    projects = discover_projects(str(project_dir))
+
+    with pytest.raises(SystemExit):
+        check_acyclic(projects, project_dependencies(projects))
+
+
+def test_self_dependency_is_a_cycle(project_dir):
+    write_project(project_dir, "alpha", ["alpha-1.0.0.dit"])
+
+    projects = discover_projects(str(project_dir))
+
+    with pytest.raises(SystemExit):
+        check_acyclic(projects, project_dependencies(projects))
+
+
+def test_duplicate_dit_filenames(project_dir):
+    write_project(project_dir / "one", "alpha")
+    write_project(project_dir / "two", "alpha")
+
+    with pytest.raises(SystemExit):
+        project_dependencies(discover_projects(str(project_dir)))